@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+كشف شذوذ الإهلاك - نظام إدارة الأصول الثابتة
+حساب الإهلاك المتراكم المتوقع (قسط ثابت من تاريخ التشغيل والعمر الإنتاجي)
+لكل الأصول في تمريرة واحدة، والتحقق من أن صافي القيمة الدفترية = التكلفة -
+الإهلاك المتراكم - القيمة المتبقية، ثم درجات z متينة (الوسيط/MAD) لكل تصنيف
+وترتيب أسوأ الحالات.
+"""
+import numpy as np
+import pandas as pd
+
+import config
+
+COST = config.COLUMN_MAPPING['cost']
+ACCUMULATED = config.COLUMN_MAPPING['accumulated_depreciation']
+RESIDUAL = config.COLUMN_MAPPING['residual_value']
+NBV = config.COLUMN_MAPPING['net_book_value']
+USEFUL_LIFE = config.COLUMN_MAPPING['useful_life']
+SERVICE_DATE = config.COLUMN_MAPPING['date_in_service']
+
+# MAD × 1.4826 يقدّر الانحراف المعياري للتوزيع الطبيعي، ومتوسط الانحراف المطلق × 1.2533 كذلك
+_MAD_SCALE = 1.4826
+_MEAN_AD_SCALE = 1.2533
+
+
+def _column(df, column):
+    if column not in df.columns:
+        return np.full(len(df), np.nan)
+    return pd.to_numeric(df[column], errors='coerce').to_numpy(dtype=float)
+
+
+def robust_zscores(values, groups, min_scale=0.0):
+    """(x - الوسيط) / (1.4826 × MAD) داخل كل مجموعة؛ متوسط الانحراف المطلق عندما MAD = 0
+
+    min_scale حد أدنى للمقام حتى لا تصبح فروق التقريب الضئيلة في مجموعة متجانسة شذوذاً.
+    """
+    values = pd.Series(values)
+    grouped = values.groupby(groups)
+    deviation = (values - grouped.transform('median')).abs()
+    by_group = deviation.groupby(groups)
+    scale = by_group.transform('median') * _MAD_SCALE
+    fallback = by_group.transform('mean') * _MEAN_AD_SCALE
+    scale = scale.where(scale > 0, fallback).clip(lower=min_scale)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z = (values - grouped.transform('median')) / scale
+    # مجموعة بلا أي تباين: لا شذوذ
+    return z.where(scale > 0, 0.0).to_numpy()
+
+
+def score_depreciation(df, as_of=None, category_key=None):
+    """إطار بالقيم المتوقعة والفروقات ودرجة الشذوذ لكل أصل (بنفس فهرس الإطار)"""
+    anomaly_config = config.ANOMALY_CONFIG
+    as_of = pd.Timestamp(as_of or config.EVENT_LOG_CONFIG['SNAPSHOT_DATE'])
+    category = config.COLUMN_MAPPING[category_key or anomaly_config['CATEGORY']]
+
+    cost = _column(df, COST)
+    # الإهلاك المتراكم مخزّن بإشارة سالبة في بعض الملفات (حساب مقابل)
+    accumulated = np.abs(np.nan_to_num(_column(df, ACCUMULATED)))
+    residual = np.nan_to_num(_column(df, RESIDUAL))
+    life = _column(df, USEFUL_LIFE)
+    service = pd.to_datetime(df[SERVICE_DATE], errors='coerce') if SERVICE_DATE in df.columns \
+        else pd.Series(pd.NaT, index=df.index)
+
+    # 1) الإهلاك المتوقع بالقسط الثابت حتى تاريخ اللقطة (محدود بالقيمة القابلة للإهلاك)
+    elapsed = ((as_of - service).dt.days / 365.25).clip(lower=0).to_numpy(dtype=float, na_value=np.nan)
+    base = np.clip(cost - residual, 0, None)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        expected = np.clip(base * elapsed / np.where(life > 0, life, np.nan), 0, base)
+        gap_ratio = (accumulated - expected) / np.where(base > 0, base, np.nan)
+
+    # 2) اتساق صافي القيمة الدفترية
+    nbv_gap = _column(df, NBV) - (cost - accumulated - residual)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        nbv_ratio = nbv_gap / np.where(cost > 0, cost, np.nan)
+
+    # 3) درجات z متينة لكل تصنيف، والدرجة النهائية أسوأ الفحصين
+    groups = (df[category].astype(object).fillna('غير محدد').to_numpy() if category in df.columns
+              else np.zeros(len(df), dtype=int))
+    min_scale = anomaly_config['MIN_RATIO_SCALE']
+    depreciation_z = robust_zscores(gap_ratio, groups, min_scale)
+    nbv_mismatch = np.abs(nbv_gap) > anomaly_config['NBV_TOLERANCE']
+    nbv_z = np.where(nbv_mismatch, robust_zscores(np.where(nbv_mismatch, nbv_ratio, 0.0), groups, min_scale), 0.0)
+    score = np.fmax(np.abs(depreciation_z), np.abs(nbv_z))
+
+    return pd.DataFrame({
+        'Expected_Depreciation': np.round(expected, 2),
+        'Recorded_Depreciation': np.round(accumulated, 2),
+        'Depreciation_Gap': np.round(accumulated - expected, 2),
+        'Depreciation_Z': np.round(depreciation_z, 2),
+        'NBV_Gap': np.round(nbv_gap, 2),
+        'NBV_Z': np.round(nbv_z, 2),
+        'Anomaly_Score': np.round(score, 2),
+        'Is_Anomaly': score >= anomaly_config['Z_THRESHOLD'],
+    }, index=df.index)
+
+
+def worst_offenders(df, scores, limit=None):
+    """الأصول الشاذة مرتبة بالدرجة تنازلياً مع أعمدة التعريف"""
+    columns = [config.COLUMN_MAPPING[key] for key in config.ANOMALY_CONFIG['REPORT_COLUMNS']]
+    flagged = scores[scores['Is_Anomaly']].sort_values('Anomaly_Score', ascending=False)
+    if limit is not None:
+        flagged = flagged.head(limit)
+    return df.loc[flagged.index, [c for c in columns if c in df.columns]].join(flagged.drop(columns='Is_Anomaly'))
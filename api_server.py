@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+"""
+واجهة الاستعلام HTTP - نظام إدارة الأصول الثابتة
+خادم JSON غير متزامن (asyncio من المكتبة القياسية) يجيب من نفس البيانات
+المعالجة والتجميعات المحسوبة مسبقاً، مع ETag مبني على إصدار البيانات
+وذاكرة للاستجابات المرمزة وضغط gzip.
+
+التشغيل: python api_server.py --port 8502
+"""
+import argparse
+import asyncio
+import gzip
+import hashlib
+import json
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import pandas as pd
+
+import config
+import query_cache
+from background_loader import BackgroundLoader
+
+REASONS = {200: 'OK', 304: 'Not Modified', 400: 'Bad Request', 404: 'Not Found',
+           405: 'Method Not Allowed', 500: 'Internal Server Error', 503: 'Service Unavailable'}
+
+
+def to_json(value):
+    """تحويل نتائج المحلل (إطارات، سلاسل، قواميس) إلى نص JSON"""
+    if isinstance(value, pd.DataFrame):
+        frame = value.reset_index() if value.index.name else value
+        return frame.to_json(orient='records', force_ascii=False, date_format='iso')
+    if isinstance(value, pd.Series):
+        return value.to_json(force_ascii=False, date_format='iso')
+    return json.dumps(value, ensure_ascii=False, default=str)
+
+
+class QueryAPI:
+    """توجيه المسارات إلى دوال المحلل مع ذاكرة للاستجابات الجاهزة"""
+
+    def __init__(self, loader):
+        self.loader = loader
+        self.responses = query_cache.QueryCache(max_entries=config.API_CONFIG['RESPONSE_CACHE_ENTRIES'])
+        self.routes = {
+            '/summary': lambda q: self.loader.get('summary'),
+            '/categories': lambda q: self.analyzer.get_assets_by_category(),
+            '/locations': lambda q: self.analyzer.get_assets_by_location(),
+            '/custodians': lambda q: self.analyzer.get_assets_by_custodian(self._int(q, 'k', 10),
+                                                                           approximate=bool(self._int(q, 'approximate', 0))),
+            '/search': lambda q: self.analyzer.search_assets(q.get('q', [''])[0], limit=self._int(q, 'limit', None)),
+        }
+
+    @property
+    def analyzer(self):
+        return self.loader.get('analyzer')
+
+    @staticmethod
+    def _int(query, name, default):
+        values = query.get(name)
+        return int(values[0]) if values else default
+
+    def _compute(self, path, query):
+        """(الحالة، نص JSON) لمسار واحد"""
+        if path == '/health':
+            return 200, json.dumps({'version': self.loader.version, 'progress': self.loader.progress})
+        if path.startswith('/assets/'):
+            asset = self.analyzer.get_asset_details(unquote(path[len('/assets/'):]))
+            if asset is None:
+                return 404, json.dumps({'error': 'asset not found'})
+            return 200, to_json(asset)
+        route = self.routes.get(path)
+        if route is None:
+            return 404, json.dumps({'error': 'unknown path'})
+        return 200, to_json(route(query))
+
+    def respond(self, target, headers):
+        """(الحالة، الترويسات، الجسم) لطلب GET مع ETag والضغط"""
+        if not self.loader.is_ready('analyzer'):
+            return 503, {'Retry-After': '1'}, b'{"error": "loading"}'
+        if self.loader.error is not None:
+            return 500, {}, json.dumps({'error': str(self.loader.error)}).encode('utf-8')
+
+        version = self.loader.version
+        parts = urlsplit(target)
+        path = parts.path.rstrip('/') or '/'
+        use_gzip = 'gzip' in headers.get('accept-encoding', '')
+        # ETag قوي لكل ترميز: نسخة gzip تحمل اللاحقة -gz ولا تطابق النسخة غير المضغوطة
+        tag = hashlib.sha1(f'{version}\x1f{path}?{parts.query}'.encode('utf-8')).hexdigest()[:20]
+        etag, gzip_etag = f'"{tag}"', f'"{tag}-gz"'
+        if path in self.routes:
+            # نفس الإصدار والاستعلام = نفس الجسم ونفس قرار الضغط، فيكفي أن يقبل العميل ترميز نسخته
+            # (للمسارات الثابتة فقط؛ /assets/<رقم> قد لا يوجد فيُتحقق منه بعد الحساب)
+            for candidate in ((etag, gzip_etag) if use_gzip else (etag,)):
+                if candidate in headers.get('if-none-match', ''):
+                    return 304, {'ETag': candidate}, b''
+
+        key = (path, version, parts.query, use_gzip)
+        found, cached = self.responses.get(key) if path != '/health' else (False, None)
+        if found:
+            return self._not_modified(cached, headers)
+
+        try:
+            status, body = self._compute(path, parse_qs(parts.query))
+        except ValueError as e:
+            status, body = 400, json.dumps({'error': str(e)})
+        body = body.encode('utf-8')
+        response_headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+        if use_gzip and len(body) >= config.API_CONFIG['GZIP_MIN_BYTES']:
+            body = gzip.compress(body, compresslevel=config.API_CONFIG['GZIP_LEVEL'])
+            response_headers['Content-Encoding'] = 'gzip'
+            response_headers['ETag'] = gzip_etag
+        response = (status, response_headers, body)
+        if status == 200 and path != '/health':
+            self.responses.put(key, response)
+            return self._not_modified(response, headers)
+        return response
+
+    @staticmethod
+    def _not_modified(response, headers):
+        """304 إن طابق ETag الاستجابة الناجحة ما لدى العميل، وإلا الاستجابة نفسها"""
+        status, response_headers, _ = response
+        if status == 200 and response_headers['ETag'] in headers.get('if-none-match', ''):
+            return 304, {'ETag': response_headers['ETag']}, b''
+        return response
+
+
+async def _read_request(reader):
+    """قراءة سطر الطلب والترويسات (None عند إغلاق الاتصال)"""
+    line = await reader.readline()
+    if not line:
+        return None
+    method, target, _ = line.decode('latin-1').split(' ', 2)
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    return method, target, headers
+
+
+def _encode_response(status, headers, body, keep_alive):
+    lines = [f'HTTP/1.1 {status} {REASONS.get(status, "")}',
+             'Content-Type: application/json; charset=utf-8',
+             f'Content-Length: {len(body)}',
+             'Vary: Accept-Encoding',
+             f'Connection: {"keep-alive" if keep_alive else "close"}']
+    lines += [f'{name}: {value}' for name, value in headers.items()]
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body
+
+
+def make_handler(api):
+    """معالج اتصال asyncio؛ الحساب نفسه يتم على مجمع الخيوط حتى لا يحجب حلقة الأحداث"""
+
+    async def handle(reader, writer):
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                request = await _read_request(reader)
+                if request is None:
+                    break
+                method, target, headers = request
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                if method not in ('GET', 'HEAD'):
+                    status, response_headers, body = 405, {'Allow': 'GET, HEAD'}, b''
+                else:
+                    try:
+                        status, response_headers, body = await loop.run_in_executor(None, api.respond, target, headers)
+                    except Exception as e:
+                        # خطأ غير متوقع من المحلل: استجابة 500 بدلاً من إغلاق الاتصال دون رد
+                        status, response_headers, body = 500, {}, json.dumps({'error': str(e)}).encode('utf-8')
+                data = _encode_response(status, response_headers, body, keep_alive)
+                if method == 'HEAD':
+                    data = data[:len(data) - len(body)]
+                writer.write(data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+    return handle
+
+
+async def serve(api, host, port):
+    """تشغيل الخادم"""
+    server = await asyncio.start_server(make_handler(api), host, port)
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    api_config = config.API_CONFIG
+    parser = argparse.ArgumentParser(description='واجهة استعلام JSON لبيانات الأصول الثابتة')
+    parser.add_argument('--host', default=api_config['HOST'])
+    parser.add_argument('--port', type=int, default=api_config['PORT'])
+    args = parser.parse_args()
+
+    loader = BackgroundLoader(config.APP_CONFIG['DATA_FILE'], config.APP_CONFIG['SHEET_NAME'],
+                              max_workers=config.APP_CONFIG['LOADER_WORKERS']).start()
+    print(f"🚀 {config.APP_CONFIG['APP_NAME']} API: http://{args.host}:{args.port}")
+    asyncio.run(serve(QueryAPI(loader), args.host, args.port))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,27 +1,18 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from datetime import datetime
 
-# استيراد الملفات المحلية
+# استيراد الملفات المحلية (plotly ووحدات التحليل تُستورد عند الحاجة فقط لتسريع بدء التشغيل)
 try:
-    import data_processor
-    import asset_models
+    import background_loader
     import config
 except ImportError as e:
     st.error(f"خطأ في استيراد الملفات: {e}")
 
-# إعداد الصفحة
-st.set_page_config(
-    page_title="نظام إدارة الأصول الثابتة",
-    page_icon="🏢",
-    layout="wide",
-    initial_sidebar_state="expanded"
-)
+# إعداد الصفحة (يجب استدعاؤه في كل تشغيل، لكن بقيم ثابتة معرّفة مرة واحدة)
+st.set_page_config(**config.PAGE_CONFIG)
 
 # التصميم العربي
-st.markdown("""
+APP_CSS = """
 <style>
     .main-header {
         font-size: 2.5rem;
@@ -35,58 +26,123 @@ st.markdown("""
         margin-bottom: 1rem;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+st.markdown(APP_CSS, unsafe_allow_html=True)
+
+@st.cache_resource(show_spinner=False)
+def get_data_loader():
+    """محمّل خلفي واحد لكل عملية خادم تتشاركه كل الجلسات"""
+    return background_loader.BackgroundLoader(
+        config.APP_CONFIG["DATA_FILE"],
+        config.APP_CONFIG["SHEET_NAME"],
+        max_workers=config.APP_CONFIG.get("LOADER_WORKERS", 3)
+    ).start()
+
+@st.cache_resource(show_spinner=False)
+def get_event_log():
+    """سجل أحداث الأصول (اتصال SQLite واحد مشترك بين الجلسات)"""
+    import event_log
+    return event_log.EventLog(config.EVENT_LOG_CONFIG["PATH"])
+
+def show_messages(messages):
+    """رسم رسائل المعالجة المسجلة (المستوى، النص)"""
+    for level, text in messages:
+        if level in ('ERROR', 'CRITICAL'):
+            st.error(text)
+        else:
+            st.warning(text)
 
 class FixedAssetsApp:
     def __init__(self):
-        self.df = None
-        self.analyzer = None
-        self.load_data()
-
-    def load_data(self):
-        """تحميل البيانات ومعالجتها"""
-        try:
-            # 1) تحميل البيانات
-            df = data_processor.DataProcessor.load_data(
-                config.APP_CONFIG["DATA_FILE"],
-                config.APP_CONFIG["SHEET_NAME"]
-            )
-            
-            # 2) معالجة مسبقة + إضافات حسابية + إعادة الأسماء القياسية
-            dp = data_processor.DataProcessor()
-            df = dp.preprocess_data(df)
-            df = data_processor.DataProcessor.calculate_additional_metrics(df)
-            df = dp.standardize_column_aliases(df)
-
-            # 3) محلل البيانات
-            self.df = df
-            self.analyzer = asset_models.AssetAnalyzer(self.df)
-            st.success("✅ تم تحميل البيانات ومعالجتها بنجاح")
-            
-        except Exception as e:
-            st.error(f"❌ خطأ في تحميل/معالجة البيانات: {str(e)}")
+        # التحميل يجري في الخلفية؛ الواجهة ترسم فوراً وتمتلئ تدريجياً
+        self.loader = get_data_loader()
+
+    @property
+    def df(self):
+        return self.loader.df
+
+    @property
+    def analyzer(self):
+        return self.loader.analyzer
+
+    def wait_for(self, key):
+        """انتظار مرحلة تحميل مع عرض شريط التقدم، ويعيد False عند فشل التحميل"""
+        if not self.loader.is_ready(key):
+            placeholder = st.empty()
+            interval = config.APP_CONFIG.get("LOADER_POLL_INTERVAL", 0.1)
+            while not self.loader.wait(key, timeout=interval):
+                placeholder.progress(
+                    self.loader.progress,
+                    text=config.get_message(self.loader.message_key)
+                )
+            placeholder.empty()
+
+        if self.loader.error is not None:
+            st.error(f"❌ خطأ في تحميل/معالجة البيانات: {str(self.loader.error)}")
+            # خطأ التحميل قد يكون عابراً (ملف مقفل مثلاً): التشغيل التالي يبدأ محمّلاً جديداً
+            get_data_loader.clear()
+            return False
+        return True
+
+    def show_loader_messages(self):
+        """تحذيرات وأخطاء خط التحميل في الخلفية"""
+        messages = self.loader.messages
+        if messages:
+            errors = any(level in ('ERROR', 'CRITICAL') for level, _ in messages)
+            with st.sidebar.expander(f"رسائل التحميل ({len(messages)})", expanded=errors):
+                show_messages(messages)
 
     def show_dashboard(self):
+        import plotly.express as px
         st.markdown('<div class="main-header">🏢 نظام إدارة الأصول الثابتة</div>', unsafe_allow_html=True)
         st.markdown(
             f'<div class="sub-header">هيئة المساحة الجيولوجية السعودية - {config.ENTITY_CONFIG.get("ENTITY_CODE","")}</div>',
             unsafe_allow_html=True
         )
 
-        if self.analyzer:
-            stats = self.analyzer.get_summary_stats()
-            c1, c2, c3, c4 = st.columns(4)
-            c1.metric("إجمالي الأصول", f"{stats.get('total_assets',0):,}")
-            c2.metric("التكلفة الإجمالية", f"﷼{stats.get('total_cost',0):,.0f}")
-            c3.metric("إجمالي الإهلاك", f"﷼{stats.get('total_depreciation',0):,.0f}")
-            c4.metric("القيمة الدفترية", f"﷼{stats.get('total_net_value',0):,.0f}")
+        # 1) مؤشرات الأداء تظهر بمجرد جاهزية الأعمدة الرقمية
+        if not self.wait_for('summary'):
+            return
+        stats = self.loader.get('summary', {})
+        c1, c2, c3, c4 = st.columns(4)
+        c1.metric("إجمالي الأصول", f"{stats.get('total_assets',0):,}")
+        c2.metric("التكلفة الإجمالية", f"﷼{stats.get('total_cost',0):,.0f}")
+        c3.metric("إجمالي الإهلاك", f"﷼{stats.get('total_depreciation',0):,.0f}")
+        c4.metric("القيمة الدفترية", f"﷼{stats.get('total_net_value',0):,.0f}")
+
+        # 2) الرسوم تمتلئ عند اكتمال تجميعاتها
+        col1, col2 = st.columns(2)
+        with col1:
+            if self.wait_for('by_category'):
+                category_data = self.loader.get('by_category')
+                if category_data is not None and not category_data.empty:
+                    fig = px.pie(values=category_data['Cost'], names=category_data.index, title="توزيع التكلفة حسب التصنيف")
+                    st.plotly_chart(fig, use_container_width=True)
+        with col2:
+            if self.wait_for('by_location'):
+                location_data = self.loader.get('by_location')
+                if location_data is not None and not location_data.empty:
+                    fig = px.bar(location_data.head(10), x=location_data.head(10).index, y='Cost', title="أعلى المواقع تكلفة")
+                    st.plotly_chart(fig, use_container_width=True)
+
+        # 3) شذوذ الإهلاك (محسوب مسبقاً في الخلفية لكل إصدار بيانات)
+        if self.wait_for('analyzer'):
+            anomalies = self.analyzer.get_depreciation_anomalies()
+            if anomalies is not None and not anomalies.empty:
+                st.subheader("⚠️ شذوذ الإهلاك")
+                c1, c2, c3 = st.columns(3)
+                c1.metric("أصول شاذة", f"{len(anomalies):,}")
+                c2.metric("فرق الإهلاك المطلق", f"﷼{anomalies['Depreciation_Gap'].abs().sum():,.0f}")
+                c3.metric("عدم اتساق صافي القيمة", f"{int((anomalies['NBV_Gap'].abs() > config.ANOMALY_CONFIG['NBV_TOLERANCE']).sum()):,}")
+                st.dataframe(anomalies.head(config.ANOMALY_CONFIG['DASHBOARD_TOP']), use_container_width=True)
 
     def show_category_analysis(self):
+        import plotly.express as px
         st.markdown('<div class="sub-header">📊 تحليل الأصول حسب التصنيف</div>', unsafe_allow_html=True)
-        if not self.analyzer:
+        if not self.wait_for('by_category'):
             return
-        category_data = self.analyzer.get_assets_by_category()
-        if category_data.empty:
+        category_data = self.loader.get('by_category')
+        if category_data is None or category_data.empty:
             st.info("لا توجد بيانات تصنيفية متاحة.")
             return
         col1, col2 = st.columns(2)
@@ -107,12 +163,29 @@ class FixedAssetsApp:
             )
             st.plotly_chart(fig_bar, use_container_width=True)
 
+        # التسلسل الهرمي الكامل (مجموعة محاسبية ← مستوى 1 ← 2 ← 3)
+        if self.wait_for('hierarchy'):
+            tree = self.loader.get('hierarchy')
+            flat = tree.to_frame() if tree is not None else pd.DataFrame()
+            if not flat.empty:
+                fig_tree = px.sunburst(
+                    flat,
+                    ids='id',
+                    parents='parent',
+                    names='label',
+                    values='value',
+                    branchvalues='total',
+                    title="التسلسل الهرمي للتصنيفات حسب التكلفة"
+                )
+                st.plotly_chart(fig_tree, use_container_width=True)
+
     def show_location_analysis(self):
+        import plotly.express as px
         st.markdown('<div class="sub-header">📍 تحليل الأصول حسب الموقع</div>', unsafe_allow_html=True)
-        if not self.analyzer:
+        if not self.wait_for('by_location'):
             return
-        location_data = self.analyzer.get_assets_by_location()
-        if location_data.empty:
+        location_data = self.loader.get('by_location')
+        if location_data is None or location_data.empty:
             st.info("لا توجد بيانات مواقع.")
             return
         fig = px.bar(
@@ -124,16 +197,35 @@ class FixedAssetsApp:
         )
         st.plotly_chart(fig, use_container_width=True)
 
+        # خريطة الأصول من البلاطات المجمّعة مسبقاً + البحث بالقرب من موقع
+        if not self.wait_for('geo') or self.loader.get('geo') is None:
+            return
+        zoom = st.slider("مستوى التكبير", 4, 14, config.GEO_CONFIG['DEFAULT_ZOOM'], step=2)
+        clusters = self.analyzer.get_map_clusters(zoom)
+        if not clusters.empty:
+            st.map(clusters, latitude='lat', longitude='lon', size='Count')
+
+        with st.expander("📌 الأصول القريبة من موقع"):
+            c1, c2, c3 = st.columns(3)
+            lat = c1.number_input("خط العرض", value=21.5581, format="%.6f")
+            lon = c2.number_input("خط الطول", value=39.2345, format="%.6f")
+            radius = c3.number_input("نصف القطر (كم)", value=float(config.GEO_CONFIG['DEFAULT_RADIUS_KM']), min_value=0.1)
+            near = self.analyzer.get_assets_near(lat, lon, radius)
+            st.write(f"تم العثور على {len(near)} أصل")
+            cols = [c for c in ['Asset Description', 'Custodian', 'Building Number', 'Room/office Number', 'Distance_km'] if c in near.columns]
+            st.dataframe(near[cols] if cols else near)
+
     def show_depreciation_analysis(self):
+        import plotly.express as px
         st.markdown('<div class="sub-header">📉 تحليل الإهلاك</div>', unsafe_allow_html=True)
-        if not self.analyzer:
+        if not self.wait_for('analyzer'):
             return
 
-        _ = self.analyzer.get_depreciation_analysis()  # يضيف أعمدة للحالة
+        analysis = self.analyzer.get_depreciation_analysis()
         col1, col2 = st.columns(2)
         with col1:
-            if 'Asset_Condition' in self.df.columns:
-                counts = self.df['Asset_Condition'].value_counts()
+            if 'Asset_Condition' in analysis.columns:
+                counts = analysis['Asset_Condition'].value_counts()
                 fig = px.pie(values=counts.values, names=counts.index, title="توزيع حالة الأصول")
                 st.plotly_chart(fig, use_container_width=True)
             else:
@@ -141,9 +233,9 @@ class FixedAssetsApp:
 
         with col2:
             needed = {'Asset_Age', 'Depreciation_Rate', 'Cost', 'Asset Description'}
-            if needed.issubset(self.df.columns):
+            if needed.issubset(analysis.columns):
                 fig = px.scatter(
-                    self.df,
+                    analysis,
                     x='Asset_Age',
                     y='Depreciation_Rate',
                     color='Asset_Condition',
@@ -155,38 +247,159 @@ class FixedAssetsApp:
             else:
                 st.info("لا توجد أعمدة كافية للرسم المبعثر.")
 
+        # جدول الحركة لكل فترة مالية من مكعب الفترات المحسوب مسبقاً
+        if self.wait_for('period_cube') and self.loader.get('period_cube') is not None:
+            periods = config.ANALYSIS_CONFIG['REPORT_PERIODS']
+            period = st.selectbox("الفترة", periods, index=periods.index(config.PERIOD_CUBE_CONFIG['DEFAULT_PERIOD']))
+            roll_forward = self.analyzer.get_roll_forward(period)
+            st.dataframe(roll_forward.tail(12), use_container_width=True)
+
+        self.show_replacement_plan()
+
+    def show_replacement_plan(self):
+        import plotly.express as px
+        plan_config = config.REPLACEMENT_CONFIG
+        with st.expander("📅 خطة إحلال الأصول"):
+            c1, c2 = st.columns(2)
+            budget = c1.number_input("الميزانية السنوية (﷼)", min_value=0, step=500_000,
+                                     value=int(plan_config['ANNUAL_BUDGET']))
+            horizon = c2.slider("أفق الخطة (سنوات)", 1, 10, plan_config['HORIZON_YEARS'])
+            priorities = []
+            for key, label in (('level1_arabic', "تصنيفات ذات أولوية"), ('city', "مدن ذات أولوية")):
+                column = config.COLUMN_MAPPING[key]
+                if column in self.df.columns:
+                    options = sorted(self.df[column].dropna().astype(str).unique())
+                    chosen = st.multiselect(label, options)
+                    if chosen:
+                        priorities.append((key, tuple((value, plan_config['PRIORITY_BOOST']) for value in chosen)))
+
+            plan = self.analyzer.get_replacement_plan((budget,) * horizon, tuple(priorities))
+            if plan is None:
+                return
+            trajectory = plan.trajectory
+            m1, m2, m3 = st.columns(3)
+            m1.metric("أصول مستبدلة", f"{int(trajectory['Replaced'].sum()):,}")
+            m2.metric("إجمالي الإنفاق", f"﷼{trajectory['Spend'].sum():,.0f}")
+            m3.metric("المتأخر في آخر سنة", f"{int(trajectory['Backlog'].iloc[-1]):,}")
+            fig = px.line(trajectory.reset_index(), x='Year', y=['Closing_NBV', 'Baseline_NBV'],
+                          title="صافي القيمة الدفترية مع الخطة ومن دونها", markers=True)
+            st.plotly_chart(fig, use_container_width=True)
+            st.dataframe(trajectory, use_container_width=True)
+            st.dataframe(plan.assets, use_container_width=True)
+
+    def show_cross_filter(self):
+        import plotly.express as px
+        st.markdown('<div class="sub-header">🎯 تصفية تفاعلية</div>', unsafe_allow_html=True)
+        if not self.wait_for('cross_filter'):
+            return
+        cross_filter = self.loader.get('cross_filter')
+        if cross_filter is None:
+            st.info("لا توجد أبعاد متاحة للتصفية.")
+            return
+
+        filter_config = config.CROSS_FILTER_CONFIG
+        # الاختيارات تُقرأ من حالة الرسوم قبل رسمها؛ الجيل يتغير عند المسح لإعادة تعيينها
+        generation = st.session_state.setdefault("cross_filter_generation", 0)
+        labels = {key: {self.filter_label(v): v for v in values} for key, values in cross_filter.values.items()}
+        selections = {}
+        for key in cross_filter.codes:
+            state = st.session_state.get(f"cross_filter_{key}_{generation}")
+            points = state["selection"]["points"] if state else []
+            selections[key] = [labels[key][p["x"]] for p in points if p.get("x") in labels[key]]
+
+        active = {filter_config['LABELS'].get(k, k): [self.filter_label(v) for v in vals]
+                  for k, vals in selections.items() if vals}
+        if active:
+            st.caption(" | ".join(f"{k}: {', '.join(v)}" for k, v in active.items()))
+            if st.button("مسح التصفية"):
+                st.session_state["cross_filter_generation"] = generation + 1
+                st.rerun()
+
+        totals = cross_filter.totals(selections)
+        c1, c2, c3 = st.columns(3)
+        c1.metric("الأصول المختارة", f"{totals['count']:,}")
+        c2.metric("التكلفة", f"﷼{totals.get('cost', 0):,.0f}")
+        c3.metric("القيمة الدفترية", f"﷼{totals.get('net_book_value', 0):,.0f}")
+
+        columns = st.columns(2)
+        for i, key in enumerate(cross_filter.codes):
+            data = cross_filter.aggregate(key, selections).sort_values('Total', ascending=False)
+            data = data.head(filter_config['CHART_TOP'])
+            names = [self.filter_label(v) for v in data.index]
+            chosen = set(map(self.filter_label, selections[key]))
+            fig = px.bar(x=names, y=data['Total'], title=filter_config['LABELS'].get(key, key),
+                         color=["مختار" if n in chosen or not chosen else "غير مختار" for n in names],
+                         labels={'x': '', 'y': 'التكلفة'})
+            fig.update_layout(showlegend=False)
+            with columns[i % 2]:
+                st.plotly_chart(fig, use_container_width=True, on_select="rerun", selection_mode="points",
+                                key=f"cross_filter_{key}_{generation}")
+
+    @staticmethod
+    def filter_label(value):
+        """نص القيمة في الرسم (سنة 2019.0 تظهر 2019)"""
+        if isinstance(value, float) and value.is_integer():
+            return str(int(value))
+        return str(value)
+
     def show_search_functionality(self):
         st.markdown('<div class="sub-header">🔍 بحث في الأصول</div>', unsafe_allow_html=True)
         term = st.text_input("أدخل كلمة للبحث (وصف الأصل، القسم، الموقع، رقم البطاقة):")
-        if term and self.analyzer:
+        if term and self.wait_for('search'):
             results = self.analyzer.search_assets(term)
             st.write(f"تم العثور على {len(results)} أصل")
-            cols = [c for c in ['Asset Description', 'Custodian', 'City', 'Cost', 'Net Book Value'] if c in results.columns]
+            cols = [c for c in ['Asset Description', 'Custodian', 'City', 'Cost', 'Net Book Value', 'Search_Score'] if c in results.columns]
             st.dataframe(results[cols] if cols else results)
 
     def show_raw_data(self):
         st.markdown('<div class="sub-header">📋 البيانات الخام</div>', unsafe_allow_html=True)
-        if self.df is not None:
+        if self.wait_for('analyzer') and self.df is not None:
             st.dataframe(self.df, use_container_width=True)
+            self.show_register_as_of()
+
+    def show_register_as_of(self):
+        # حالة السجل في تاريخ سابق من سجل الأحداث (نقطة حفظ + إعادة تشغيل)
+        with st.expander("🕒 السجل كما كان في تاريخ معين"):
+            log = get_event_log()
+            if len(log) == 0:
+                if st.button("تهيئة سجل الأحداث من اللقطة الحالية"):
+                    log.seed_from_frame(self.df)
+                    log.checkpoint(config.EVENT_LOG_CONFIG["SNAPSHOT_DATE"])
+                    st.success(f"✅ تم تسجيل {len(log):,} حدث")
+                return
+            as_of = st.date_input("التاريخ", value=pd.Timestamp(config.EVENT_LOG_CONFIG["SNAPSHOT_DATE"]))
+            register = log.state_as_of(as_of)
+            c1, c2 = st.columns(2)
+            c1.metric("عدد الأصول", f"{len(register):,}")
+            c2.metric("صافي القيمة الدفترية", f"﷼{register['nbv'].sum():,.0f}")
+            st.dataframe(register, use_container_width=True)
 
     def run(self):
+        for error in config.check_config():
+            st.sidebar.warning(f"⚠️ {error}")
         st.sidebar.title("خيارات التطبيق")
         section = st.sidebar.selectbox(
             "اختر قسم التطبيق:",
-            ["لوحة التحكم", "تحليل التصنيفات", "تحليل المواقع", "تحليل الإهلاك", "بحث في الأصول", "البيانات الخام"]
+            ["لوحة التحكم", "تحليل التصنيفات", "تحليل المواقع", "تحليل الإهلاك", "تصفية تفاعلية", "بحث في الأصول", "البيانات الخام"]
         )
-        if section == "لوحة التحكم":
-            self.show_dashboard()
-        elif section == "تحليل التصنيفات":
-            self.show_category_analysis()
-        elif section == "تحليل المواقع":
-            self.show_location_analysis()
-        elif section == "تحليل الإهلاك":
-            self.show_depreciation_analysis()
-        elif section == "بحث في الأصول":
-            self.show_search_functionality()
-        else:
-            self.show_raw_data()
+        # رسائل المحلل في هذا التشغيل تُجمع ثم تُرسم هنا على خيط السكربت
+        with background_loader.MessageCollector.for_current_thread() as collector:
+            if section == "لوحة التحكم":
+                self.show_dashboard()
+            elif section == "تحليل التصنيفات":
+                self.show_category_analysis()
+            elif section == "تحليل المواقع":
+                self.show_location_analysis()
+            elif section == "تحليل الإهلاك":
+                self.show_depreciation_analysis()
+            elif section == "تصفية تفاعلية":
+                self.show_cross_filter()
+            elif section == "بحث في الأصول":
+                self.show_search_functionality()
+            else:
+                self.show_raw_data()
+        show_messages(collector.messages)
+        self.show_loader_messages()
 
         st.sidebar.markdown("---")
         st.sidebar.info("**إصدار** 1.0 — تحديث 2024 — للاستخدام الداخلي")
@@ -1,76 +1,114 @@
+import hashlib
+import logging
 import pandas as pd
 import numpy as np
 from datetime import datetime
-import streamlit as st
+
+import anomaly_scoring
+import asset_records
+import numeric_kernel
+import summary_stats
+import topk
+import hierarchy
+import geo_index
+import period_cube
+import query_cache
+import replacement_planner
+import report_executor
+import search_engine
+import sqlite_store
+import config
+import cross_filter
+import data_processor
+import duplicate_detection
+
+# الرسائل تُسجَّل ولا تُرسم: دوال المحلل تعمل أيضاً على خيوط التحميل وفي خادم API
+logger = logging.getLogger(__name__)
+
+def _guarded_section(func):
+    """قسم تقرير يعيد (الاستثناء، None) بدلاً من رفعه على خيط المنفّذ، وإلا (None، النتيجة)"""
+    def section():
+        try:
+            return None, func()
+        except Exception as e:
+            return e, None
+    return section
+
 
 class AssetAnalyzer:
-    def __init__(self, df):
+    def __init__(self, df, stats=None, version=None, cache=None, store=None):
         self.df = df
+        # مخزن SQLite اختياري تُنفَّذ فيه التصفيات والتجميعات بدلاً من pandas
+        self.store = store
         self.clean_data()
+        # رمز إصدار البيانات: من مصدر الملف إن مُرِّر، وإلا بصمة المحتوى
+        self.dataset_version = version or dataset_fingerprint(self.df)
+        self._hierarchy = None
+        self._geo_index = None
+        self._period_cube = None
+        self._search_index = None
+        self._cross_filter = None
+        self._tag_positions = None
+        # ذاكرة نتائج الاستعلامات (مشتركة بين الجلسات ومفتاحها إصدار البيانات)
+        self.cache = cache if cache is not None else query_cache.shared_cache()
+        # مُجمِّعات الإحصاءات: من مرحلة الإدخال إن وُجدت، وإلا تمريرة واحدة هنا
+        self.stats = stats if stats is not None else summary_stats.RegisterStats.from_frame(self.df)
     
     def clean_data(self):
         """تنظيف البيانات الأساسية"""
         try:
-            # تحويل التواريخ
+            # تحويل التواريخ (أعمدة التواريخ أصلاً تبقى كما هي، مربوطة بالذاكرة من مخزن الأعمدة)
             date_columns = ['Date Placed in Service']
             for col in date_columns:
-                if col in self.df.columns:
+                if col in self.df.columns and not pd.api.types.is_datetime64_dtype(self.df[col].dtype):
                     self.df[col] = pd.to_datetime(self.df[col], errors='coerce')
             
-            # تحويل الأرقام
+            # تحويل الأرقام (الأعمدة الرقمية أصلاً لا تُعاد معالجتها)
             numeric_columns = ['Cost', 'Depreciation amount', 'Net Book Value', 'Useful Life', 'Quantity']
-            for col in numeric_columns:
-                if col in self.df.columns:
-                    # إزالة أي رموز غير رقمية وتحويل إلى أرقام
-                    self.df[col] = pd.to_numeric(self.df[col], errors='coerce')
+            numeric_kernel.coerce_frame(self.df, [
+                col for col in numeric_columns
+                if col in self.df.columns and not pd.api.types.is_float_dtype(self.df[col].dtype)
+            ])
             
             # تنظيف النصوص
             text_columns = ['Asset Description', 'Custodian', 'City', 'Level 1 FA Module - English Description']
             for col in text_columns:
-                if col in self.df.columns:
+                # أعمدة الفئات نظّفها المخطط مسبقاً في DataProcessor
+                if col in self.df.columns and not isinstance(self.df[col].dtype, pd.CategoricalDtype):
                     self.df[col] = self.df[col].astype(str).str.strip()
             
-            st.success("✅ تم تنظيف البيانات بنجاح")
+            logger.info("✅ تم تنظيف البيانات بنجاح")
             
         except Exception as e:
-            st.error(f"❌ خطأ في تنظيف البيانات: {str(e)}")
+            logger.error(f"❌ خطأ في تنظيف البيانات: {str(e)}")
     
     def get_summary_stats(self):
-        """إحصائيات ملخصة"""
+        """إحصائيات ملخصة (زمن ثابت من مُجمِّعات الإحصاءات)"""
         try:
-            total_assets = len(self.df)
-            total_cost = self.df['Cost'].sum() if 'Cost' in self.df.columns else 0
-            total_depreciation = self.df['Depreciation amount'].sum() if 'Depreciation amount' in self.df.columns else 0
-            total_net_value = self.df['Net Book Value'].sum() if 'Net Book Value' in self.df.columns else 0
-            
-            # متوسط التكلفة لكل أصل
-            avg_cost = total_cost / total_assets if total_assets > 0 else 0
-            
-            # نسبة الإهلاك الإجمالية
-            depreciation_rate = (total_depreciation / total_cost * 100) if total_cost > 0 else 0
-            
-            return {
-                'total_assets': total_assets,
-                'total_cost': total_cost,
-                'total_depreciation': total_depreciation,
-                'total_net_value': total_net_value,
-                'avg_cost': avg_cost,
-                'depreciation_rate': depreciation_rate
-            }
+            return self.stats.summary()
         except Exception as e:
-            st.error(f"❌ خطأ في حساب الإحصائيات: {str(e)}")
+            logger.error(f"❌ خطأ في حساب الإحصائيات: {str(e)}")
             return {}
     
+    def update_stats(self, new_rows):
+        """تحديث المُجمِّعات تدريجياً بصفوف جديدة (جهة أو ملف إضافي)"""
+        self.stats.update_frame(new_rows)
+        return self.stats
+    
+    def _group_totals(self, column, values):
+        """مجاميع القيم وعدد الأصول لكل قيمة في عمود (في مخزن SQLite إن وُجد)"""
+        if self.store is not None and self.store.has_column(column):
+            return self.store.group_totals(column, values)
+        return self.df.groupby(column, observed=True).agg(
+            {**{value: 'sum' for value in values}, 'Tag number': 'count'}
+        ).rename(columns={'Tag number': 'Count'}).round(2)
+    
+    @query_cache.cached_query
     def get_assets_by_category(self):
         """الأصول حسب التصنيف"""
         try:
             if 'Level 1 FA Module - English Description' in self.df.columns:
-                category_data = self.df.groupby('Level 1 FA Module - English Description').agg({
-                    'Cost': 'sum',
-                    'Net Book Value': 'sum',
-                    'Depreciation amount': 'sum',
-                    'Tag number': 'count'
-                }).rename(columns={'Tag number': 'Count'}).round(2)
+                category_data = self._group_totals('Level 1 FA Module - English Description', ['Cost', 'Net Book Value', 'Depreciation amount'])
                 
                 # إضافة نسبة الإهلاك لكل فئة
                 category_data['Depreciation_Rate'] = (category_data['Depreciation amount'] / category_data['Cost'] * 100).round(2)
@@ -79,19 +117,30 @@ class AssetAnalyzer:
             else:
                 return pd.DataFrame()
         except Exception as e:
-            st.error(f"❌ خطأ في تحليل التصنيفات: {str(e)}")
-            return pd.DataFrame()
+            logger.error(f"❌ خطأ في تحليل التصنيفات: {str(e)}")
+            return query_cache.uncached(pd.DataFrame())
+    
+    def get_category_hierarchy(self):
+        """شجرة التصنيف الهرمي بمجاميعها (تُبنى مرة واحدة لكل إصدار بيانات)"""
+        try:
+            if self._hierarchy is None or self._hierarchy.version != self.dataset_version:
+                self._hierarchy = hierarchy.CategoryHierarchy(self.df, version=self.dataset_version)
+            return self._hierarchy
+        except Exception as e:
+            logger.error(f"❌ خطأ في بناء التصنيف الهرمي: {str(e)}")
+            return None
+    
+    def get_category_drilldown(self, path=()):
+        """أبناء عقدة في التصنيف الهرمي (مسار من الرموز، الفارغ = الجذر)"""
+        tree = self.get_category_hierarchy()
+        return tree.children(path) if tree is not None else pd.DataFrame()
     
+    @query_cache.cached_query
     def get_assets_by_location(self):
         """الأصول حسب الموقع"""
         try:
             if 'City' in self.df.columns:
-                location_data = self.df.groupby('City').agg({
-                    'Cost': 'sum',
-                    'Net Book Value': 'sum',
-                    'Depreciation amount': 'sum',
-                    'Tag number': 'count'
-                }).rename(columns={'Tag number': 'Count'}).round(2)
+                location_data = self._group_totals('City', ['Cost', 'Net Book Value', 'Depreciation amount'])
                 
                 # إضافة نسبة التكلفة لكل موقع
                 total_cost = location_data['Cost'].sum()
@@ -101,169 +150,377 @@ class AssetAnalyzer:
             else:
                 return pd.DataFrame()
         except Exception as e:
-            st.error(f"❌ خطأ في تحليل المواقع: {str(e)}")
+            logger.error(f"❌ خطأ في تحليل المواقع: {str(e)}")
+            return query_cache.uncached(pd.DataFrame())
+    
+    def get_geo_index(self):
+        """الفهرس المكاني للإحداثيات (يُبنى مرة واحدة لكل إصدار بيانات)"""
+        try:
+            if 'Geographical Coordinates' not in self.df.columns:
+                return None
+            if self._geo_index is None or self._geo_index.version != self.dataset_version:
+                self._geo_index = geo_index.GeoIndex(self.df, version=self.dataset_version)
+            return self._geo_index
+        except Exception as e:
+            logger.error(f"❌ خطأ في بناء الفهرس المكاني: {str(e)}")
+            return None
+    
+    @query_cache.cached_query
+    def get_assets_near(self, lat, lon, radius_km=None):
+        """الأصول ضمن نصف قطر (كم) من نقطة، مرتبة بالأقرب"""
+        try:
+            index = self.get_geo_index()
+            if index is None:
+                return pd.DataFrame()
+            radius_km = radius_km if radius_km is not None else config.GEO_CONFIG['DEFAULT_RADIUS_KM']
+            rows, distances = index.within_radius(lat, lon, radius_km)
+            near = self.df.iloc[rows].copy()
+            near['Distance_km'] = distances.round(3)
+            return near
+        except Exception as e:
+            logger.error(f"❌ خطأ في البحث المكاني: {str(e)}")
+            return query_cache.uncached(pd.DataFrame())
+    
+    @query_cache.cached_query
+    def get_assets_in_bbox(self, min_lat, min_lon, max_lat, max_lon):
+        """الأصول داخل مستطيل إحداثيات"""
+        try:
+            index = self.get_geo_index()
+            if index is None:
+                return pd.DataFrame()
+            return self.df.iloc[index.within_bbox(min_lat, min_lon, max_lat, max_lon)]
+        except Exception as e:
+            logger.error(f"❌ خطأ في البحث المكاني: {str(e)}")
+            return query_cache.uncached(pd.DataFrame())
+    
+    def get_map_clusters(self, zoom=None, bbox=None):
+        """تجميعات الخريطة لمستوى تكبير محدد (مُحسوبة مسبقاً)"""
+        try:
+            index = self.get_geo_index()
+            if index is None:
+                return pd.DataFrame()
+            return index.clusters(zoom if zoom is not None else config.GEO_CONFIG['DEFAULT_ZOOM'], bbox)
+        except Exception as e:
+            logger.error(f"❌ خطأ في تجميعات الخريطة: {str(e)}")
             return pd.DataFrame()
     
-    def get_assets_by_custodian(self):
-        """الأصول حسب القسم المسؤول"""
+    def _heavy_hitters_frame(self, key, k):
+        """أعلى k مجموعة تكلفةً من مخطط الإدخال المتدفق، مع حد الخطأ الأقصى لكل تقدير"""
+        sketch = self.stats.heavy_hitters.get(key)
+        if sketch is None:
+            return pd.DataFrame()
+        frame = pd.DataFrame(sketch.top(k or sketch.capacity), columns=[config.COLUMN_MAPPING[key], 'Cost', 'Max_Error'])
+        return frame.set_index(config.COLUMN_MAPPING[key]).round(2)
+
+    @query_cache.cached_query
+    def get_assets_by_custodian(self, k=10, approximate=False):
+        """الأصول حسب القسم المسؤول (approximate: من مخطط الإدخال دون تجميع الإطار)"""
         try:
+            if approximate:
+                return self._heavy_hitters_frame('custodian', k)
             if 'Custodian' in self.df.columns:
-                custodian_data = self.df.groupby('Custodian').agg({
-                    'Cost': 'sum',
-                    'Net Book Value': 'sum',
-                    'Depreciation amount': 'sum',
-                    'Tag number': 'count'
-                }).rename(columns={'Tag number': 'Count'}).round(2)
+                custodian_data = self._group_totals('Custodian', ['Cost', 'Net Book Value', 'Depreciation amount'])
                 
-                return custodian_data.sort_values('Cost', ascending=False).head(10)  # أهم 10 أقسام
+                return topk.top_k_frame(custodian_data, 'Cost', k)  # أهم k أقسام
             else:
                 return pd.DataFrame()
         except Exception as e:
-            st.error(f"❌ خطأ في تحليل الأقسام: {str(e)}")
-            return pd.DataFrame()
+            logger.error(f"❌ خطأ في تحليل الأقسام: {str(e)}")
+            return query_cache.uncached(pd.DataFrame())
     
+    @query_cache.cached_query
     def get_depreciation_analysis(self):
-        """تحليل الإهلاك"""
+        """تحليل الإهلاك (لا يُعدِّل الإطار المشترك: الأعمدة المحسوبة من calculate_additional_metrics)"""
         try:
-            # حساب عمر الأصل
-            current_year = pd.Timestamp.now().year
-            if 'Date Placed in Service' in self.df.columns:
-                self.df['Asset_Age'] = current_year - pd.to_datetime(self.df['Date Placed in Service']).dt.year
-            else:
-                self.df['Asset_Age'] = 0
-            
-            # حساب نسبة الإهلاك
-            if 'Cost' in self.df.columns and 'Depreciation amount' in self.df.columns:
-                self.df['Depreciation_Rate'] = (self.df['Depreciation amount'] / self.df['Cost'] * 100).round(2)
-                
-                # تصنيف حالة الأصل
-                conditions = [
-                    self.df['Depreciation_Rate'] >= 80,
-                    self.df['Depreciation_Rate'] >= 50,
-                    self.df['Depreciation_Rate'] >= 20,
-                    self.df['Depreciation_Rate'] > 0
-                ]
-                choices = ['قديم', 'متوسط', 'جديد', 'جديد جداً']
-                self.df['Asset_Condition'] = np.select(conditions, choices, default='لم يبدأ الإهلاك')
-            
-            return self.df[['Asset Description', 'Custodian', 'Cost', 'Depreciation amount', 
-                          'Net Book Value', 'Depreciation_Rate', 'Asset_Age', 'Asset_Condition']]
+            frame = self.df
+            derived = ['Asset_Age', 'Depreciation_Rate', 'Asset_Condition']
+            if not set(derived).issubset(frame.columns):
+                # إطار لم يمر على DataProcessor: تُحسب الأعمدة على نسخة
+                base = [c for c in ['Date Placed in Service', 'Cost', 'Depreciation amount'] if c in frame.columns]
+                frame = frame.drop(columns=[c for c in derived if c in frame.columns]).join(
+                    data_processor.DataProcessor.calculate_additional_metrics(frame[base].copy())[derived]
+                )
+            columns = ['Asset Description', 'Custodian', 'Cost', 'Depreciation amount',
+                       'Net Book Value'] + derived
+            return frame[[c for c in columns if c in frame.columns]]
         except Exception as e:
-            st.error(f"❌ خطأ في تحليل الإهلاك: {str(e)}")
-            return pd.DataFrame()
+            logger.error(f"❌ خطأ في تحليل الإهلاك: {str(e)}")
+            return query_cache.uncached(pd.DataFrame())
     
+    @query_cache.cached_query
     def get_assets_by_year(self):
         """الأصول حسب سنة التشغيل"""
         try:
             if 'Date Placed in Service' in self.df.columns:
-                self.df['Service_Year'] = pd.to_datetime(self.df['Date Placed in Service']).dt.year
-                year_data = self.df.groupby('Service_Year').agg({
-                    'Cost': 'sum',
-                    'Net Book Value': 'sum',
-                    'Tag number': 'count'
-                }).rename(columns={'Tag number': 'Count'}).round(2)
+                if self.store is None or not self.store.has_column('Service_Year'):
+                    self.df['Service_Year'] = pd.to_datetime(self.df['Date Placed in Service']).dt.year
+                year_data = self._group_totals('Service_Year', ['Cost', 'Net Book Value'])
                 
                 return year_data.sort_index()
             else:
                 return pd.DataFrame()
         except Exception as e:
-            st.error(f"❌ خطأ في تحليل السنوات: {str(e)}")
-            return pd.DataFrame()
+            logger.error(f"❌ خطأ في تحليل السنوات: {str(e)}")
+            return query_cache.uncached(pd.DataFrame())
+    
+    def get_period_cube(self):
+        """مكعب الفترات المالية (يُبنى مرة واحدة لكل إصدار بيانات)"""
+        try:
+            if 'Date Placed in Service' not in self.df.columns:
+                return None
+            if self._period_cube is None or self._period_cube.version != self.dataset_version:
+                self._period_cube = period_cube.PeriodCube(self.df, version=self.dataset_version)
+            return self._period_cube
+        except Exception as e:
+            logger.error(f"❌ خطأ في بناء مكعب الفترات: {str(e)}")
+            return None
+    
+    @query_cache.cached_query
+    def get_roll_forward(self, period=None, dimension=None, group=None):
+        """جدول الحركة (افتتاحي، إضافات، إهلاك، ختامي) لكل فترة مالية"""
+        try:
+            cube = self.get_period_cube()
+            if cube is None:
+                return pd.DataFrame()
+            return cube.roll_forward(period or config.PERIOD_CUBE_CONFIG['DEFAULT_PERIOD'], dimension, group)
+        except Exception as e:
+            logger.error(f"❌ خطأ في جدول الحركة: {str(e)}")
+            return query_cache.uncached(pd.DataFrame())
     
-    def get_high_value_assets(self, threshold=10000):
-        """الأصول عالية القيمة"""
+    @query_cache.cached_query
+    def get_period_totals(self, start, end, dimension=None):
+        """جدول الحركة لنطاق تاريخين لكل تصنيف/مدينة"""
         try:
+            cube = self.get_period_cube()
+            if cube is None:
+                return pd.DataFrame()
+            return cube.range_totals(start, end, dimension)
+        except Exception as e:
+            logger.error(f"❌ خطأ في جدول الحركة: {str(e)}")
+            return query_cache.uncached(pd.DataFrame())
+    
+    @query_cache.cached_query
+    def get_high_value_assets(self, threshold=10000, k=None):
+        """الأصول عالية القيمة (أعلى k أصلاً عند تحديد k)"""
+        try:
+            columns = ['Asset Description', 'Custodian', 'Cost', 'Net Book Value', 'Depreciation amount']
+            if self.store is not None:
+                return self.store.select(columns, where='"Cost" >= ?', params=(threshold,),
+                                         order_by=f'"Cost" DESC, {sqlite_store.ROW_ID}', limit=k)
             if 'Cost' in self.df.columns:
-                high_value = self.df[self.df['Cost'] >= threshold].sort_values('Cost', ascending=False)
-                return high_value[['Asset Description', 'Custodian', 'Cost', 'Net Book Value', 'Depreciation amount']]
+                high_value = topk.top_k_frame(self.df[self.df['Cost'] >= threshold], 'Cost', k)
+                return high_value[columns]
             else:
                 return pd.DataFrame()
         except Exception as e:
-            st.error(f"❌ خطأ في تصفية الأصول عالية القيمة: {str(e)}")
-            return pd.DataFrame()
+            logger.error(f"❌ خطأ في تصفية الأصول عالية القيمة: {str(e)}")
+            return query_cache.uncached(pd.DataFrame())
+    
+    def get_cost_percentile_cutoff(self, percent=None, approximate=False):
+        """حد التكلفة لأعلى percent% من الأصول (تقريبي من مخطط المئينات عند الطلب)"""
+        try:
+            percent = percent if percent is not None else config.ANALYSIS_CONFIG['TOP_PERCENT']
+            if approximate:
+                return self.stats['cost'].quantile(1 - percent / 100)
+            if 'Cost' in self.df.columns:
+                return topk.percentile_cutoff(self.df['Cost'].to_numpy(dtype='float64', na_value=np.nan), percent)
+            return float('nan')
+        except Exception as e:
+            logger.error(f"❌ خطأ في حساب حد المئين: {str(e)}")
+            return float('nan')
+    
+    @query_cache.cached_query
+    def get_top_percent_assets(self, percent=None):
+        """أعلى percent% من الأصول حسب التكلفة"""
+        try:
+            percent = percent if percent is not None else config.ANALYSIS_CONFIG['TOP_PERCENT']
+            if 'Cost' in self.df.columns:
+                top = topk.top_percent_frame(self.df, 'Cost', percent)
+                return top[['Asset Description', 'Custodian', 'Cost', 'Net Book Value', 'Depreciation amount']]
+            else:
+                return pd.DataFrame()
+        except Exception as e:
+            logger.error(f"❌ خطأ في تصفية أعلى الأصول تكلفة: {str(e)}")
+            return query_cache.uncached(pd.DataFrame())
     
+    @query_cache.cached_query
     def get_fully_depreciated_assets(self):
         """الأصول المتهالكة بالكامل"""
         try:
+            columns = ['Asset Description', 'Custodian', 'Cost', 'Depreciation amount', 'Net Book Value']
+            if self.store is not None:
+                return self.store.select(columns, where='"Depreciation amount" >= "Cost"',
+                                         order_by=sqlite_store.ROW_ID)
             if 'Depreciation amount' in self.df.columns and 'Cost' in self.df.columns:
                 fully_depreciated = self.df[self.df['Depreciation amount'] >= self.df['Cost']]
-                return fully_depreciated[['Asset Description', 'Custodian', 'Cost', 'Depreciation amount', 'Net Book Value']]
+                return fully_depreciated[columns]
             else:
                 return pd.DataFrame()
         except Exception as e:
-            st.error(f"❌ خطأ في تصفية الأصول المتهالكة: {str(e)}")
-            return pd.DataFrame()
+            logger.error(f"❌ خطأ في تصفية الأصول المتهالكة: {str(e)}")
+            return query_cache.uncached(pd.DataFrame())
     
-    def search_assets(self, search_term):
-        """بحث في الأصول"""
+    def get_search_index(self):
+        """فهرس البحث الموحّد (يُبنى مرة واحدة لكل إصدار بيانات)"""
+        try:
+            if self._search_index is None or self._search_index.version != self.dataset_version:
+                self._search_index = search_engine.SearchIndex(self.df, version=self.dataset_version)
+            return self._search_index
+        except Exception as e:
+            logger.error(f"❌ خطأ في بناء فهرس البحث: {str(e)}")
+            return None
+    
+    @query_cache.cached_query
+    def search_assets(self, search_term, limit=None):
+        """بحث في الأصول (مطابقة جزئية وتقريبية مع توحيد النص العربي، مرتبة حسب الصلة)"""
         try:
             if not search_term:
                 return pd.DataFrame()
             
-            search_columns = ['Asset Description', 'Custodian', 'City', 'Tag number', 
-                            'Level 1 FA Module - English Description', 'Manufacturer']
-            
-            mask = pd.Series(False, index=self.df.index)
-            
-            for col in search_columns:
-                if col in self.df.columns:
-                    # البحث بأحرف صغيرة للتقليل من حساسية الحالة
-                    mask |= self.df[col].astype(str).str.lower().str.contains(
-                        search_term.lower(), na=False
-                    )
-            
-            results = self.df[mask]
+            index = self.get_search_index()
+            if index is None:
+                return pd.DataFrame()
             
-            # إذا لم توجد نتائج، حاول البحث بكلمات جزئية
-            if len(results) == 0:
-                for col in search_columns:
-                    if col in self.df.columns:
-                        words = search_term.lower().split()
-                        for word in words:
-                            if len(word) > 2:  # تجاهل الكلمات القصيرة جداً
-                                mask |= self.df[col].astype(str).str.lower().str.contains(word, na=False)
-                
-                results = self.df[mask]
+            rows, scores = index.search(search_term, limit=limit)
+            results = self.df.iloc[rows].copy()
+            results['Search_Score'] = np.round(scores, 3)
             
             return results
         except Exception as e:
-            st.error(f"❌ خطأ في البحث: {str(e)}")
-            return pd.DataFrame()
+            logger.error(f"❌ خطأ في البحث: {str(e)}")
+            return query_cache.uncached(pd.DataFrame())
+    
+    def get_cross_filter(self):
+        """فهارس bitmap للتصفية المتقاطعة (تُبنى مرة واحدة لكل إصدار بيانات)"""
+        try:
+            if self._cross_filter is None or self._cross_filter.version != self.dataset_version:
+                self._cross_filter = cross_filter.CrossFilter(self.df, version=self.dataset_version)
+            return self._cross_filter
+        except Exception as e:
+            logger.error(f"❌ خطأ في بناء فهارس التصفية: {str(e)}")
+            return None
+    
+    @query_cache.cached_query
+    def get_replacement_plan(self, budgets, priorities=None):
+        """خطة إحلال متعددة السنوات (budgets: مبالغ سنوات متتالية، priorities: ((البُعد، ((القيمة، الوزن)، ...))، ...))"""
+        try:
+            weights = {key: dict(values) for key, values in (priorities or ())}
+            return replacement_planner.plan_replacements(self.df, list(budgets), weights)
+        except Exception as e:
+            logger.error(f"❌ خطأ في تخطيط الإحلال: {str(e)}")
+            return None
+    
+    @query_cache.cached_query
+    def get_depreciation_anomalies(self, limit=None):
+        """الأصول التي يخالف إهلاكها المسجل المتوقع أو لا يتسق صافي قيمتها، مرتبة بالأسوأ"""
+        try:
+            scores = anomaly_scoring.score_depreciation(self.df)
+            return anomaly_scoring.worst_offenders(self.df, scores, limit)
+        except Exception as e:
+            logger.error(f"❌ خطأ في كشف شذوذ الإهلاك: {str(e)}")
+            return query_cache.uncached(pd.DataFrame())
+    
+    @query_cache.cached_query
+    def get_near_duplicates(self, threshold=None):
+        """الأصول المرشحة كمكررات (نفس الشركة والتكلفة والسنة مع وصف متقارب)"""
+        try:
+            return duplicate_detection.find_near_duplicates(self.df, threshold)
+        except Exception as e:
+            logger.error(f"❌ خطأ في كشف الأصول المكررة: {str(e)}")
+            return query_cache.uncached(pd.DataFrame())
     
     def get_asset_details(self, tag_number):
         """الحصول على تفاصيل أصل محدد"""
         try:
-            if 'Tag number' in self.df.columns:
-                asset = self.df[self.df['Tag number'] == tag_number]
-                if not asset.empty:
-                    return asset.iloc[0]
+            if self.store is not None:
+                # بحث بالفهرس على رقم البطاقة ثم إرجاع الصف من الإطار
+                rows = self.store.select(['Tag number'], where='"Tag number" = ?', params=(str(tag_number),), limit=1)
+                return self.df.loc[rows.index[0]] if not rows.empty else None
+            position = self._tag_position(tag_number)
+            return self.df.iloc[position] if position is not None else None
+        except Exception as e:
+            logger.error(f"❌ خطأ في جلب تفاصيل الأصل: {str(e)}")
+            return None
+    
+    def _tag_position(self, tag_number):
+        """موقع أول صف لرقم البطاقة (خريطة تُبنى مرة واحدة لكل إصدار بيانات)"""
+        if 'Tag number' not in self.df.columns:
             return None
+        if self._tag_positions is None or self._tag_positions[0] != self.dataset_version:
+            tags = pd.Index(self.df['Tag number'].astype('string'))
+            first = ~tags.duplicated()
+            self._tag_positions = (self.dataset_version, dict(zip(tags[first], np.flatnonzero(first))))
+        return self._tag_positions[1].get(str(tag_number))
+    
+    def get_asset_record(self, tag_number, fields=None):
+        """سجل مدمج لأصل واحد (بدون إنشاء Series)"""
+        try:
+            position = self._tag_position(tag_number)
+            return asset_records.record_at(self.df, position, fields) if position is not None else None
         except Exception as e:
-            st.error(f"❌ خطأ في جلب تفاصيل الأصل: {str(e)}")
+            logger.error(f"❌ خطأ في جلب تفاصيل الأصل: {str(e)}")
             return None
     
-    def generate_asset_report(self):
-        """تقرير شامل عن الأصول"""
-        try:
-            report = {
-                'summary': self.get_summary_stats(),
-                'by_category': self.get_assets_by_category(),
-                'by_location': self.get_assets_by_location(),
-                'by_custodian': self.get_assets_by_custodian(),
-                'depreciation_analysis': self.get_depreciation_analysis(),
-                'high_value_assets': self.get_high_value_assets(),
-                'fully_depreciated': self.get_fully_depreciated_assets()
+    def iter_asset_records(self, fields=None, batch_size=None):
+        """مكرِّر سجلات مدمجة لكل الأصول (للمعالجة أصلاً بأصل)"""
+        return asset_records.iter_records(self.df, fields, batch_size)
+    
+    def warm_cache(self, queries=None):
+        """حساب استعلامات التقارير الشائعة مسبقاً في الذاكرة المؤقتة"""
+        for name in queries or config.CACHE_CONFIG['WARM_QUERIES']:
+            getattr(self, name)()
+        return self.cache.stats()
+    
+    def generate_asset_report(self, stream=False):
+        """تقرير شامل عن الأصول (الأقسام المستقلة تُحسب بالتوازي؛ stream=True يسلّمها فور اكتمالها)"""
+        try:
+            executor = report_executor.ReportExecutor()
+            sections = {
+                'summary': self.get_summary_stats,
+                # الأقسام كلها تقرأ الإطار دون تعديله، فلا اعتماديات بينها
+                'depreciation_analysis': self.get_depreciation_analysis,
+                'by_category': self.get_assets_by_category,
+                'by_location': self.get_assets_by_location,
+                'by_custodian': self.get_assets_by_custodian,
+                'high_value_assets': self.get_high_value_assets,
+                'fully_depreciated': self.get_fully_depreciated_assets,
             }
-            return report
+            for name, func in sections.items():
+                executor.add(name, _guarded_section(func))
+            if stream:
+                return self._report_sections(executor)
+            report = dict(self._report_sections(executor))
+            # نفس ترتيب الأقسام في التقرير السابق
+            order = ['summary', 'by_category', 'by_location', 'by_custodian',
+                     'depreciation_analysis', 'high_value_assets', 'fully_depreciated']
+            return {name: report[name] for name in order if name in report}
         except Exception as e:
-            st.error(f"❌ خطأ في إنشاء التقرير: {str(e)}")
+            logger.error(f"❌ خطأ في إنشاء التقرير: {str(e)}")
             return {}
     
-    def get_manufacturer_analysis(self):
-        """تحليل الأصول حسب الشركة المصنعة"""
+    @staticmethod
+    def _report_sections(executor):
+        """(الاسم، النتيجة) بترتيب الاكتمال؛ القسم الفاشل يُسجَّل خطؤه ويُتخطّى
+
+        يعمل على خيط المستدعي حتى بعد عودة generate_asset_report، فتُلتقط أخطاؤه هنا لا عند الواجهة.
+        """
         try:
+            for name, (error, result) in executor.stream():
+                if error is not None:
+                    logger.error(f"❌ خطأ في قسم التقرير {name}: {str(error)}")
+                    continue
+                yield name, result
+        except Exception as e:
+            logger.error(f"❌ خطأ في إنشاء التقرير: {str(e)}")
+    
+    @query_cache.cached_query
+    def get_manufacturer_analysis(self, k=None, approximate=False):
+        """تحليل الأصول حسب الشركة المصنعة (approximate: من مخطط الإدخال دون تجميع الإطار)"""
+        try:
+            if approximate:
+                return self._heavy_hitters_frame('manufacturer', k)
             if 'Manufacturer' in self.df.columns:
-                manufacturer_data = self.df.groupby('Manufacturer').agg({
+                manufacturer_data = self.df.groupby('Manufacturer', observed=True).agg({
                     'Cost': 'sum',
                     'Net Book Value': 'sum',
                     'Tag number': 'count',
@@ -273,12 +530,12 @@ class AssetAnalyzer:
                 # إضافة متوسط التكلفة
                 manufacturer_data['Avg_Cost'] = (manufacturer_data['Cost'] / manufacturer_data['Count']).round(2)
                 
-                return manufacturer_data.sort_values('Cost', ascending=False)
+                return topk.top_k_frame(manufacturer_data, 'Cost', k)
             else:
                 return pd.DataFrame()
         except Exception as e:
-            st.error(f"❌ خطأ في تحليل الشركات المصنعة: {str(e)}")
-            return pd.DataFrame()
+            logger.error(f"❌ خطأ في تحليل الشركات المصنعة: {str(e)}")
+            return query_cache.uncached(pd.DataFrame())
 
 class AssetPredictor:
     """فئة للتنبؤ بقيم الأصول (للإصدارات المستقبلية)"""
@@ -293,11 +550,14 @@ class AssetPredictor:
             # هذا نموذج مبسط للتنبؤ - يمكن تطويره لاحقاً
             predictions = []
             
-            for _, asset in self.df.iterrows():
-                if 'Cost' in asset and 'Depreciation amount' in asset and 'Useful Life' in asset:
-                    cost = asset['Cost']
-                    current_dep = asset['Depreciation amount']
-                    useful_life = asset['Useful Life'] if pd.notna(asset['Useful Life']) else 3
+            if all(col in self.df.columns for col in ('Cost', 'Depreciation amount', 'Useful Life')):
+                fields = ('tag_number', 'asset_description_en', 'net_book_value',
+                          'cost', 'depreciation_amount', 'useful_life')
+                defaults = {'tag_number': '', 'asset_description_en': '', 'net_book_value': 0}
+                for asset in asset_records.iter_records(self.df, fields, defaults=defaults):
+                    cost = asset.cost
+                    current_dep = asset.depreciation_amount
+                    useful_life = asset.useful_life if pd.notna(asset.useful_life) else 3
                     
                     # حساب الإهلاك الشهري
                     monthly_dep = cost / (useful_life * 12) if useful_life > 0 else 0
@@ -307,9 +567,9 @@ class AssetPredictor:
                     future_net_value = max(0, cost - future_dep)
                     
                     predictions.append({
-                        'Tag number': asset.get('Tag number', ''),
-                        'Asset Description': asset.get('Asset Description', ''),
-                        'Current_Net_Value': asset.get('Net Book Value', 0),
+                        'Tag number': asset.tag_number,
+                        'Asset Description': asset.asset_description_en,
+                        'Current_Net_Value': asset.net_book_value,
                         'Future_Net_Value': future_net_value,
                         'Depreciation_Increase': future_dep - current_dep,
                         'Months': months
@@ -317,9 +577,16 @@ class AssetPredictor:
             
             return pd.DataFrame(predictions)
         except Exception as e:
-            st.error(f"❌ خطأ في التنبؤ بالإهلاك: {str(e)}")
+            logger.error(f"❌ خطأ في التنبؤ بالإهلاك: {str(e)}")
             return pd.DataFrame()
 
+# بصمة محتوى البيانات (تُستخدم كرمز إصدار عند غياب رمز المصدر)
+def dataset_fingerprint(df):
+    """بصمة مختصرة لمحتوى الإطار"""
+    digest = hashlib.sha1(repr((df.shape, list(df.columns))).encode('utf-8'))
+    digest.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    return digest.hexdigest()[:16]
+
 # دالة مساعدة للتحقق من جودة البيانات
 def validate_data_quality(df):
     """التحقق من جودة البيانات"""
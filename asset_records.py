@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+سجلات الأصول المدمجة - نظام إدارة الأصول الثابتة
+نوع سجل خفيف (namedtuple بلا قاموس لكل كائن) مولَّد من مفاتيح COLUMN_MAPPING،
+ومكرِّر دفعات يبني السجلات من مصفوفات الأعمدة مباشرة بدلاً من iterrows
+الذي يُنشئ Series لكل أصل (طباعة الملصقات، الجرد، خطابات الأقسام...).
+"""
+from collections import namedtuple
+from functools import lru_cache, partial
+
+import numpy as np
+import pandas as pd
+
+import config
+
+# الأعمدة المحسوبة في DataProcessor.calculate_additional_metrics
+DERIVED_COLUMNS = {
+    'asset_age': 'Asset_Age',
+    'depreciation_rate': 'Depreciation_Rate',
+    'asset_condition': 'Asset_Condition',
+    'value_category': 'Value_Category',
+    'remaining_life_years': 'Remaining_Life',
+    'service_year': 'Service_Year',
+}
+
+ALL_FIELDS = {**config.COLUMN_MAPPING, **DERIVED_COLUMNS}
+
+
+@lru_cache(maxsize=16)
+def record_type(fields=None):
+    """نوع سجل لحقول محددة (tuple من المفاتيح)، أو لكل حقول المخطط"""
+    return namedtuple('AssetRecord', fields or tuple(ALL_FIELDS))
+
+
+def _column_reader(series):
+    """دالة تعيد قيم شريحة [start, stop) من العمود كقائمة بايثون بأرخص طريقة"""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # القاموس يُحوَّل مرة واحدة، والرمز -1 (مفقود) يقع على العنصر الأخير None
+        categories = np.append(np.asarray(series.cat.categories, dtype=object), None)
+        codes = series.cat.codes.to_numpy()
+        return lambda start, stop: categories[codes[start:stop]].tolist()
+    if pd.api.types.is_datetime64_dtype(series.dtype):
+        values = series.to_numpy().astype('datetime64[us]')  # datetime.datetime عند tolist
+        return lambda start, stop: values[start:stop].tolist()
+    return lambda start, stop: series.iloc[start:stop].tolist()
+
+
+def iter_batches(df, fields=None, batch_size=None, defaults=None):
+    """دفعات من السجلات (قوائم)؛ الحقل الغائب عن الإطار يأخذ قيمته من defaults"""
+    fields = tuple(fields or [key for key, column in ALL_FIELDS.items() if column in df.columns])
+    make = partial(tuple.__new__, record_type(fields))  # أسرع من _make
+    batch_size = batch_size or config.RECORDS_CONFIG['BATCH_SIZE']
+    defaults = defaults or {}
+    readers = [_column_reader(df[ALL_FIELDS[field]]) if ALL_FIELDS[field] in df.columns
+               else (lambda start, stop, value=defaults.get(field): [value] * (stop - start))
+               for field in fields]
+
+    for start in range(0, len(df), batch_size):
+        stop = min(start + batch_size, len(df))
+        # عمود واحد = قائمة قيم بايثون واحدة لكل دفعة (بدون Series لكل صف)
+        arrays = [read(start, stop) for read in readers]
+        yield list(map(make, zip(*arrays)))
+
+
+def iter_records(df, fields=None, batch_size=None, defaults=None):
+    """سجل لكل أصل بالترتيب"""
+    for batch in iter_batches(df, fields, batch_size, defaults):
+        yield from batch
+
+
+def record_at(df, position, fields=None):
+    """سجل أصل واحد حسب موقعه في الإطار"""
+    return next(iter_records(df.iloc[position:position + 1], fields), None)
@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+"""
+تحميل البيانات في الخلفية - نظام إدارة الأصول الثابتة
+يتم تحميل ومعالجة ملف FAR على خيط خلفي، وتُنشر النتائج مرحلةً بمرحلة
+حتى تعرض الواجهة مؤشرات الأداء قبل اكتمال باقي التحليلات.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import config
+import column_store
+import data_processor
+import sqlite_store
+import asset_models
+
+
+# وحدات المعالجة التي تُسجِّل رسائلها بدلاً من رسمها (لا سياق streamlit على خيوط الخلفية)
+MESSAGE_LOGGERS = ('data_processor', 'asset_models')
+
+
+class MessageCollector(logging.Handler):
+    """جمع رسائل وحدات المعالجة الصادرة من خيوط محددة لتعرضها الواجهة على خيط السكربت"""
+
+    def __init__(self, accept_thread, level=logging.WARNING):
+        super().__init__(level)
+        self.accept_thread = accept_thread
+        self.messages = []  # (المستوى، النص)
+
+    def emit(self, record):
+        if self.accept_thread(threading.current_thread()):
+            self.messages.append((record.levelname, record.getMessage()))
+
+    def __enter__(self):
+        for name in MESSAGE_LOGGERS:
+            logging.getLogger(name).addHandler(self)
+        return self
+
+    def __exit__(self, *exc):
+        for name in MESSAGE_LOGGERS:
+            logging.getLogger(name).removeHandler(self)
+        return False
+
+    @classmethod
+    def for_current_thread(cls):
+        """جامع لرسائل الخيط الحالي فقط (تشغيل سكربت واحد)"""
+        current = threading.current_thread()
+        return cls(lambda thread: thread is current)
+
+
+class BackgroundLoader:
+    """تشغيل خط التحميل والمعالجة على خيط خلفي مع نقاط جاهزية لكل مرحلة"""
+
+    # نقاط الجاهزية التي يمكن للواجهة انتظارها
+    MILESTONES = ('summary', 'analyzer', 'by_category', 'by_location', 'hierarchy', 'geo', 'period_cube', 'search', 'cross_filter')
+    THREAD_PREFIX = 'far-loader'
+
+    def __init__(self, file_path, sheet_name, max_workers=3):
+        self.file_path = file_path
+        self.sheet_name = sheet_name
+        self.version = None
+        self.df = None
+        self.analyzer = None
+        self.results = {}
+        self.error = None
+        self.progress = 0.0
+        self.message_key = 'loading_data'
+        # تحذيرات وأخطاء المعالجة على خيوط التحميل، تعرضها الواجهة على خيط السكربت
+        self.collector = MessageCollector(lambda thread: thread.name.startswith(self.THREAD_PREFIX))
+        self._events = {key: threading.Event() for key in self.MILESTONES}
+        # خط التحميل على خيطه الخاص، والمجمع للتجميعات فقط (فلا ينتظر خط التحميل عاملاً يشغله هو)
+        self._thread = threading.Thread(target=self._run, name=f'{self.THREAD_PREFIX}-main', daemon=True)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=self.THREAD_PREFIX)
+
+    def start(self):
+        """بدء التحميل في الخلفية (لا يحجب المستدعي)"""
+        self._thread.start()
+        return self
+
+    # -------------------------------------------------
+    # حالة التحميل
+    # -------------------------------------------------
+    def is_ready(self, key):
+        """هل اكتملت المرحلة المطلوبة؟"""
+        return self._events[key].is_set()
+
+    def wait(self, key, timeout=None):
+        """انتظار مرحلة محددة، ويعيد True عند اكتمالها أو فشل التحميل"""
+        return self._events[key].wait(timeout)
+
+    def get(self, key, default=None):
+        """نتيجة مرحلة مكتملة"""
+        return self.results.get(key, default)
+
+    @property
+    def messages(self):
+        """(المستوى، النص) لرسائل المعالجة أثناء التحميل"""
+        return list(self.collector.messages)
+
+    @property
+    def done(self):
+        return all(event.is_set() for event in self._events.values())
+
+    def _set_stage(self, message_key, progress):
+        self.message_key = message_key
+        self.progress = progress
+
+    def _publish(self, key, value):
+        self.results[key] = value
+        self._events[key].set()
+
+    def _publish_store(self, df, store):
+        """حفظ الإطار المعالج في مخزن الأعمدة ثم إعادة فتحه مربوطاً بالذاكرة"""
+        try:
+            column_store.save(df, store['DIRECTORY'], self.version)
+            column_store.prune(store['DIRECTORY'], store['KEEP_VERSIONS'])
+            return column_store.open_frame(store['DIRECTORY'], self.version)
+        except OSError:
+            # مجلد غير قابل للكتابة: نكمل بالنسخة الموجودة في الذاكرة
+            return df
+
+    def _open_sqlite_store(self, df):
+        """مخزن SQLite عند اختياره في STORAGE_CONFIG (يُكتب مرة واحدة لكل إصدار)"""
+        storage = config.STORAGE_CONFIG
+        if storage['BACKEND'] != 'sqlite':
+            return None
+        store = sqlite_store.SQLiteStore(storage['SQLITE_PATH'])
+        if not data_processor.DataProcessor().export_to_store(df, store, self.version):
+            return None
+        return store
+
+    # -------------------------------------------------
+    # خط التحميل
+    # -------------------------------------------------
+    def _run(self):
+        with self.collector:
+            self._load()
+
+    def _load(self):
+        try:
+            # 1) قراءة الملف (أو فتح نسخته المعالجة من مخزن الأعمدة المشترك)
+            self._set_stage('loading_data', 0.05)
+            columns = config.LOAD_CONFIG['PROJECTION']
+            self.version = data_processor.DataProcessor.source_version(self.file_path, self.sheet_name, columns)
+            store = config.STORE_CONFIG
+            df = column_store.open_frame(store['DIRECTORY'], self.version) if store['ENABLED'] else None
+            stats = None
+
+            if df is None:
+                df = data_processor.DataProcessor.load_data(self.file_path, self.sheet_name, columns)
+
+                # 2) معالجة مسبقة + إضافات حسابية + إعادة الأسماء القياسية
+                self._set_stage('processing_data', 0.35)
+                dp = data_processor.DataProcessor()
+                df = dp.preprocess_data(df)
+                df = data_processor.DataProcessor.calculate_additional_metrics(df)
+                df = dp.standardize_column_aliases(df)
+                stats = dp.register_stats
+                if store['ENABLED']:
+                    df = self._publish_store(df, store)
+
+            # 3) الأعمدة الرقمية جاهزة: نعرض مؤشرات الأداء فوراً
+            self.df = df
+            self.analyzer = asset_models.AssetAnalyzer(df, stats=stats, version=self.version,
+                                                       store=self._open_sqlite_store(df))
+            self._publish('summary', self.analyzer.get_summary_stats())
+            self._publish('analyzer', self.analyzer)
+            self._set_stage('data_loaded_success', 0.7)
+
+            # 4) التجميعات الأثقل تُحسب بالتوازي وتُنشر عند اكتمال كل منها
+            tasks = {
+                'by_category': self.analyzer.get_assets_by_category,
+                'by_location': self.analyzer.get_assets_by_location,
+                'hierarchy': self.analyzer.get_category_hierarchy,
+                'geo': self.analyzer.get_geo_index,
+                'period_cube': self.analyzer.get_period_cube,
+                'search': self.analyzer.get_search_index,
+                'cross_filter': self.analyzer.get_cross_filter,
+            }
+            futures = {self._executor.submit(task): key for key, task in tasks.items()}
+            for future in as_completed(futures):
+                self._publish(futures[future], future.result())
+            # 5) تسخين ذاكرة الاستعلامات بتقارير لوحة التحكم الشائعة
+            self.analyzer.warm_cache()
+            self._set_stage('data_processed_success', 1.0)
+
+        except Exception as e:
+            self.error = e
+            self._set_stage('error_processing_data', 1.0)
+            # تحرير كل من ينتظر حتى تعرض الواجهة الخطأ
+            for event in self._events.values():
+                event.set()
@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+"""
+مخزن الأعمدة المشترك - نظام إدارة الأصول الثابتة
+يُحفظ الإطار المعالج مرة واحدة لكل إصدار بيانات كملفات ‎.npy‎ لكل عمود
+(النصوص والفئات بترميز قاموسي: رموز صحيحة + قاموس القيم كبايتات UTF-8 وإزاحات)،
+ثم يُفتح بربط الذاكرة للقراءة فقط فتتشارك كل عمليات الخادم على الجهاز نفس صفحات
+الملفات، بما فيها قواميس الأعمدة النصية كثيرة القيم (رقم البطاقة، الوصف، الإحداثيات).
+"""
+import json
+import os
+import shutil
+import uuid
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+import config
+
+MANIFEST = 'manifest.json'
+FORMAT = 2  # يُرفع عند تغيير صيغة الملفات أو خط المعالجة فتُهمل النسخ القديمة
+
+
+def store_path(directory, version):
+    return os.path.join(directory, str(version))
+
+
+def _read_manifest(directory, version):
+    """بيان الإصدار المحفوظ بالصيغة الحالية، أو None"""
+    try:
+        with open(os.path.join(store_path(directory, version), MANIFEST), encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return manifest if manifest.get('format') == FORMAT else None
+
+
+def exists(directory, version):
+    return _read_manifest(directory, version) is not None
+
+
+def _json_values(values):
+    """قيم القاموس بصيغة قابلة للحفظ في JSON"""
+    return [v.item() if isinstance(v, np.generic) else v for v in values]
+
+
+def _write_dictionary(categories, folder, file_name):
+    """قاموس نصي كملفين: بايتات UTF-8 متتالية وإزاحة بداية كل قيمة (n + 1)"""
+    encoded = [value.encode('utf-8') for value in categories]
+    offsets = np.zeros(len(encoded) + 1, dtype='int64')
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    data = np.frombuffer(b''.join(encoded), dtype='uint8')
+    stem = file_name[:-len('.npy')]
+    np.save(os.path.join(folder, f'{stem}.offsets.npy'), offsets, allow_pickle=False)
+    np.save(os.path.join(folder, f'{stem}.data.npy'), data, allow_pickle=False)
+    return {'offsets': f'{stem}.offsets.npy', 'data': f'{stem}.data.npy'}
+
+
+def _open_dictionary(folder, entry):
+    """القاموس النصي كمصفوفة نصوص Arrow فوق الملفات المربوطة بالذاكرة (بدون نسخ)"""
+    offsets = np.load(os.path.join(folder, entry['offsets']), mmap_mode='r', allow_pickle=False)
+    data = np.load(os.path.join(folder, entry['data']), mmap_mode='r', allow_pickle=False)
+    strings = pa.LargeStringArray.from_buffers(len(offsets) - 1, pa.py_buffer(offsets), pa.py_buffer(data))
+    return pd.Index(pd.arrays.ArrowStringArray(strings))
+
+
+def _write_column(series, folder, position):
+    """حفظ عمود واحد، ويعيد وصفه في ملف البيان"""
+    file_name = f'{position:03d}.npy'
+    dtype = series.dtype
+    entry = {'name': series.name, 'file': file_name}
+
+    if isinstance(dtype, pd.CategoricalDtype) or not (
+            pd.api.types.is_numeric_dtype(dtype) or pd.api.types.is_datetime64_dtype(dtype)):
+        # 1) ترميز قاموسي: النصوص تُحوَّل إلى فئات، والقاموس النصي يُحفظ في ملفات مربوطة بالذاكرة
+        values = series if isinstance(dtype, pd.CategoricalDtype) else series.astype('category')
+        codes = values.cat.codes.to_numpy()
+        categories = values.cat.categories.tolist()
+        if all(isinstance(value, str) for value in categories):
+            entry.update(kind='category', dictionary=_write_dictionary(categories, folder, file_name))
+        else:
+            # قواميس غير نصية (أرقام كفئات مثلاً) صغيرة وتبقى في البيان
+            entry.update(kind='category', categories=_json_values(categories))
+    elif pd.api.types.is_datetime64_dtype(dtype):
+        # 2) التواريخ تُحفظ كأعداد int64 وتُعرض لاحقاً بنفس الدقة الزمنية
+        codes = series.to_numpy().view('int64')
+        entry.update(kind='datetime', dtype=str(series.to_numpy().dtype))
+    elif pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_extension_array_dtype(dtype):
+        codes = series.to_numpy(dtype='float64', na_value=np.nan)
+        entry.update(kind='numeric')
+    else:
+        codes = series.to_numpy()
+        entry.update(kind='numeric')
+
+    np.save(os.path.join(folder, file_name), np.ascontiguousarray(codes), allow_pickle=False)
+    return entry
+
+
+def save(df, directory, version):
+    """حفظ الإطار لإصدار بيانات (كتابة ذرية: مجلد مؤقت ثم إعادة تسمية)"""
+    target = store_path(directory, version)
+    if exists(directory, version):
+        return target
+    # نسخة بصيغة قديمة لنفس الإصدار تُستبدل
+    shutil.rmtree(target, ignore_errors=True)
+    os.makedirs(directory, exist_ok=True)
+    staging = f'{target}.tmp-{uuid.uuid4().hex[:8]}'
+    os.makedirs(staging)
+    try:
+        columns = [_write_column(df[col], staging, i) for i, col in enumerate(df.columns)]
+        np.save(os.path.join(staging, 'index.npy'), df.index.to_numpy(dtype='int64'), allow_pickle=False)
+        manifest = {'format': FORMAT, 'version': str(version), 'rows': len(df), 'columns': columns}
+        with open(os.path.join(staging, MANIFEST), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False)
+        try:
+            os.rename(staging, target)
+        except OSError:
+            # عملية أخرى نشرت نفس الإصدار أولاً
+            if not exists(directory, version):
+                raise
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+    return target
+
+
+def open_frame(directory, version):
+    """فتح إصدار محفوظ بربط الذاكرة (بدون نسخ)، أو None إن لم يوجد"""
+    manifest = _read_manifest(directory, version)
+    if manifest is None:
+        return None
+    folder = store_path(directory, version)
+
+    columns = {}
+    for entry in manifest['columns']:
+        data = np.load(os.path.join(folder, entry['file']), mmap_mode='r', allow_pickle=False)
+        if entry['kind'] == 'category':
+            categories = (_open_dictionary(folder, entry['dictionary']) if 'dictionary' in entry
+                          else pd.Index(entry['categories']))
+            values = pd.Categorical.from_codes(data, categories=categories, validate=False)
+        elif entry['kind'] == 'datetime':
+            values = data.view(entry['dtype'])
+        else:
+            values = data
+        columns[entry['name']] = values
+    index = pd.Index(np.load(os.path.join(folder, 'index.npy'), mmap_mode='r'))
+    return pd.DataFrame(columns, index=index, copy=False)
+
+
+def prune(directory, keep=None):
+    """حذف أقدم الإصدارات المحفوظة مع إبقاء آخر keep منها"""
+    keep = keep or config.STORE_CONFIG['KEEP_VERSIONS']
+    if not os.path.isdir(directory):
+        return []
+    versions = [entry for entry in os.scandir(directory)
+                if entry.is_dir() and os.path.isfile(os.path.join(entry.path, MANIFEST))]
+    versions.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+    removed = []
+    for entry in versions[keep:]:
+        shutil.rmtree(entry.path, ignore_errors=True)
+        removed.append(entry.name)
+    return removed
@@ -20,6 +20,8 @@ APP_CONFIG = {
     "SHEET_NAME": "FAR as of 30 Dec 23",
     "BACKUP_DATA": True,
     "AUTO_SAVE": True,
+    "LOADER_WORKERS": 3,  # خيوط التحميل في الخلفية
+    "LOADER_POLL_INTERVAL": 0.1,  # ثوانٍ بين تحديثات شريط التقدم
     
     # إعدادات الواجهة
     "LANGUAGE": "ar",
@@ -119,6 +121,85 @@ COLUMN_MAPPING = {
     'linked_asset': 'Linked/Associated Asset'
 }
 
+# العناوين العربية كما تظهر في صف العناوين الثاني لملف FAR
+COLUMN_MAPPING_AR = {
+    'entity': 'اسم الجهة',
+    'entity_code': 'رمز الجهة',
+    'level1_code': 'رمز تصنيف الأصول المستوى الأول',
+    'level1_arabic': 'وصف تصنيف الأصول المستوى الأول - عربي',
+    'level1_english': 'وصف تصنيف الأصول المستوى الأول - انجليزي',
+    'level2_code': 'رمز تصنيف الأصول المستوى الثاني',
+    'level2_arabic': 'وصف تصنيف الأصول المستوى الثاني - عربي',
+    'level2_english': 'وصف تصنيف الأصول المستوى الثاني - انجليزي',
+    'level3_code': 'رمز تصنيف الأصول المستوى الثالث',
+    'level3_arabic': 'وصف تصنيف الأصول المستوى الثالث - عربي',
+    'level3_english': 'وصف تصنيف الأصول المستوى الثالث - انجليزي',
+    'accounting_group_code': 'رمز المجموعة المحاسبية',
+    'accounting_group_arabic': 'وصف المجموعة المحاسبية - عربي',
+    'accounting_group_english': 'وصف المجموعة المحاسبية - انجليزي',
+    'asset_code': 'رمز الأصل للغرض المحاسبي',
+    'asset_description_ar': 'وصف الأصل لغرض الصيانة',
+    'asset_functional_code': 'رمز الأصل لغرض الصيانة (مشروعات)',
+    'gl_account': 'رقم شجرة الحسابات',
+    'cost_center': 'مركز التكلفة',
+    'asset_owner': 'مالك الأصل',
+    'custodian': 'القسم أو الإدارة المسؤولة',
+    'consolidated_code': 'الترميز الموحد مع الصيانة',
+    'mof_unique_number': 'رقم الأصل الفريد في نظام وزارة المالية (الرقم التعريفي)',
+    'linked_asset': 'الأصل المرتبط به (الرقم الفريد للمبنى على الأرض - ان وجد)',
+    'entity_unique_number': 'رقم الأصل الفريد بالجهة (الرقم المستخدم حاليا للأصل او رقم تسلسلي)',
+    'asset_description_en': 'وصف الأصل',
+    'tag_number': 'رقم البطاقة',
+    'base_unit': 'وحدة القياس',
+    'quantity': 'العدد',
+    'manufacturer': 'المصنع',
+    'date_in_service': 'تاريخ الدخول في الخدمة',
+    'cost': 'التكلفة',
+    'depreciation_amount': 'قسط الاهلاك',
+    'accumulated_depreciation': 'الاستهلاك المتراكم',
+    'residual_value': 'القيمة المتبقية في نهاية العمر',
+    'net_book_value': 'القيمة الدفترية',
+    'useful_life': 'العمر الإنتاجي',
+    'remaining_life': 'العمر المتبقي',
+    'country': 'الدولة',
+    'region': 'المنطقة',
+    'city': 'المدينة',
+    'coordinates': 'الإحداثيات',
+    'national_address': 'العنوان الوطني',
+    'building_number': 'رقم المبنى',
+    'floors_number': 'رقم الدور',
+    'room_number': 'رقم الغرفة/ المكتب'
+}
+
+# أنواع الأعمدة (مفاتيح COLUMN_MAPPING) التي تقود مراحل التنظيف والتحليل
+COLUMN_TYPES = {
+    'numeric': [
+        'cost', 'depreciation_amount', 'accumulated_depreciation', 'residual_value',
+        'net_book_value', 'useful_life', 'remaining_life', 'quantity'
+    ],
+    'date': ['date_in_service'],
+    # نصوص قليلة التنوع تُخزَّن كفئات
+    'category': [
+        'entity', 'entity_code',
+        'level1_code', 'level1_arabic', 'level1_english',
+        'level2_code', 'level2_arabic', 'level2_english',
+        'level3_code', 'level3_arabic', 'level3_english',
+        'accounting_group_code', 'accounting_group_arabic', 'accounting_group_english',
+        'gl_account', 'cost_center', 'asset_owner', 'custodian', 'base_unit', 'manufacturer',
+        'country', 'region', 'city', 'building_number', 'floors_number'
+    ],
+    # أعمدة لا تقبل القيم المفقودة وقيمة الملء لكل منها
+    'not_null': {
+        'cost': 0,
+        'depreciation_amount': 0,
+        'net_book_value': 0,
+        'asset_description_en': 'غير محدد',
+        'custodian': 'غير محدد'
+    },
+    # قيم نصية تعامل كقيم فارغة
+    'null_tokens': ['Not Available', 'N/A', 'nan', 'None']
+}
+
 # =============================================================================
 # التصنيفات والمجموعات
 # =============================================================================
@@ -160,6 +241,8 @@ ANALYSIS_CONFIG = {
     'HIGH_VALUE_THRESHOLD': 10000,
     'MEDIUM_VALUE_THRESHOLD': 5000,
     'LOW_VALUE_THRESHOLD': 1000,
+    'TOP_PERCENT': 1,  # أعلى 1% من الأصول حسب التكلفة
+    'HEAVY_HITTERS_CAPACITY': 1000,  # سعة مخطط أكثر الأقسام والشركات تكلفةً (RegisterStats)
     
     # تصنيف الإهلاك
     'DEPRECIATION_LEVELS': {
@@ -258,6 +341,8 @@ CHART_CONFIG = {
 SEARCH_CONFIG = {
     'MIN_SEARCH_LENGTH': 2,
     'MAX_RESULTS': 100,
+    'FUZZY_THRESHOLD': 0.4,  # أدنى تشابه (Dice للمقاطع الثلاثية أو 1 - مسافة التحرير / الطول) للمطابقة التقريبية
+    'MAX_EDITS': 2,  # أقصى مسافة تحرير مقبولة (خطأ واحد لكل 4 أحرف من كلمة الاستعلام)
     'SEARCH_FIELDS': [
         'Asset Description',
         'Custodian',
@@ -348,6 +433,277 @@ BACKUP_CONFIG = {
     'BACKUP_PATH': 'backups/'
 }
 
+# =============================================================================
+# إعدادات الإحصاءات المتدفقة
+# =============================================================================
+
+STATS_CONFIG = {
+    'CHUNK_SIZE': 50000,  # عدد الصفوف في كل دفعة تغذية
+    'QUANTILE_RELATIVE_ACCURACY': 0.01,  # خطأ نسبي 1% في المئينات التقريبية
+    'QUANTILES': [0.25, 0.5, 0.75, 0.9, 0.99]
+}
+
+# =============================================================================
+# إعدادات التصنيف الهرمي
+# =============================================================================
+
+HIERARCHY_CONFIG = {
+    # مستويات الشجرة من الأعلى للأدنى (مفاتيح hierarchy.LEVEL_KEYS)
+    'LEVELS': ['accounting_group', 'level1', 'level2', 'level3']
+}
+
+# =============================================================================
+# إعدادات الفهرس المكاني والخرائط
+# =============================================================================
+
+GEO_CONFIG = {
+    'CELL_DEGREES': 0.05,  # حجم خلية الشبكة (~5.5 كم)
+    'ZOOM_LEVELS': [4, 6, 8, 10, 12, 14],  # مستويات التكبير المجمّعة مسبقاً
+    'DEFAULT_ZOOM': 10,
+    'DEFAULT_RADIUS_KM': 5
+}
+
+# =============================================================================
+# إعدادات مكعب الفترات المالية
+# =============================================================================
+
+PERIOD_CUBE_CONFIG = {
+    # أبعاد المكعب (مفاتيح COLUMN_MAPPING) إضافة إلى الإجمالي
+    'DIMENSIONS': ['level1_english', 'city'],
+    'DEFAULT_PERIOD': 'ربع سنوي'
+}
+
+# =============================================================================
+# إعدادات ذاكرة نتائج الاستعلامات
+# =============================================================================
+CACHE_CONFIG = {
+    'MAX_ENTRIES': 256,  # أقصى عدد نتائج مخزنة
+    'MAX_MEMORY_MB': 256,  # أقصى حجم للنتائج في الذاكرة
+    # استعلامات التقارير الشائعة التي تُحسب مسبقاً بعد التحميل
+    'WARM_QUERIES': [
+        'get_assets_by_category',
+        'get_assets_by_location',
+        'get_assets_by_custodian',
+        'get_depreciation_analysis',
+        'get_assets_by_year',
+        'get_high_value_assets',
+        'get_fully_depreciated_assets',
+        'get_manufacturer_analysis',
+        'get_depreciation_anomalies',
+    ],
+}
+
+# =============================================================================
+# إعدادات مخزن الأعمدة المشترك
+# =============================================================================
+STORE_CONFIG = {
+    'ENABLED': True,
+    'DIRECTORY': '.asset_store',  # مجلد ملفات الأعمدة (مشترك بين عمليات الخادم)
+    'KEEP_VERSIONS': 2,  # عدد إصدارات البيانات المحتفظ بها
+}
+
+# =============================================================================
+# إعدادات واجهة الاستعلام HTTP
+# =============================================================================
+API_CONFIG = {
+    'HOST': '127.0.0.1',
+    'PORT': 8502,
+    'GZIP_MIN_BYTES': 1024,  # لا تُضغط الاستجابات الأصغر
+    'GZIP_LEVEL': 5,
+    'RESPONSE_CACHE_ENTRIES': 512,  # استجابات جاهزة محفوظة (مرمزة ومضغوطة)
+}
+
+# =============================================================================
+# إعدادات اختبار الحمل
+# =============================================================================
+LOAD_TEST_CONFIG = {
+    'SESSIONS': 10,  # جلسات متزامنة
+    'ITERATIONS': 12,  # تنقلات لكل جلسة
+    'THINK_TIME': 0.0,  # أقصى انتظار عشوائي بين التنقلات (ثوانٍ)
+    'RUN_TIMEOUT': 120,  # مهلة كل تشغيل للسكربت
+    'SAMPLE_INTERVAL': 0.5,  # ثوانٍ بين عينات الذاكرة
+    'PERCENTILES': [50, 90, 95, 99],
+    'SEARCH_TERMS': ['HP', 'TOYOTA', 'خزانه', 'كرسي', 'سياره'],
+}
+
+# =============================================================================
+# إعدادات سجل أحداث الأصول
+# =============================================================================
+EVENT_LOG_CONFIG = {
+    'PATH': 'asset_events.sqlite',  # ملف سجل الأحداث (SQLite)
+    'SNAPSHOT_DATE': '2023-12-30',  # تاريخ لقطة سجل الأصول المستورد
+    'CHECKPOINT_EVERY': 5000,  # نقطة حفظ تلقائية بعد هذا العدد من الأحداث
+}
+
+# =============================================================================
+# إعدادات خلفية التخزين
+# =============================================================================
+STORAGE_CONFIG = {
+    'BACKEND': 'memory',  # 'memory' أو 'sqlite' لتنفيذ التصفيات والتجميعات في SQLite
+    'SQLITE_PATH': 'assets.sqlite',
+    'WRITE_CHUNK_SIZE': 50000,
+    # أعمدة مفهرسة (مفاتيح COLUMN_MAPPING)
+    'INDEXED_COLUMNS': ['tag_number', 'city', 'custodian', 'level1_english', 'date_in_service'],
+}
+
+# =============================================================================
+# إعدادات سجلات الأصول المدمجة
+# =============================================================================
+RECORDS_CONFIG = {
+    'BATCH_SIZE': 65536,  # صفوف كل دفعة عند بناء السجلات من الأعمدة
+}
+
+# =============================================================================
+# إعدادات تنفيذ التقارير المتوازي
+# =============================================================================
+REPORT_CONFIG = {
+    'MAX_WORKERS': None,  # None = عدد أنوية المعالج
+    'PROCESS_MIN_ROWS': 5_000_000,  # من هذا الحجم تُحسب التوزيعات في عمليات منفصلة
+}
+
+# =============================================================================
+# إعدادات قراءة ملف البيانات
+# =============================================================================
+LOAD_CONFIG = {
+    'HEADER_SCAN_ROWS': 10,  # صفوف تُفحص لاكتشاف صف العناوين
+    'CACHE_SIZE': 4,  # عدد الإسقاطات المحفوظة في الذاكرة
+    # الأعمدة التي يستخدمها التطبيق (مفاتيح COLUMN_MAPPING)؛ None = كل الأعمدة
+    'PROJECTION': [
+        'asset_code', 'asset_description_en', 'tag_number', 'mof_unique_number', 'entity',
+        'accounting_group_code', 'accounting_group_arabic', 'accounting_group_english',
+        'level1_code', 'level1_arabic', 'level1_english',
+        'level2_code', 'level2_arabic', 'level2_english',
+        'level3_code', 'level3_arabic', 'level3_english',
+        'custodian', 'city', 'coordinates', 'building_number', 'room_number', 'manufacturer', 'quantity',
+        'date_in_service', 'cost', 'depreciation_amount', 'accumulated_depreciation',
+        'residual_value', 'net_book_value', 'useful_life', 'remaining_life',
+    ],
+}
+
+# =============================================================================
+# إعدادات الصفحة وزمن بدء التشغيل
+# =============================================================================
+PAGE_CONFIG = {
+    'page_title': "نظام إدارة الأصول الثابتة",
+    'page_icon': "🏢",
+    'layout': "wide",
+    'initial_sidebar_state': "expanded",
+}
+
+IMPORT_BUDGET_CONFIG = {
+    'RUNS': 3,  # يؤخذ الوسيط لتقليل الضوضاء
+    'TOP': 15,  # أبطأ الوحدات المعروضة في التقرير
+    # الحد الأقصى لزمن الاستيراد التراكمي (ملي ثانية) لكل وحدة في عملية جديدة
+    'BUDGETS_MS': {
+        'config': 25,
+        'background_loader': 1500,
+        'api_server': 1500,
+    },
+    # وحدات يجب ألا تُستورد في مسار بدء التشغيل (streamlit نفسه يستورد نواة plotly فقط)
+    'DEFERRED_MODULES': ['plotly.express', 'event_log'],
+}
+
+# =============================================================================
+# إعدادات مقارنة لقطات السجل بين فترتين
+# =============================================================================
+SNAPSHOT_DIFF_CONFIG = {
+    'DIMENSIONS': ['city', 'custodian', 'level1_arabic'],  # جداول الفروقات
+    'MOVE_COLUMNS': ['city', 'custodian'],  # تغيّر أحدها = أصل منقول
+    'TOLERANCE': 0.01,  # أقل فرق في التكلفة أو صافي القيمة يُعد إعادة تقييم
+    'STATUS_LABELS': {
+        'added': 'مضاف',
+        'removed': 'مستبعد',
+        'moved': 'منقول',
+        'revalued': 'معاد تقييمه',
+        'moved_revalued': 'منقول ومعاد تقييمه',
+        'unchanged': 'دون تغيير',
+    },
+}
+
+# =============================================================================
+# إعدادات مطابقة الجرد الفعلي
+# =============================================================================
+INVENTORY_CONFIG = {
+    'CHUNK_SIZE': 100_000,  # صفوف ملف المسح المقروءة في كل دفعة
+    # أسماء الأعمدة في ملفات المسح الميداني
+    'SCAN_COLUMNS': {
+        'tag': 'tag_number',
+        'building': 'building',
+        'room': 'room',
+        'timestamp': 'timestamp',
+    },
+    'GROUP_BY': ['city', 'custodian'],
+    'REPORT_COLUMNS': ['tag_number', 'asset_description_en', 'city', 'custodian',
+                       'building_number', 'room_number', 'cost'],
+    'STATUS_LABELS': {
+        'found': 'موجود',
+        'missing': 'مفقود',
+        'wrong_location': 'في غير موقعه',
+        'unexpected': 'غير مسجل',
+    },
+}
+
+# =============================================================================
+# إعدادات كشف الأصول المكررة تقريبياً
+# =============================================================================
+DUPLICATE_CONFIG = {
+    'NUM_PERM': 64,  # طول توقيع MinHash
+    'BANDS': 16,  # أشرطة LSH (4 قيم لكل شريط)
+    'THRESHOLD': 0.6,  # أقل تشابه مقدَّر (Jaccard) بين الوصفين
+    'COST_TOLERANCE': 0.05,  # عرض شريحة التكلفة (نسبة)
+    'VERIFY_CHUNK': 500_000,  # أزواج تُتحقق منها في كل دفعة
+    'MAX_CLUSTER_SIZE': 25,  # مجموعات أكبر تُستبعد (مشتريات بالجملة)؛ None = بلا حد
+    'REPORT_COLUMNS': ['tag_number', 'asset_description_en', 'manufacturer', 'cost',
+                       'date_in_service', 'city', 'custodian'],
+}
+
+# =============================================================================
+# إعدادات كشف شذوذ الإهلاك
+# =============================================================================
+ANOMALY_CONFIG = {
+    'CATEGORY': 'level1_arabic',  # تُحسب الدرجات المتينة داخل كل تصنيف
+    'Z_THRESHOLD': 3.5,  # حد الشذوذ للدرجة المتينة (Iglewicz & Hoaglin)
+    'NBV_TOLERANCE': 1.0,  # فرق صافي القيمة المقبول (ريال) قبل اعتباره عدم اتساق
+    'MIN_RATIO_SCALE': 0.01,  # أدنى مقام للدرجة (1% من القيمة القابلة للإهلاك)
+    'DASHBOARD_TOP': 20,  # أسوأ الحالات المعروضة في لوحة التحكم
+    'REPORT_COLUMNS': ['tag_number', 'asset_description_en', 'level1_arabic', 'cost',
+                       'useful_life', 'date_in_service'],
+}
+
+# =============================================================================
+# إعدادات التصفية التفاعلية المتقاطعة
+# =============================================================================
+CROSS_FILTER_CONFIG = {
+    # مفاتيح COLUMN_MAPPING أو الأعمدة المحسوبة (asset_records.DERIVED_COLUMNS)
+    'DIMENSIONS': ['city', 'custodian', 'level1_english', 'asset_condition', 'value_category', 'service_year'],
+    'MEASURES': ['cost', 'net_book_value'],
+    'CHART_TOP': 15,  # أكبر عدد من القيم في كل رسم
+    'LABELS': {
+        'city': 'المدينة',
+        'custodian': 'القسم المسؤول',
+        'level1_english': 'التصنيف',
+        'asset_condition': 'حالة الأصل',
+        'value_category': 'فئة القيمة',
+        'service_year': 'سنة التشغيل',
+    },
+}
+
+# =============================================================================
+# إعدادات تخطيط إحلال الأصول
+# =============================================================================
+REPLACEMENT_CONFIG = {
+    'START_YEAR': None,  # None = السنة الحالية (نفس مرجع Asset_Age)
+    'HORIZON_YEARS': 5,
+    'ANNUAL_BUDGET': 5_000_000,
+    'INFLATION': 0.03,  # زيادة سنوية في تكلفة الإحلال عن التكلفة التاريخية
+    'MIN_NEED': 0.8,  # أدنى نسبة عمر مستهلك ليصبح الأصل مرشحاً للإحلال
+    'CARRY_OVER': True,  # ترحيل الميزانية غير المصروفة للسنة التالية
+    'FILL_PASSES': 3,  # مرات تعبئة الميزانية المتبقية بعد البادئة الجشعة
+    'PRIORITY_BOOST': 2.0,  # وزن التصنيفات والمدن المختارة كأولوية في الواجهة
+    'REPORT_COLUMNS': ['tag_number', 'asset_description_en', 'level1_arabic', 'city',
+                       'cost', 'net_book_value', 'useful_life'],
+}
+
 # =============================================================================
 # دوال مساعدة للوصول للإعدادات
 # =============================================================================
@@ -413,9 +769,15 @@ def validate_config():
     
     return errors
 
-# التحقق من الإعدادات عند التحميل
-config_errors = validate_config()
-if config_errors:
-    print("تحذير: هناك أخطاء في الإعدادات:")
-    for error in config_errors:
-        print(f" - {error}")
\ No newline at end of file
+_config_errors = None
+
+def check_config():
+    """التحقق من الإعدادات عند أول طلب فقط (لا شيء يُنفَّذ عند الاستيراد)"""
+    global _config_errors
+    if _config_errors is None:
+        _config_errors = validate_config()
+        if _config_errors:
+            print("تحذير: هناك أخطاء في الإعدادات:")
+            for error in _config_errors:
+                print(f" - {error}")
+    return _config_errors
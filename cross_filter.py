@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+التصفية التفاعلية المتقاطعة - نظام إدارة الأصول الثابتة
+فهارس bitmap مضغوطة (بت لكل أصل) لكل قيمة في أبعاد لوحة التحكم، فيُحل أي
+مزيج من الاختيارات بعمليات OR داخل البُعد وAND بين الأبعاد على كلمات 64 بت،
+ثم تُحسب المجاميع على الصفوف المختارة فقط.
+"""
+import numpy as np
+import pandas as pd
+
+import asset_records
+import config
+
+
+class CrossFilter:
+    """فهارس bitmap لأبعاد التصفية مع تجميعات على الصفوف المختارة"""
+
+    def __init__(self, df, dimensions=None, measures=None, version=None):
+        filter_config = config.CROSS_FILTER_CONFIG
+        self.version = version
+        self.size = len(df)
+        self.words = (self.size + 63) // 64
+        self.codes = {}  # البُعد -> رمز القيمة لكل صف (-1 للمفقود)
+        self.values = {}  # البُعد -> قيم البُعد حسب الرمز
+        self.bitmaps = {}  # البُعد -> مصفوفة (عدد القيم × عدد الكلمات) uint64
+
+        for key in dimensions or filter_config['DIMENSIONS']:
+            column = asset_records.ALL_FIELDS[key]
+            if column not in df.columns:
+                continue
+            codes, values = pd.factorize(df[column], sort=True)
+            self.codes[key] = codes.astype(np.int32)
+            self.values[key] = list(values)
+            self.bitmaps[key] = self._build_bitmaps(codes, len(values))
+
+        self.measures = {
+            key: np.nan_to_num(pd.to_numeric(df[asset_records.ALL_FIELDS[key]], errors='coerce')
+                               .to_numpy(dtype=float))
+            for key in measures or filter_config['MEASURES'] if asset_records.ALL_FIELDS[key] in df.columns
+        }
+
+    def _build_bitmaps(self, codes, cardinality):
+        """bitmap لكل قيمة: بت الصف i في الكلمة i // 64 من صف قيمته"""
+        bitmaps = np.zeros((cardinality, self.words), dtype=np.uint64)
+        positions = np.flatnonzero(codes >= 0)
+        bits = np.left_shift(np.uint64(1), (positions & 63).astype(np.uint64))
+        np.bitwise_or.at(bitmaps, (codes[positions], positions >> 6), bits)
+        return bitmaps
+
+    # -------------------------------------------------
+    # حل الاختيارات
+    # -------------------------------------------------
+    def _dimension_mask(self, key, selected):
+        """OR لقيم مختارة في بُعد واحد"""
+        lookup = {value: code for code, value in enumerate(self.values[key])}
+        codes = [lookup[value] for value in selected if value in lookup]
+        if not codes:
+            return np.zeros(self.words, dtype=np.uint64)
+        return np.bitwise_or.reduce(self.bitmaps[key][codes], axis=0)
+
+    def mask(self, selections, exclude=None):
+        """AND لأقنعة الأبعاد المختارة (exclude: بُعد يُتجاهل اختياره، كما في الرسم نفسه)"""
+        result = None
+        for key, selected in selections.items():
+            if key == exclude or not selected or key not in self.bitmaps:
+                continue
+            dimension = self._dimension_mask(key, selected)
+            result = dimension if result is None else result & dimension
+        if result is None:
+            result = np.full(self.words, np.iinfo(np.uint64).max, dtype=np.uint64)
+            if self.size % 64:
+                result[-1] = np.uint64((1 << (self.size % 64)) - 1)
+        return result
+
+    def rows(self, bits):
+        """مواقع الصفوف المختارة"""
+        return np.flatnonzero(np.unpackbits(bits.view(np.uint8), count=self.size, bitorder='little'))
+
+    def count(self, bits):
+        return int(np.bitwise_count(bits).sum())
+
+    # -------------------------------------------------
+    # التجميعات
+    # -------------------------------------------------
+    def aggregate(self, key, selections=None, measure='cost'):
+        """عدد الأصول ومجموع المقياس لكل قيمة في البُعد، مع اختيارات الأبعاد الأخرى فقط"""
+        bits = self.mask(selections or {}, exclude=key)
+        rows = self.rows(bits)
+        codes = self.codes[key][rows]
+        valid = codes >= 0
+        cardinality = len(self.values[key])
+        frame = pd.DataFrame({
+            'Count': np.bincount(codes[valid], minlength=cardinality),
+            'Total': np.bincount(codes[valid], weights=self.measures[measure][rows][valid], minlength=cardinality),
+        }, index=pd.Index(self.values[key], name=asset_records.ALL_FIELDS[key]))
+        return frame[frame['Count'] > 0].round(2)
+
+    def totals(self, selections=None):
+        """عدد الأصول ومجموع كل مقياس للصفوف المختارة"""
+        bits = self.mask(selections or {})
+        rows = self.rows(bits)
+        return {'count': len(rows), **{key: float(values[rows].sum()) for key, values in self.measures.items()}}
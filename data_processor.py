@@ -1,39 +1,82 @@
 # -*- coding: utf-8 -*-
+import hashlib
+import logging
+import os
+from functools import lru_cache
 import pandas as pd
 import numpy as np
 from datetime import datetime
-import streamlit as st
-import re
+
+import config
+import numeric_kernel
+import report_executor
+import schema
+import summary_stats
+
+logger = logging.getLogger(__name__)
+
+# يُرفع عند تغيير ناتج خط المعالجة فتتغير رموز الإصدار وتُهمل النسخ المخزنة القديمة
+PIPELINE_VERSION = 2
+
+
+@lru_cache(maxsize=config.LOAD_CONFIG['CACHE_SIZE'])
+def _read_sheet(file_path, sheet_name, version, columns):
+    """قراءة الورقة لإصدار ملف وإسقاط أعمدة معينين (الإصدار جزء من مفتاح الذاكرة فقط)"""
+    header = DataProcessor.detect_header_row(file_path, sheet_name)
+    usecols = schema.projection_filter(columns) if columns else None
+    return pd.read_excel(file_path, sheet_name=sheet_name, header=header, usecols=usecols)
+
 
 class DataProcessor:
     def __init__(self):
         self.raw_df = None
         self.processed_df = None
+        self.register_stats = None
+        self.schema = None
+        self.column_specs = {}
+        self.numeric_issues = {}
 
     # -------------------------------------------------
     # تحميل البيانات
     # -------------------------------------------------
     @staticmethod
-    def load_data(file_path, sheet_name):
-        """تحميل البيانات من ملف Excel"""
+    def load_data(file_path, sheet_name, columns=None):
+        """تحميل البيانات من ملف Excel (أعمدة الإسقاط فقط إن حُددت، مع ذاكرة لكل إسقاط)"""
         try:
-            # في كثير من ملفات FAR يكون أول صف هو عناوين عربية/إنجليزية مزدوجة
-            # لذا نبدأ من السطر الثاني غالباً (header=1). عدّلها لو احتجت.
-            df = pd.read_excel(file_path, sheet_name=sheet_name, header=1)
+            version = DataProcessor.source_version(file_path, sheet_name)
+            df = _read_sheet(file_path, sheet_name, version, tuple(columns) if columns else None).copy()
 
             if df.empty:
                 raise ValueError("الملف لا يحتوي على بيانات")
 
-            st.success(f"✅ تم تحميل {len(df)} سجل بنجاح")
+            logger.info(f"✅ تم تحميل {len(df)} سجل بنجاح")
             return df
 
         except FileNotFoundError:
-            st.error("❌ ملف البيانات غير موجود")
+            logger.error("❌ ملف البيانات غير موجود")
             raise
         except Exception as e:
-            st.error(f"❌ خطأ في تحميل البيانات: {str(e)}")
+            logger.error(f"❌ خطأ في تحميل البيانات: {str(e)}")
             raise
 
+    @staticmethod
+    def detect_header_row(file_path, sheet_name):
+        """رقم صف العناوين بمطابقة العناوين المعروفة في أول صفوف الورقة فقط"""
+        sample = pd.read_excel(file_path, sheet_name=sheet_name, header=None,
+                               nrows=config.LOAD_CONFIG['HEADER_SCAN_ROWS'])
+        header = schema.detect_header_row(sample)
+        # في كثير من ملفات FAR يكون أول صف فارغاً ثم العناوين (header=1)
+        return header if header is not None else 1
+
+    @staticmethod
+    def source_version(file_path, sheet_name, columns=None):
+        """رمز إصدار البيانات من مسار الملف وتاريخ تعديله وحجمه والورقة وخط المعالجة والإسقاط"""
+        stat = os.stat(file_path)
+        key = f"{os.path.abspath(file_path)}|{stat.st_mtime_ns}|{stat.st_size}|{sheet_name}|{PIPELINE_VERSION}"
+        if columns:
+            key += '|' + ','.join(sorted(schema.projection_keys(columns)))
+        return hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+
     # -------------------------------------------------
     # خط المعالجة الرئيسي
     # -------------------------------------------------
@@ -54,113 +97,110 @@ class DataProcessor:
             # 4) معالجة القيم المفقودة
             df = self.handle_missing_values(df)
 
-            # 5) إضافة أعمدة محسوبة (العمر، النسب، التصنيفات..)
+            # 5) تغذية مُجمِّعات الإحصاءات المتدفقة دفعةً بدفعة
+            self.register_stats = self.collect_stats(df)
+
+            # 6) تطبيق أنواع المخطط (الفئات) وتسجيل المواصفات النهائية
+            df = self.apply_column_specs(df)
+
+            # 7) إضافة أعمدة محسوبة (العمر، النسب، التصنيفات..)
             df = self.calculate_additional_metrics(df)
 
-            # 6) التحقق من جودة البيانات
+            # 8) التحقق من جودة البيانات
             self.validate_data_quality(df)
 
             self.processed_df = df
-            st.success("✅ تم معالجة البيانات بنجاح")
+            logger.info("✅ تم معالجة البيانات بنجاح")
             return df
 
         except Exception as e:
-            st.error(f"❌ خطأ في معالجة البيانات: {str(e)}")
+            logger.error(f"❌ خطأ في معالجة البيانات: {str(e)}")
             raise
 
     # -------------------------------------------------
     # تنظيف أسماء الأعمدة
     # -------------------------------------------------
     def clean_column_names(self, df):
-        """تنظيف أسماء الأعمدة (إزالة رموز/أسطر جديدة وتحويل المسافات إلى _)"""
+        """تحويل العناوين الخام (عربية/إنجليزية) إلى الأسماء القياسية عبر المخطط"""
         try:
-            df.columns = [str(col).strip().replace('\n', ' ').replace('\r', '') for col in df.columns]
-
-            mapping = {}
-            for col in df.columns:
-                # إزالة أي رموز خاصة
-                new_col = re.sub(r'[^\w\s]', '', col)
-                # استبدال المسافات بشرطة سفلية
-                new_col = re.sub(r'\s+', '_', new_col.strip())
-                mapping[col] = new_col
+            self.schema = schema.resolve(df)
+            df = self.schema.apply(df)
+            if self.schema.unknown:
+                logger.info(f"📊 أعمدة غير معروفة في المخطط: {len(self.schema.unknown)}")
+            return df
 
-            df = df.rename(columns=mapping)
+        except Exception as e:
+            logger.warning(f"⚠️ تحذير في تنظيف أسماء الأعمدة: {str(e)}")
             return df
 
+    def standardize_column_aliases(self, df):
+        """إعادة أي أسماء بديلة متبقية (مثل Depreciation_amount) إلى الأسماء القياسية"""
+        try:
+            return schema.resolve(df).apply(df)
         except Exception as e:
-            st.warning(f"⚠️ تحذير في تنظيف أسماء الأعمدة: {str(e)}")
+            logger.warning(f"⚠️ تحذير في توحيد أسماء الأعمدة: {str(e)}")
             return df
 
     # -------------------------------------------------
     # إزالة الصفوف الفارغة
     # -------------------------------------------------
     def remove_empty_rows(self, df):
-        """إزالة الصفوف الفارغة تماماً"""
+        """إزالة الصفوف الفارغة تماماً وصفوف العناوين المكررة"""
         try:
             initial = len(df)
             df = df.dropna(how='all')
+            # صف العناوين العربية الذي يلي صف العناوين الإنجليزية في ملفات FAR
+            header_rows = (self.schema or schema.resolve(df)).header_rows(df)
+            if header_rows:
+                df = df.drop(index=df.index[header_rows])
+            # صفوف الإجماليات في ذيل الورقة: أرقام بلا أي معرّف للأصل
+            identity = [c for c in ['Tag number', 'Asset Description', 'Entity', 'Unique Asset Number in MoF system']
+                        if c in df.columns]
+            if identity:
+                identified = np.flatnonzero(df[identity].notna().any(axis=1).to_numpy())
+                if len(identified):
+                    df = df.iloc[:identified[-1] + 1]
             removed = initial - len(df)
             if removed > 0:
-                st.info(f"📊 تم إزالة {removed} صف فارغ")
+                logger.info(f"📊 تم إزالة {removed} صف فارغ")
             return df
         except Exception as e:
-            st.warning(f"⚠️ تحذير في إزالة الصفوف الفارغة: {str(e)}")
+            logger.warning(f"⚠️ تحذير في إزالة الصفوف الفارغة: {str(e)}")
             return df
 
     # -------------------------------------------------
     # تنظيف الأنواع
     # -------------------------------------------------
     def clean_data_types(self, df):
-        """تحويل التواريخ والأعداد والنصوص لأشكال مناسبة"""
+        """تحويل التواريخ والأعداد والنصوص حسب مواصفات المخطط"""
         try:
+            specs = (self.schema or schema.resolve(df)).specs
+
             # التواريخ
-            date_cols = ['Date_Placed_in_Service', 'تاريخ_الدخول_في_الخدمة']
-            for col in date_cols:
+            for col in [c for c, spec in specs.items() if spec.dtype.startswith('datetime')]:
                 if col in df.columns:
                     df[col] = pd.to_datetime(df[col], errors='coerce', dayfirst=True)
                     if df[col].isna().all():
                         # محاولة لاحقة بصيغة مختلفة
                         df[col] = pd.to_datetime(df[col], errors='coerce', format='%Y-%m-%d %H:%M:%S')
 
-            # الأعمدة الرقمية الشائعة باسمائها بعد التنظيف
-            numeric_cols = [
-                'Cost', 'التكلفة',
-                'Depreciation_amount', 'قسط_الاهلاك',
-                'Net_Book_Value', 'القيمة_الدفترية',
-                'Useful_Life', 'العمر_الإنتاجي',
-                'Quantity', 'العدد',
-                'Residual_Value', 'القيمة_المتبقية_في_نهاية_العمر',
-                'Accumulated_Depreciation', 'الاستهلاك_المتراكم'
-            ]
-
-            for col in numeric_cols:
-                if col in df.columns:
-                    if df[col].dtype == 'object':
-                        df[col] = (
-                            df[col].astype(str)
-                                  .str.replace(',', '', regex=False)
-                                  .str.replace(' ', '', regex=False)
-                        )
-                    df[col] = pd.to_numeric(df[col], errors='coerce')
+            # الأعمدة الرقمية: نواة تحويل واحدة تكتب مباشرة في مصفوفات float64
+            numeric_cols = [c for c, spec in specs.items() if spec.dtype == 'float64']
+            self.numeric_issues = numeric_kernel.coerce_frame(df, numeric_cols)
+            for col, bad in self.numeric_issues.items():
+                logger.warning(f"⚠️ {col}: {bad} قيمة غير قابلة للتحويل إلى رقم")
 
             # نصوص
-            text_cols = [
-                'Asset_Description', 'وصف_الأصل',
-                'Custodian', 'القسم_أو_الإدارة_المسؤولة',
-                'City', 'المدينة',
-                'Level_1_FA_Module_-_English_Description',
-                'Manufacturer', 'المصنع',
-                'Tag_number', 'رقم_البطاقة'
-            ]
-            for col in text_cols:
+            null_tokens = config.COLUMN_TYPES['null_tokens']
+            for col in [c for c, spec in specs.items() if spec.dtype in ('string', 'category')]:
                 if col in df.columns:
                     df[col] = df[col].astype(str).str.strip()
-                    df[col] = df[col].replace(['Not Available', 'N/A', 'nan', 'None'], '')
+                    df[col] = df[col].replace(null_tokens, '')
 
             return df
 
         except Exception as e:
-            st.warning(f"⚠️ تحذير في تنظيف أنواع البيانات: {str(e)}")
+            logger.warning(f"⚠️ تحذير في تنظيف أنواع البيانات: {str(e)}")
             return df
 
     # -------------------------------------------------
@@ -169,6 +209,7 @@ class DataProcessor:
     def handle_missing_values(self, df):
         """ملء/عرض تقرير عن القيم المفقودة"""
         try:
+            specs = (self.schema or schema.resolve(df)).specs
             missing_report = {}
             for col in df.columns:
                 n = df[col].isna().sum()
@@ -176,44 +217,72 @@ class DataProcessor:
                     pct = (n / len(df)) * 100
                     missing_report[col] = {'count': n, 'percentage': round(pct, 2)}
 
-                    if col in ['Cost', 'Depreciation_amount', 'Net_Book_Value']:
-                        df[col] = df[col].fillna(0)
-                    elif col in ['Asset_Description', 'Custodian']:
-                        df[col] = df[col].fillna('غير محدد')
+                    spec = specs.get(col)
+                    if spec is not None and not spec.nullable:
+                        df[col] = df[col].fillna(spec.fill)
 
             if missing_report:
-                st.warning("⚠️ يوجد قيم مفقودة في البيانات")
+                logger.warning("⚠️ يوجد قيم مفقودة في البيانات")
                 # عرض الأعمدة ذات النسب الأعلى فقط للاختصار
                 for col, info in missing_report.items():
                     if info['percentage'] > 5:
-                        st.write(f"   - {col}: {info['count']} قيم مفقودة ({info['percentage']}%)")
+                        logger.warning(f"   - {col}: {info['count']} قيم مفقودة ({info['percentage']}%)")
+
+            return df
 
+        except Exception as e:
+            logger.warning(f"⚠️ تحذير في معالجة القيم المفقودة: {str(e)}")
             return df
 
+    # -------------------------------------------------
+    # تطبيق مواصفات المخطط
+    # -------------------------------------------------
+    def apply_column_specs(self, df):
+        """تحويل أعمدة الفئات إلى النوع category وتسجيل مجموعات الفئات المشاهدة"""
+        try:
+            current = self.schema or schema.resolve(df)
+            for col in current.columns_of('category'):
+                if col in df.columns:
+                    df[col] = df[col].astype('category')
+            self.column_specs = current.observed_specs(df)
+            return df
         except Exception as e:
-            st.warning(f"⚠️ تحذير في معالجة القيم المفقودة: {str(e)}")
+            logger.warning(f"⚠️ تحذير في تطبيق أنواع الأعمدة: {str(e)}")
             return df
 
+    # -------------------------------------------------
+    # الإحصاءات المتدفقة
+    # -------------------------------------------------
+    def collect_stats(self, df, stats=None):
+        """تغذية مُجمِّعات الإحصاءات (أو تحديث مُجمِّعات قائمة) بدفعات من الصفوف"""
+        try:
+            if stats is None:
+                stats = summary_stats.RegisterStats()
+            return stats.update_frame(df)
+        except Exception as e:
+            logger.warning(f"⚠️ تحذير في تجميع الإحصاءات: {str(e)}")
+            return stats
+
     # -------------------------------------------------
     # الأعمدة المحسوبة (الإصدار المعتمد)
     # -------------------------------------------------
     @staticmethod
-def calculate_additional_metrics(df):
+    def calculate_additional_metrics(df):
         """إضافة أعمدة محسوبة مثل العمر ونسبة الإهلاك والتصنيفات"""
         try:
             # 1) حساب عمر الأصل (بالسنوات) بدون استخدام وحدة 'Y'
             #    نحول الفرق إلى أيام ثم نقسم على 365.25
-            if 'Date_Placed_in_Service' in df.columns:
+            if 'Date Placed in Service' in df.columns:
                 now = pd.Timestamp.now()
-                age_days = (now - pd.to_datetime(df['Date_Placed_in_Service'], errors='coerce')).dt.days
+                age_days = (now - pd.to_datetime(df['Date Placed in Service'], errors='coerce')).dt.days
                 df['Asset_Age'] = (age_days / 365.25).round(1)
             else:
                 # إن لم تتوفر، اجعلها صفر لتجنب أخطاء لاحقة
                 df['Asset_Age'] = 0.0
 
             # 2) نسبة الإهلاك
-            if 'Cost' in df.columns and 'Depreciation_amount' in df.columns:
-                df['Depreciation_Rate'] = (df['Depreciation_amount'] / df['Cost']) * 100
+            if 'Cost' in df.columns and 'Depreciation amount' in df.columns:
+                df['Depreciation_Rate'] = (df['Depreciation amount'] / df['Cost']) * 100
                 df['Depreciation_Rate'] = df['Depreciation_Rate'].replace([np.inf, -np.inf], np.nan).fillna(0)
                 df['Depreciation_Rate'] = df['Depreciation_Rate'].clip(0, 100).round(2)
 
@@ -235,20 +304,20 @@ def calculate_additional_metrics(df):
                 df['Value_Category'] = np.select(conds, labels, default='very_low')
 
             # 5) العمر المتبقي
-            if 'Useful_Life' in df.columns:
-                df['Remaining_Life'] = (df['Useful_Life'] - df['Asset_Age']).round(1)
+            if 'Useful Life' in df.columns:
+                df['Remaining_Life'] = (df['Useful Life'] - df['Asset_Age']).round(1)
                 df['Remaining_Life'] = df['Remaining_Life'].clip(lower=0)
 
             # 6) سنة التشغيل
-            if 'Date_Placed_in_Service' in df.columns:
-                d = pd.to_datetime(df['Date_Placed_in_Service'], errors='coerce')
+            if 'Date Placed in Service' in df.columns:
+                d = pd.to_datetime(df['Date Placed in Service'], errors='coerce')
                 df['Service_Year'] = d.dt.year
 
-            st.info("📈 تم إضافة الأعمدة المحسوبة بنجاح")
+            logger.info("📈 تم إضافة الأعمدة المحسوبة بنجاح")
             return df
 
         except Exception as e:
-            st.warning(f"⚠️ تحذير في إضافة الأعمدة المحسوبة: {str(e)}")
+            logger.warning(f"⚠️ تحذير في إضافة الأعمدة المحسوبة: {str(e)}")
             return df
 
     # -------------------------------------------------
@@ -271,13 +340,13 @@ def calculate_additional_metrics(df):
                 if len(neg) > 0:
                     issues.append(f"❌ تكاليف سلبية: {len(neg)} سجل")
 
-            if 'Cost' in df.columns and 'Depreciation_amount' in df.columns:
-                over = df[df['Depreciation_amount'] > df['Cost']]
+            if 'Cost' in df.columns and 'Depreciation amount' in df.columns:
+                over = df[df['Depreciation amount'] > df['Cost']]
                 if len(over) > 0:
                     issues.append(f"❌ إهلاك زائد عن التكلفة: {len(over)} سجل")
 
-            if 'Net_Book_Value' in df.columns:
-                nbv_neg = df[df['Net_Book_Value'] < 0]
+            if 'Net Book Value' in df.columns:
+                nbv_neg = df[df['Net Book Value'] < 0]
                 if len(nbv_neg) > 0:
                     issues.append(f"❌ قيم دفترية سلبية: {len(nbv_neg)} سجل")
 
@@ -286,22 +355,22 @@ def calculate_additional_metrics(df):
                 if len(age_neg) > 0:
                     issues.append(f"❌ أعمار سلبية: {len(age_neg)} سجل")
 
-            if 'Tag_number' in df.columns:
-                dup = df[df.duplicated('Tag_number', keep=False)]
+            if 'Tag number' in df.columns:
+                dup = df[df.duplicated('Tag number', keep=False)]
                 if len(dup) > 0:
                     issues.append(f"❌ أرقام بطاقات مكررة: {len(dup)} سجل")
 
             if issues:
-                st.warning("⚠️ مشاكل في جودة البيانات:")
+                logger.warning("⚠️ مشاكل في جودة البيانات:")
                 for i in issues:
-                    st.write(f"   {i}")
+                    logger.warning(f"   {i}")
             else:
-                st.success("✅ جودة البيانات ممتازة")
+                logger.info("✅ جودة البيانات ممتازة")
 
             return issues
 
         except Exception as e:
-            st.warning(f"⚠️ تحذير في التحقق من جودة البيانات: {str(e)}")
+            logger.warning(f"⚠️ تحذير في التحقق من جودة البيانات: {str(e)}")
             return []
 
     # -------------------------------------------------
@@ -318,31 +387,46 @@ def calculate_additional_metrics(df):
                 'cost_range': None
             }
 
-            if 'Date_Placed_in_Service' in df.columns:
-                d = pd.to_datetime(df['Date_Placed_in_Service'], errors='coerce')
+            if 'Date Placed in Service' in df.columns:
+                d = pd.to_datetime(df['Date Placed in Service'], errors='coerce')
                 summary['date_range'] = {'min': d.min(), 'max': d.max()}
 
             if 'Cost' in df.columns:
+                # إعادة استخدام المُجمِّعات المحسوبة أثناء المعالجة، أو تمريرة واحدة على العمود
+                if df is self.processed_df and self.register_stats is not None:
+                    cost = self.register_stats['cost']
+                else:
+                    cost = summary_stats.RegisterStats.from_frame(df, columns={'cost': 'Cost'}, groups={})['cost']
                 summary['cost_range'] = {
-                    'min': float(pd.to_numeric(df['Cost'], errors='coerce').min()),
-                    'max': float(pd.to_numeric(df['Cost'], errors='coerce').max()),
-                    'total': float(pd.to_numeric(df['Cost'], errors='coerce').sum())
+                    'min': cost.min if cost.count else float('nan'),
+                    'max': cost.max if cost.count else float('nan'),
+                    'total': cost.total
                 }
 
             return summary
 
         except Exception as e:
-            st.warning(f"⚠️ تحذير في إنشاء ملخص البيانات: {str(e)}")
+            logger.warning(f"⚠️ تحذير في إنشاء ملخص البيانات: {str(e)}")
             return {}
 
     def export_processed_data(self, df, file_path):
         """تصدير البيانات المعالجة"""
         try:
             df.to_excel(file_path, index=False)
-            st.success(f"✅ تم تصدير البيانات إلى {file_path}")
+            logger.info(f"✅ تم تصدير البيانات إلى {file_path}")
             return True
         except Exception as e:
-            st.error(f"❌ خطأ في تصدير البيانات: {str(e)}")
+            logger.error(f"❌ خطأ في تصدير البيانات: {str(e)}")
+            return False
+
+    def export_to_store(self, df, store, version):
+        """كتابة البيانات المعالجة في مخزن SQLite (مرة واحدة لكل إصدار بيانات)"""
+        try:
+            if store.version != str(version):
+                store.write_frame(df, version)
+            return True
+        except Exception as e:
+            logger.error(f"❌ خطأ في الكتابة إلى مخزن SQLite: {str(e)}")
             return False
 
     def filter_data(self, df, filters):
@@ -357,7 +441,7 @@ def calculate_additional_metrics(df):
                         out = out[out[column].astype(str).str.contains(str(value), case=False, na=False)]
             return out
         except Exception as e:
-            st.error(f"❌ خطأ في تصفية البيانات: {str(e)}")
+            logger.error(f"❌ خطأ في تصفية البيانات: {str(e)}")
             return df
 
 
@@ -370,17 +454,17 @@ class DataValidator:
         """التحقق من صحة بيانات الأصول"""
         results = {'passed': [], 'warnings': [], 'errors': []}
         try:
-            required = ['Cost', 'Asset_Description', 'Tag_number']
+            required = ['Cost', 'Asset Description', 'Tag number']
             for col in required:
                 if col not in df.columns:
                     results['errors'].append(f"العمود المطلوب '{col}' غير موجود")
 
-            if 'Tag_number' in df.columns:
-                dup = df[df.duplicated('Tag_number', keep=False)]
+            if 'Tag number' in df.columns:
+                dup = df[df.duplicated('Tag number', keep=False)]
                 if len(dup) > 0:
                     results['warnings'].append(f"يوجد {len(dup)} رقم بطاقة مكرر")
 
-            for col in ['Cost', 'Depreciation_amount', 'Net_Book_Value']:
+            for col in ['Cost', 'Depreciation amount', 'Net Book Value']:
                 if col in df.columns:
                     if df[col].isna().any():
                         results['warnings'].append(f"يوجد قيم مفقودة في {col}")
@@ -399,29 +483,48 @@ class DataValidator:
 # -----------------------------------------------------
 # تقارير وأنماط
 # -----------------------------------------------------
-def detect_data_patterns(df):
-    """كشف أنماط البيانات (سنوي/مدن/تصنيفات)"""
+def _distribution(series, sort_index=False):
+    """توزيع القيم لعمود واحد (دالة على مستوى الوحدة لتعمل أيضاً في مجمع العمليات)"""
+    counts = series.value_counts()
+    return (counts.sort_index() if sort_index else counts).to_dict()
+
+
+def _pattern_executor(df):
+    """منفّذ تقارير بعمليات منفصلة للإطارات الكبيرة فقط (كلفة نقل البيانات)"""
+    return report_executor.ReportExecutor(
+        use_processes=len(df) >= config.REPORT_CONFIG['PROCESS_MIN_ROWS'])
+
+
+def detect_data_patterns(df, stream=False):
+    """كشف أنماط البيانات (سنوي/مدن/تصنيفات)؛ كل توزيع يُحسب بالتوازي"""
     patterns = {}
     try:
+        executor = _pattern_executor(df)
         if 'Service_Year' in df.columns:
-            patterns['yearly_distribution'] = df['Service_Year'].value_counts().sort_index().to_dict()
+            executor.add('yearly_distribution', _distribution, df['Service_Year'], True)
         if 'City' in df.columns:
-            patterns['city_distribution'] = df['City'].value_counts().to_dict()
-        if 'Level_1_FA_Module_-_English_Description' in df.columns:
-            patterns['category_distribution'] = df['Level_1_FA_Module_-_English_Description'].value_counts().to_dict()
+            executor.add('city_distribution', _distribution, df['City'])
+        if 'Level 1 FA Module - English Description' in df.columns:
+            executor.add('category_distribution', _distribution, df['Level 1 FA Module - English Description'])
+        if stream:
+            return executor.stream()
+        patterns = executor.run()
         return patterns
     except Exception as e:
-        st.warning(f"⚠️ تحذير في كشف الأنماط: {str(e)}")
+        logger.warning(f"⚠️ تحذير في كشف الأنماط: {str(e)}")
         return {}
 
-def generate_data_report(df):
-    """إنشاء تقرير شامل عن البيانات"""
+def _basic_info(df):
     return {
-        'basic_info': {
-            'total_records': len(df),
-            'total_columns': len(df.columns),
-            'memory_usage': float(df.memory_usage(deep=True).sum()) / (1024 ** 2)  # MB
-        },
-        'data_quality': {},
-        'patterns': detect_data_patterns(df)
+        'total_records': len(df),
+        'total_columns': len(df.columns),
+        'memory_usage': float(df.memory_usage(deep=True).sum()) / (1024 ** 2)  # MB
     }
+
+def generate_data_report(df, stream=False):
+    """إنشاء تقرير شامل عن البيانات (المعلومات الأساسية والأنماط بالتوازي)"""
+    executor = report_executor.ReportExecutor()
+    executor.add('basic_info', _basic_info, df)
+    executor.add('data_quality', dict)
+    executor.add('patterns', detect_data_patterns, df)
+    return executor.stream() if stream else executor.run()
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""
+كشف الأصول المكررة تقريبياً - نظام إدارة الأصول الثابتة
+الأصل نفسه المُدخل مرتين برقمي بطاقة مختلفين ووصفين متقاربين: تُقسَّم الأصول
+إلى كتل (الشركة المصنعة، شريحة التكلفة، سنة التشغيل)، ثم يُقارن الوصف داخل
+كل كتلة بتوقيعات MinHash مع LSH على مقاطع ثلاثية من النص الموحد، فلا تُقارن
+كل الأزواج (O(n²)) وتخرج مجموعات مرشحة مرتبة حسب التشابه.
+"""
+import zlib
+
+import numpy as np
+import pandas as pd
+
+import config
+import search_engine
+
+DESCRIPTION = config.COLUMN_MAPPING['asset_description_en']
+MANUFACTURER = config.COLUMN_MAPPING['manufacturer']
+COST = config.COLUMN_MAPPING['cost']
+
+_PRIME = np.uint64(4294967291)  # أكبر عدد أولي أقل من 2^32: a·h لا يتجاوز uint64
+
+
+def shingle_hashes(texts):
+    """(تجزئات المقاطع الثلاثية متتالية، بداية مقاطع كل نص) لقائمة نصوص موحدة"""
+    hashes, starts = [], []
+    for text in texts:
+        starts.append(len(hashes))
+        hashes.extend(zlib.crc32(shingle.encode('utf-8')) for shingle in search_engine.trigrams(text))
+    return np.asarray(hashes, dtype=np.uint64), np.asarray(starts, dtype=np.int64)
+
+
+def minhash_signatures(hashes, starts, num_perm, seed=0):
+    """توقيع MinHash لكل نص: أصغر قيمة لكل تبديل (a·h + b) mod p على مقاطعه"""
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, _PRIME, size=num_perm, dtype=np.uint64)
+    b = rng.integers(0, _PRIME, size=num_perm, dtype=np.uint64)
+    hashes = hashes % _PRIME
+    signatures = np.empty((len(starts), num_perm), dtype=np.uint32)
+    for i in range(num_perm):
+        # تبديل واحد على كل المقاطع دفعة واحدة، ثم أصغر قيمة لكل نص
+        values = (a[i] * hashes % _PRIME + b[i]) % _PRIME
+        signatures[:, i] = np.minimum.reduceat(values, starts)
+    return signatures
+
+
+def band_keys(signatures, bands):
+    """مفتاح تجزئة لكل شريط من التوقيع (bands عمود)"""
+    rows = signatures.shape[1] // bands
+    multipliers = np.uint64(0x9E3779B97F4A7C15) ** np.arange(rows, dtype=np.uint64)
+    banded = signatures[:, :bands * rows].astype(np.uint64).reshape(len(signatures), bands, rows)
+    return (banded * multipliers).sum(axis=2)  # التفاف uint64 مقصود
+
+
+def connected_components(n, left, right):
+    """رقم مكوّن لكل عقدة من أزواج الحواف (انتشار أصغر رقم مع قفز المؤشرات)"""
+    labels = np.arange(n)
+    while True:
+        low = np.minimum(labels[left], labels[right])
+        updated = labels.copy()
+        np.minimum.at(updated, left, low)
+        np.minimum.at(updated, right, low)
+        updated = updated[updated]
+        if np.array_equal(updated, labels):
+            return labels
+        labels = updated
+
+
+def _block_codes(df):
+    """دالة رقم الكتلة لكل صف حسب إزاحة شريحة التكلفة (-1 للصف الذي لا يُقارن)"""
+    cost = pd.to_numeric(df[COST], errors='coerce').to_numpy(dtype=float) if COST in df.columns \
+        else np.full(len(df), np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        scaled = np.log(cost) / np.log1p(config.DUPLICATE_CONFIG['COST_TOLERANCE'])
+    manufacturer = (pd.factorize(search_engine.normalize_text(df[MANUFACTURER]))[0] if MANUFACTURER in df.columns
+                    else np.zeros(len(df), dtype=np.int64))
+    year = (pd.to_numeric(df['Service_Year'], errors='coerce').fillna(-1).to_numpy() if 'Service_Year' in df.columns
+            else np.full(len(df), -1))
+
+    def codes(shift):
+        bucket = np.floor(scaled + shift)
+        valid = np.isfinite(bucket)
+        grouped = pd.DataFrame({'m': manufacturer, 'c': np.where(valid, bucket, 0), 'y': year}) \
+            .groupby(['m', 'c', 'y'], sort=False).ngroup().to_numpy()
+        return np.where(valid, grouped, -1)
+    return codes
+
+
+def candidate_pairs(df, description_codes, signatures):
+    """أزواج (ممثل، عضو) تشترك في كتلة وشريط LSH واحد على الأقل، بدون تكرار"""
+    duplicate_config = config.DUPLICATE_CONFIG
+    keys = band_keys(signatures, duplicate_config['BANDS'])
+    has_text = description_codes >= 0
+    block_codes = _block_codes(df)
+    left, right = [], []
+    # إزاحة نصف شريحة في المرور الثاني تلتقط الأزواج على حدود شرائح التكلفة
+    for shift in (0.0, 0.5):
+        blocks = block_codes(shift)
+        rows = np.flatnonzero((blocks >= 0) & has_text)
+        salt = blocks[rows].astype(np.uint64) * np.uint64(0xC2B2AE3D27D4EB4F)
+        for band in range(keys.shape[1]):
+            # مفتاح (الكتلة، الشريط) مدمج في uint64 واحد؛ الفرز أرخص من groupby
+            bucket = keys[description_codes[rows], band] ^ salt
+            order = np.argsort(bucket, kind='stable')
+            sorted_bucket = bucket[order]
+            first = np.r_[True, sorted_bucket[1:] != sorted_bucket[:-1]]
+            representative = order[np.flatnonzero(first)][np.cumsum(first) - 1]
+            members = ~first
+            left.append(rows[representative[members]])
+            right.append(rows[order[members]])
+    if not left:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    # زوج = عدد صحيح واحد (ممثل × n + عضو) فيكون حذف المكرر فرزاً أحادي البعد
+    pairs = np.unique(np.concatenate(left) * len(df) + np.concatenate(right))
+    return pairs // len(df), pairs % len(df)
+
+
+def find_near_duplicates(df, threshold=None):
+    """الأصول المرشحة كمكررات: رقم المجموعة ودرجة التشابه، مرتبة بالمجموعات الأقوى أولاً"""
+    duplicate_config = config.DUPLICATE_CONFIG
+    threshold = duplicate_config['THRESHOLD'] if threshold is None else threshold
+    if DESCRIPTION not in df.columns or df.empty:
+        return pd.DataFrame()
+
+    # 1) توقيع واحد لكل وصف فريد (الأوصاف تتكرر كثيراً في السجل)
+    normalized = search_engine.normalize_text(df[DESCRIPTION])
+    description_codes, descriptions = pd.factorize(normalized.replace('', pd.NA), use_na_sentinel=True)
+    if len(descriptions) == 0:
+        return pd.DataFrame()
+    hashes, starts = shingle_hashes(descriptions)
+    signatures = minhash_signatures(hashes, starts, duplicate_config['NUM_PERM'])
+
+    # 2) الأزواج المرشحة من الكتل وأشرطة LSH، ثم التحقق بتقدير Jaccard من التوقيعات
+    left, right = candidate_pairs(df, description_codes, signatures)
+    similarity = np.empty(len(left))
+    step = duplicate_config['VERIFY_CHUNK']
+    for start in range(0, len(left), step):
+        a = signatures[description_codes[left[start:start + step]]]
+        b = signatures[description_codes[right[start:start + step]]]
+        similarity[start:start + step] = (a == b).mean(axis=1)
+    keep = similarity >= threshold
+    left, right, similarity = left[keep], right[keep], similarity[keep]
+    if len(left) == 0:
+        return pd.DataFrame()
+
+    # 3) مجموعات مترابطة، ودرجة كل أصل = أعلى تشابه على حوافه
+    labels = connected_components(len(df), left, right)
+    score = np.zeros(len(df))
+    np.maximum.at(score, left, similarity)
+    np.maximum.at(score, right, similarity)
+    members = np.flatnonzero(score > 0)
+
+    columns = [config.COLUMN_MAPPING[key] for key in duplicate_config['REPORT_COLUMNS']]
+    result = df.iloc[members][[c for c in columns + ['Service_Year'] if c in df.columns]].copy()
+    result['Duplicate_Score'] = np.round(score[members], 3)
+    group = pd.Series(labels[members], index=result.index)
+    ranking = result['Duplicate_Score'].groupby(group).agg(['mean', 'size'])
+    # المجموعات الكبيرة من أوصاف متطابقة غالباً مشتريات بالجملة لا إدخالات مكررة
+    max_size = duplicate_config['MAX_CLUSTER_SIZE']
+    if max_size:
+        ranking = ranking[ranking['size'] <= max_size]
+        keep = group.isin(ranking.index).to_numpy()
+        result, group = result[keep], group[keep]
+    ranking = ranking.sort_values(['mean', 'size'], ascending=[False, True])
+    cluster_ids = pd.Series(np.arange(1, len(ranking) + 1), index=ranking.index)
+    result.insert(0, 'Cluster_ID', cluster_ids.reindex(group.to_numpy()).to_numpy())
+    return result.sort_values(['Cluster_ID', 'Duplicate_Score'], ascending=[True, False])
+
+
+def cluster_summary(duplicates):
+    """ملخص لكل مجموعة: عدد الأصول والتكلفة ومتوسط التشابه"""
+    if duplicates.empty:
+        return pd.DataFrame()
+    grouped = duplicates.groupby('Cluster_ID')
+    summary = pd.DataFrame({
+        'Count': grouped.size(),
+        'Mean_Score': grouped['Duplicate_Score'].mean().round(3),
+    })
+    if COST in duplicates.columns:
+        summary['Total_Cost'] = grouped[COST].sum().round(2)
+    if DESCRIPTION in duplicates.columns:
+        summary['Description'] = grouped[DESCRIPTION].first()
+    return summary
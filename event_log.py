@@ -0,0 +1,276 @@
+# -*- coding: utf-8 -*-
+"""
+سجل أحداث الأصول - نظام إدارة الأصول الثابتة
+سجل إلحاقي فقط (إضافة، نقل، إعادة تقييم/انخفاض قيمة، استبعاد) في SQLite،
+مع عرض للحالة الحالية يُحدَّث تدريجياً مع كل حدث، ونقاط حفظ دورية يُجاب منها
+عن سؤال "كيف كان السجل في تاريخ معين" بإعادة تشغيل الأحداث اللاحقة فقط.
+"""
+import json
+import sqlite3
+import threading
+from datetime import datetime
+
+import pandas as pd
+
+import config
+
+EVENT_TYPES = ('add', 'transfer', 'revalue', 'dispose')
+
+# أعمدة حالة الأصل في العرض الحالي ونقاط الحفظ
+STATE_COLUMNS = ['tag', 'description', 'category', 'custodian', 'city', 'cost', 'depreciation',
+                 'impairment', 'nbv', 'status', 'disposal_date', 'proceeds', 'last_date', 'last_seq']
+
+_STATE_DDL = """
+    tag TEXT NOT NULL, description TEXT, category TEXT, custodian TEXT, city TEXT,
+    cost REAL, depreciation REAL, impairment REAL, nbv REAL, status TEXT,
+    disposal_date TEXT, proceeds REAL, last_date TEXT, last_seq INTEGER
+"""
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS events (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    event_date TEXT NOT NULL,
+    event_type TEXT NOT NULL CHECK (event_type IN {EVENT_TYPES}),
+    tag TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    recorded_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_events_tag ON events (tag, event_date, seq);
+CREATE INDEX IF NOT EXISTS idx_events_date ON events (event_date, seq);
+
+CREATE TABLE IF NOT EXISTS current_state ({_STATE_DDL}, PRIMARY KEY (tag));
+
+CREATE TABLE IF NOT EXISTS checkpoints (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    as_of TEXT NOT NULL,
+    last_seq INTEGER NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS checkpoint_state ({_STATE_DDL}, checkpoint_id INTEGER NOT NULL,
+    PRIMARY KEY (checkpoint_id, tag));
+"""
+
+
+def _iso_date(value):
+    return pd.Timestamp(value).strftime('%Y-%m-%d')
+
+
+def _number(value, default=0.0):
+    return default if value is None or pd.isna(value) else float(value)
+
+
+def apply_event(state, event_type, event_date, payload, seq):
+    """تطبيق حدث واحد على حالة أصل (قاموس) وإعادة الحالة الجديدة"""
+    if event_type == 'add':
+        cost = _number(payload.get('cost'))
+        depreciation = _number(payload.get('depreciation'))
+        state = {
+            'description': payload.get('description'), 'category': payload.get('category'),
+            'custodian': payload.get('custodian'), 'city': payload.get('city'),
+            'cost': cost, 'depreciation': depreciation, 'impairment': 0.0,
+            'nbv': _number(payload.get('nbv'), cost - depreciation),
+            'status': 'active', 'disposal_date': None, 'proceeds': None,
+        }
+    elif state is None:
+        raise ValueError(f"حدث {event_type} لأصل غير مضاف")
+    elif event_type == 'transfer':
+        state = dict(state)
+        for field in ('custodian', 'city'):
+            if payload.get(field) is not None:
+                state[field] = payload[field]
+    elif event_type == 'revalue':
+        # إعادة تقييم بقيم جديدة، أو انخفاض قيمة بمبلغ يُخصم من القيمة الدفترية
+        state = dict(state)
+        for field in ('cost', 'depreciation', 'nbv'):
+            if payload.get(field) is not None:
+                state[field] = float(payload[field])
+        impairment = min(_number(payload.get('impairment')), max(state['nbv'], 0.0))
+        state['impairment'] += impairment
+        state['nbv'] -= impairment
+    elif event_type == 'dispose':
+        state = dict(state, status='disposed', disposal_date=event_date, nbv=0.0,
+                     proceeds=_number(payload.get('proceeds')))
+    state['last_date'], state['last_seq'] = event_date, seq
+    return state
+
+
+class EventLog:
+    """سجل الأحداث مع العرض الحالي المادي ونقاط الحفظ"""
+
+    def __init__(self, path=None):
+        self.path = path or config.EVENT_LOG_CONFIG['PATH']
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._lock = threading.RLock()
+        with self._lock, self._conn:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.executescript(_SCHEMA)
+
+    def close(self):
+        self._conn.close()
+
+    def __len__(self):
+        return self._conn.execute('SELECT COUNT(*) FROM events').fetchone()[0]
+
+    # -------------------------------------------------
+    # الحالة
+    # -------------------------------------------------
+    def _load_state(self, tag):
+        row = self._conn.execute('SELECT * FROM current_state WHERE tag = ?', (tag,)).fetchone()
+        return dict(zip(STATE_COLUMNS, row)) if row else None
+
+    def _replay_tag(self, tag):
+        """إعادة بناء حالة أصل من أحداثه (عند وصول حدث بتاريخ سابق)"""
+        state = None
+        for seq, event_date, event_type, payload in self._conn.execute(
+                'SELECT seq, event_date, event_type, payload FROM events WHERE tag = ? ORDER BY event_date, seq',
+                (tag,)):
+            state = apply_event(state, event_type, event_date, json.loads(payload), seq)
+        return state
+
+    def _save_states(self, states):
+        placeholders = ', '.join('?' * len(STATE_COLUMNS))
+        self._conn.executemany(
+            f"INSERT OR REPLACE INTO current_state ({', '.join(STATE_COLUMNS)}) VALUES ({placeholders})",
+            [tuple(state.get(col) if col != 'tag' else tag for col in STATE_COLUMNS)
+             for tag, state in states.items()])
+
+    # -------------------------------------------------
+    # الإلحاق
+    # -------------------------------------------------
+    def append_many(self, events):
+        """إلحاق أحداث (قواميس: event_type, tag, event_date, وبقية الحقول) في معاملة واحدة"""
+        recorded_at = datetime.now().isoformat(timespec='seconds')
+        with self._lock, self._conn:
+            states = {}
+            earliest, seq = None, 0
+            for event in events:
+                event = dict(event)
+                event_type, tag = event.pop('event_type'), str(event.pop('tag'))
+                event_date = _iso_date(event.pop('event_date'))
+                if event_type not in EVENT_TYPES:
+                    raise ValueError(f"نوع حدث غير معروف: {event_type}")
+                payload = json.dumps(event, ensure_ascii=False, default=str)
+                seq = self._conn.execute(
+                    'INSERT INTO events (event_date, event_type, tag, payload, recorded_at) VALUES (?, ?, ?, ?, ?)',
+                    (event_date, event_type, tag, payload, recorded_at)).lastrowid
+
+                # 1) تحديث تدريجي للعرض الحالي، أو إعادة تشغيل الأصل إن كان الحدث بتاريخ سابق
+                state = states[tag] if tag in states else self._load_state(tag)
+                if state is not None and event_date < state['last_date']:
+                    states[tag] = self._replay_tag(tag)
+                else:
+                    states[tag] = apply_event(state, event_type, event_date, event, seq)
+                earliest = event_date if earliest is None else min(earliest, event_date)
+
+            self._save_states(states)
+            # 2) نقاط الحفظ التي تلي تاريخ أي حدث جديد لم تعد صحيحة
+            if earliest is not None:
+                stale = [row[0] for row in self._conn.execute(
+                    'SELECT id FROM checkpoints WHERE as_of >= ?', (earliest,))]
+                self._conn.executemany('DELETE FROM checkpoint_state WHERE checkpoint_id = ?', [(i,) for i in stale])
+                self._conn.executemany('DELETE FROM checkpoints WHERE id = ?', [(i,) for i in stale])
+
+            # 3) نقطة حفظ تلقائية كل CHECKPOINT_EVERY حدثاً
+            last_checkpoint = self._conn.execute('SELECT COALESCE(MAX(last_seq), 0) FROM checkpoints').fetchone()[0]
+            if seq - last_checkpoint >= config.EVENT_LOG_CONFIG['CHECKPOINT_EVERY']:
+                self.checkpoint()
+        return len(states)
+
+    def append(self, event_type, tag, event_date, **payload):
+        """إلحاق حدث واحد"""
+        return self.append_many([dict(payload, event_type=event_type, tag=tag, event_date=event_date)])
+
+    def seed_from_frame(self, df, as_of=None):
+        """تهيئة السجل من لقطة سجل الأصول: إضافة بالتكلفة في تاريخ الخدمة، ثم الإهلاك المتراكم
+        وصافي القيمة في تاريخ اللقطة (فلا تظهر قيم نهاية الفترة في تواريخ سابقة لها)"""
+        columns = config.COLUMN_MAPPING
+        as_of = _iso_date(as_of or config.EVENT_LOG_CONFIG['SNAPSHOT_DATE'])
+        in_service = pd.to_datetime(df[columns['date_in_service']], errors='coerce').dt.strftime('%Y-%m-%d')
+        cost = pd.to_numeric(df[columns['cost']], errors='coerce')
+        additions = pd.DataFrame({
+            'tag': df[columns['tag_number']].astype('string'),
+            'event_date': in_service.where(in_service <= as_of, as_of).fillna(as_of),
+            'description': df[columns['asset_description_en']].astype('string'),
+            'category': df[columns['level1_english']].astype('string'),
+            'custodian': df[columns['custodian']].astype('string'),
+            'city': df[columns['city']].astype('string'),
+            'cost': cost,
+            'depreciation': 0.0,
+            'nbv': cost,
+        })
+        # الإهلاك المتراكم يُسجَّل في الملف سالباً (مثلاً -5015.89)
+        snapshot = pd.DataFrame({
+            'tag': additions['tag'],
+            'event_date': as_of,
+            'depreciation': pd.to_numeric(df[columns['accumulated_depreciation']], errors='coerce').abs(),
+            'nbv': pd.to_numeric(df[columns['net_book_value']], errors='coerce'),
+        })
+        events = []
+        for frame, event_type in ((additions, 'add'), (snapshot, 'revalue')):
+            frame = frame.dropna(subset=['tag'])
+            frame = frame.astype(object).where(frame.notna(), None)
+            events += [dict(record, event_type=event_type) for record in frame.to_dict('records')]
+        return self.append_many(events)
+
+    # -------------------------------------------------
+    # الاستعلامات
+    # -------------------------------------------------
+    def current_state(self, include_disposed=False):
+        """العرض الحالي المادي للسجل"""
+        query = 'SELECT * FROM current_state' + ('' if include_disposed else " WHERE status = 'active'")
+        return pd.read_sql_query(query, self._conn)
+
+    def history(self, tag):
+        """كل أحداث أصل بالترتيب الزمني"""
+        return pd.read_sql_query('SELECT * FROM events WHERE tag = ? ORDER BY event_date, seq',
+                                 self._conn, params=(str(tag),))
+
+    def checkpoint(self, as_of=None):
+        """حفظ حالة السجل كما في تاريخ معين (افتراضياً آخر تاريخ حدث)"""
+        with self._lock, self._conn:
+            as_of = _iso_date(as_of) if as_of is not None else self._conn.execute(
+                'SELECT MAX(event_date) FROM events').fetchone()[0]
+            if as_of is None:
+                return None
+            states = self._state_as_of(as_of)
+            last_seq = self._conn.execute('SELECT COALESCE(MAX(seq), 0) FROM events').fetchone()[0]
+            checkpoint_id = self._conn.execute(
+                'INSERT INTO checkpoints (as_of, last_seq, created_at) VALUES (?, ?, ?)',
+                (as_of, last_seq, datetime.now().isoformat(timespec='seconds'))).lastrowid
+            placeholders = ', '.join('?' * (len(STATE_COLUMNS) + 1))
+            self._conn.executemany(
+                f"INSERT INTO checkpoint_state ({', '.join(STATE_COLUMNS)}, checkpoint_id) VALUES ({placeholders})",
+                [tuple(state.get(col) if col != 'tag' else tag for col in STATE_COLUMNS) + (checkpoint_id,)
+                 for tag, state in states.items()])
+            return checkpoint_id
+
+    def _state_as_of(self, as_of):
+        """حالات الأصول في تاريخ: أقرب نقطة حفظ سابقة ثم إعادة تشغيل ما بعدها"""
+        row = self._conn.execute(
+            'SELECT id, as_of FROM checkpoints WHERE as_of <= ? ORDER BY as_of DESC, id DESC LIMIT 1',
+            (as_of,)).fetchone()
+        states, start = {}, None
+        if row is not None:
+            checkpoint_id, start = row
+            for values in self._conn.execute(
+                    f"SELECT {', '.join(STATE_COLUMNS)} FROM checkpoint_state WHERE checkpoint_id = ?",
+                    (checkpoint_id,)):
+                state = dict(zip(STATE_COLUMNS, values))
+                states[state.pop('tag')] = state
+        query = 'SELECT seq, event_date, event_type, tag, payload FROM events WHERE event_date <= ?'
+        params = [as_of]
+        if start is not None:
+            query += ' AND event_date > ?'
+            params.append(start)
+        for seq, event_date, event_type, tag, payload in self._conn.execute(query + ' ORDER BY event_date, seq', params):
+            states[tag] = apply_event(states.get(tag), event_type, event_date, json.loads(payload), seq)
+        return states
+
+    def state_as_of(self, as_of, include_disposed=False):
+        """السجل كما كان في تاريخ معين"""
+        with self._lock:
+            states = self._state_as_of(_iso_date(as_of))
+        frame = pd.DataFrame([dict(state, tag=tag) for tag, state in states.items()], columns=STATE_COLUMNS)
+        if not include_disposed:
+            frame = frame[frame['status'] == 'active']
+        return frame.reset_index(drop=True)
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+"""
+الفهرس المكاني - نظام إدارة الأصول الثابتة
+تُحلَّل الإحداثيات مرة واحدة إلى مصفوفات عشرية، ويُبنى فهرس شبكي
+للإجابة عن استعلامات القرب والمستطيل، مع تجميعات مسبقة لبلاطات الخريطة.
+"""
+import math
+
+import numpy as np
+import pandas as pd
+
+import config
+
+EARTH_RADIUS_KM = 6371.0088
+
+_DECIMAL_PATTERN = r'^\s*(-?\d+(?:\.\d+)?)\s*[,،]\s*(-?\d+(?:\.\d+)?)\s*$'
+_DMS_PATTERN = (r'^\s*(\d+)\s*°\s*(\d+)\s*\'\s*([\d.]+)\s*"\s*([NS])\s*'
+                r'(\d+)\s*°\s*(\d+)\s*\'\s*([\d.]+)\s*"\s*([EW])\s*$')
+
+
+def parse_coordinates(series):
+    """تحويل نصوص الإحداثيات (عشرية أو درجات/دقائق/ثوانٍ) إلى مصفوفتي lat و lon"""
+    # تحليل القيم المميزة فقط ثم نشرها على الصفوف
+    codes, uniques = pd.factorize(series.astype('string').fillna(''), sort=False)
+    text = pd.Series(uniques, dtype='string')
+    lat = np.full(len(text), np.nan)
+    lon = np.full(len(text), np.nan)
+
+    decimal = text.str.extract(_DECIMAL_PATTERN)
+    found = decimal[0].notna().to_numpy()
+    lat[found] = decimal.loc[found, 0].astype(float).to_numpy()
+    lon[found] = decimal.loc[found, 1].astype(float).to_numpy()
+
+    dms = text.str.extract(_DMS_PATTERN)
+    found = dms[0].notna().to_numpy()
+    if found.any():
+        part = dms[found]
+        lat_value = part[0].astype(float) + part[1].astype(float) / 60 + part[2].astype(float) / 3600
+        lon_value = part[4].astype(float) + part[5].astype(float) / 60 + part[6].astype(float) / 3600
+        lat[found] = np.where(part[3] == 'S', -lat_value, lat_value)
+        lon[found] = np.where(part[7] == 'W', -lon_value, lon_value)
+
+    invalid = (np.abs(lat) > 90) | (np.abs(lon) > 180)
+    lat[invalid] = np.nan
+    lon[invalid] = np.nan
+    lat_rows = np.where(codes >= 0, lat[codes], np.nan)
+    lon_rows = np.where(codes >= 0, lon[codes], np.nan)
+    return lat_rows, lon_rows
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """المسافة على سطح الأرض بالكيلومتر (متجهية)"""
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+class GeoIndex:
+    """فهرس شبكي على الإحداثيات مع بلاطات مجمّعة لعدة مستويات تكبير"""
+
+    def __init__(self, df, cell_degrees=None, zoom_levels=None, version=None):
+        geo = config.GEO_CONFIG
+        self.cell_degrees = cell_degrees or geo['CELL_DEGREES']
+        self.version = version
+        self.index = df.index
+        self.lat, self.lon = parse_coordinates(df[config.COLUMN_MAPPING['coordinates']])
+        cost_col = config.COLUMN_MAPPING['cost']
+        self.cost = (pd.to_numeric(df[cost_col], errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+                     if cost_col in df.columns else np.zeros(len(df)))
+        self.valid = ~np.isnan(self.lat)
+        self._build_grid()
+        self.tiles = {zoom: self._aggregate_tiles(zoom) for zoom in (zoom_levels or geo['ZOOM_LEVELS'])}
+
+    # -------------------------------------------------
+    # بناء الشبكة
+    # -------------------------------------------------
+    def _cell_keys(self, lat, lon):
+        return np.floor(lat / self.cell_degrees).astype('int64'), np.floor(lon / self.cell_degrees).astype('int64')
+
+    def _build_grid(self):
+        rows = np.flatnonzero(self.valid)
+        cell_lat, cell_lon = self._cell_keys(self.lat[rows], self.lon[rows])
+        order = np.lexsort((cell_lon, cell_lat))
+        self._rows = rows[order]
+        keys = np.stack([cell_lat[order], cell_lon[order]], axis=1)
+        unique_keys, starts = np.unique(keys, axis=0, return_index=True)
+        ends = np.append(starts[1:], len(self._rows))
+        # الخلية -> (بداية، نهاية) داخل self._rows
+        self._cells = {(int(a), int(b)): (s, e) for (a, b), s, e in zip(unique_keys, starts, ends)}
+
+    def _candidates(self, min_lat, min_lon, max_lat, max_lon):
+        lat_lo, lon_lo = self._cell_keys(np.array(min_lat), np.array(min_lon))
+        lat_hi, lon_hi = self._cell_keys(np.array(max_lat), np.array(max_lon))
+        span = (lat_hi - lat_lo + 1) * (lon_hi - lon_lo + 1)
+        if span > len(self._cells):
+            # مستطيل واسع: المرور على الخلايا الموجودة أرخص من تعداد الشبكة
+            slices = [bounds for (a, b), bounds in self._cells.items()
+                      if lat_lo <= a <= lat_hi and lon_lo <= b <= lon_hi]
+        else:
+            slices = [self._cells[(a, b)]
+                      for a in range(int(lat_lo), int(lat_hi) + 1)
+                      for b in range(int(lon_lo), int(lon_hi) + 1) if (a, b) in self._cells]
+        if not slices:
+            return np.array([], dtype='int64')
+        return np.concatenate([self._rows[s:e] for s, e in slices])
+
+    # -------------------------------------------------
+    # الاستعلامات
+    # -------------------------------------------------
+    def within_radius(self, lat, lon, radius_km):
+        """مواقع الصفوف ضمن radius_km من النقطة، مع المسافات، مرتبة بالأقرب"""
+        dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+        dlon = dlat / max(math.cos(math.radians(lat)), 1e-6)
+        rows = self._candidates(lat - dlat, lon - dlon, lat + dlat, lon + dlon)
+        distances = haversine_km(lat, lon, self.lat[rows], self.lon[rows])
+        keep = distances <= radius_km
+        rows, distances = rows[keep], distances[keep]
+        order = np.argsort(distances, kind='stable')
+        return rows[order], distances[order]
+
+    def within_bbox(self, min_lat, min_lon, max_lat, max_lon):
+        """مواقع الصفوف داخل مستطيل إحداثيات"""
+        rows = self._candidates(min_lat, min_lon, max_lat, max_lon)
+        lat, lon = self.lat[rows], self.lon[rows]
+        keep = (lat >= min_lat) & (lat <= max_lat) & (lon >= min_lon) & (lon <= max_lon)
+        return np.sort(rows[keep])
+
+    # -------------------------------------------------
+    # بلاطات الخريطة المجمّعة
+    # -------------------------------------------------
+    def _aggregate_tiles(self, zoom):
+        """عدد/تكلفة/مركز الأصول في كل بلاطة (إسقاط Web Mercator)"""
+        rows = np.flatnonzero(self.valid)
+        lat, lon = self.lat[rows], self.lon[rows]
+        n = 2 ** zoom
+        x = np.clip(((lon + 180) / 360 * n).astype('int64'), 0, n - 1)
+        lat_rad = np.radians(np.clip(lat, -85.0511, 85.0511))
+        y = np.clip(((1 - np.log(np.tan(lat_rad) + 1 / np.cos(lat_rad)) / np.pi) / 2 * n).astype('int64'), 0, n - 1)
+        tile_ids, inverse = np.unique(x * n + y, return_inverse=True)
+        count = np.bincount(inverse)
+        return pd.DataFrame({
+            'zoom': zoom,
+            'x': tile_ids // n,
+            'y': tile_ids % n,
+            'lat': np.bincount(inverse, weights=lat) / count,
+            'lon': np.bincount(inverse, weights=lon) / count,
+            'Count': count,
+            'Cost': np.bincount(inverse, weights=np.nan_to_num(self.cost[rows])),
+        })
+
+    def clusters(self, zoom, bbox=None):
+        """بلاطات أقرب مستوى تكبير مُجمَّع مسبقاً، مقيدة بمستطيل اختياري"""
+        zoom = min(self.tiles, key=lambda z: abs(z - zoom))
+        tiles = self.tiles[zoom]
+        if bbox is not None:
+            min_lat, min_lon, max_lat, max_lon = bbox
+            tiles = tiles[tiles['lat'].between(min_lat, max_lat) & tiles['lon'].between(min_lon, max_lon)]
+        return tiles
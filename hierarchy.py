@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+"""
+تجميعات التصنيف الهرمي - نظام إدارة الأصول الثابتة
+تُبنى مرة واحدة لكل إصدار من البيانات: تجميع واحد على أدق مستوى
+ثم تُطوى المجاميع لأعلى، فيصبح التعمق والصعود مجرد بحث في قاموس.
+"""
+import pandas as pd
+
+import config
+
+# أعمدة القيم ومفاتيح COLUMN_MAPPING المقابلة
+VALUE_KEYS = ('cost', 'net_book_value', 'depreciation_amount')
+
+# لكل مستوى: (مفتاح الرمز، مفتاح الاسم الإنجليزي، مفتاح الاسم العربي)
+LEVEL_KEYS = {
+    'accounting_group': ('accounting_group_code', 'accounting_group_english', 'accounting_group_arabic'),
+    'level1': ('level1_code', 'level1_english', 'level1_arabic'),
+    'level2': ('level2_code', 'level2_english', 'level2_arabic'),
+    'level3': ('level3_code', 'level3_english', 'level3_arabic'),
+}
+
+UNKNOWN = 'غير محدد'
+
+
+def _normalize_codes(series):
+    """توحيد الرموز كنصوص ('2' و 2 و '02' تصبح '02')"""
+    codes = series.astype('string').fillna('').str.strip().str.replace(r'\.0$', '', regex=True)
+    codes = codes.where(~codes.isin(['', 'nan', 'None', 'Not Available']), UNKNOWN)
+    return codes.where(~codes.str.fullmatch(r'\d'), codes.str.zfill(2)).astype(object)
+
+
+class CategoryHierarchy:
+    """شجرة التصنيف مع مجاميع التكلفة والقيمة الدفترية والإهلاك والعدد لكل عقدة"""
+
+    def __init__(self, df, levels=None, version=None):
+        self.levels = [lvl for lvl in (levels or config.HIERARCHY_CONFIG['LEVELS'])
+                       if config.COLUMN_MAPPING[LEVEL_KEYS[lvl][0]] in df.columns]
+        self.version = version
+        self.nodes = {}      # المسار (صف رموز) -> مجاميع العقدة
+        self._children = {}  # المسار -> مسارات الأبناء مرتبة حسب التكلفة
+        self._build(df)
+
+    def _build(self, df):
+        value_cols = [config.COLUMN_MAPPING[k] for k in VALUE_KEYS if config.COLUMN_MAPPING[k] in df.columns]
+        code_cols = [f'_code_{lvl}' for lvl in self.levels]
+
+        frame = pd.DataFrame(index=df.index)
+        for lvl, col in zip(self.levels, code_cols):
+            frame[col] = _normalize_codes(df[config.COLUMN_MAPPING[LEVEL_KEYS[lvl][0]]])
+        for col in value_cols:
+            frame[col] = pd.to_numeric(df[col], errors='coerce')
+        frame['Count'] = 1
+
+        # 1) تجميع واحد على أدق مستوى
+        if code_cols:
+            leaves = frame.groupby(code_cols, dropna=False, sort=False).sum()
+        else:
+            leaves = frame[value_cols + ['Count']].sum().to_frame().T
+        names = self._collect_names(df, frame, code_cols)
+
+        # 2) طي المجاميع لأعلى: كل مستوى يُحسب من المستوى الأدق (جدول صغير)
+        self.nodes[()] = self._node((), leaves.sum(), UNKNOWN, UNKNOWN)
+        self.nodes[()]['name_en'] = self.nodes[()]['name_ar'] = 'الكل'
+        for depth in range(1, len(code_cols) + 1):
+            rolled = leaves.groupby(level=list(range(depth)), sort=False).sum() if depth < len(code_cols) else leaves
+            for key, row in rolled.iterrows():
+                path = key if isinstance(key, tuple) else (key,)
+                name_en, name_ar = names[depth - 1].get(path[-1] if depth == 1 else path, (path[-1], path[-1]))
+                self.nodes[path] = self._node(path, row, name_en, name_ar)
+                self._children.setdefault(path[:-1], []).append(path)
+
+        for parent, children in self._children.items():
+            children.sort(key=lambda p: self.nodes[p].get('Cost', 0), reverse=True)
+
+    def _collect_names(self, df, frame, code_cols):
+        """الاسم الإنجليزي والعربي لكل عقدة (أول قيمة ظاهرة ثم ASSET_CATEGORIES)"""
+        names = []
+        for depth, lvl in enumerate(self.levels, start=1):
+            _, en_key, ar_key = LEVEL_KEYS[lvl]
+            en_col, ar_col = config.COLUMN_MAPPING[en_key], config.COLUMN_MAPPING[ar_key]
+            keys = code_cols[:depth] if depth > 1 else code_cols[0]
+            labels = pd.DataFrame({
+                'en': df[en_col].astype('string').fillna('') if en_col in df.columns else '',
+                'ar': df[ar_col].astype('string').fillna('') if ar_col in df.columns else '',
+            }, index=df.index).join(frame[code_cols[:depth]])
+            first = labels.groupby(keys, sort=False)[['en', 'ar']].first()
+            level_names = {}
+            for key, en, ar in zip(first.index, first['en'], first['ar']):
+                # اسم غائب في الملف يُكمَّل من ASSET_CATEGORIES حسب رموز مسار العقدة نفسها
+                if not (en and ar):
+                    catalog_en, catalog_ar = self._catalog_name(lvl, key if isinstance(key, tuple) else (key,))
+                    en, ar = en or catalog_en, ar or catalog_ar
+                level_names[key] = (en, ar)
+            names.append(level_names)
+        return names
+
+    def _catalog_name(self, lvl, path):
+        """(الاسم الإنجليزي، العربي) لعقدة level1 أو level2 من ASSET_CATEGORIES، أو ('', '')"""
+        codes = dict(zip(self.levels, path))
+        category = config.ASSET_CATEGORIES.get(codes.get('level1'), {}) if lvl in ('level1', 'level2') else {}
+        if lvl == 'level2':
+            category = category.get('subcategories', {}).get(codes.get('level2'), {})
+        return category.get('name_en', ''), category.get('name_ar', '')
+
+    @staticmethod
+    def _node(path, row, name_en, name_ar):
+        node = {col: float(row[col]) for col in row.index if col != 'Count'}
+        node['Count'] = int(row['Count'])
+        node['Depreciation_Rate'] = (round(node['Depreciation amount'] / node['Cost'] * 100, 2)
+                                     if node.get('Cost') and 'Depreciation amount' in node else 0.0)
+        node.update({'path': path, 'depth': len(path), 'name_en': name_en, 'name_ar': name_ar})
+        return node
+
+    # -------------------------------------------------
+    # التعمق والصعود
+    # -------------------------------------------------
+    def node(self, path=()):
+        """مجاميع عقدة محددة بمسار رموزها"""
+        return self.nodes.get(tuple(path))
+
+    def parent(self, path):
+        """الصعود مستوى واحداً"""
+        path = tuple(path)
+        return path[:-1] if path else None
+
+    def children(self, path=()):
+        """التعمق: جدول أبناء العقدة مرتبين حسب التكلفة"""
+        rows = [self.nodes[p] for p in self._children.get(tuple(path), [])]
+        if not rows:
+            return pd.DataFrame()
+        out = pd.DataFrame(rows).set_index('name_en')
+        return out.drop(columns=['path', 'depth'])
+
+    def level(self, depth):
+        """كل العقد على عمق محدد (1 = أعلى مستوى)"""
+        rows = [node for node in self.nodes.values() if node['depth'] == depth]
+        return pd.DataFrame(rows)
+
+    def to_frame(self, value='Cost'):
+        """جدول مسطح (id/parent/label) لرسوم treemap وsunburst"""
+        rows = []
+        for path, node in self.nodes.items():
+            if not path:
+                continue
+            rows.append({
+                'id': '/'.join(path),
+                'parent': '/'.join(path[:-1]),
+                'label': node['name_en'] if node['name_en'] not in ('', 'nan') else path[-1],
+                'value': node.get(value, 0.0),
+                'Count': node['Count'],
+            })
+        return pd.DataFrame(rows)
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+قياس زمن الاستيراد - نظام إدارة الأصول الثابتة
+يستورد كل وحدة في عملية بايثون جديدة مع ‎-X importtime‎ ويقارن الزمن التراكمي
+بالميزانية في IMPORT_BUDGET_CONFIG، ويتحقق أن الوحدات المؤجلة (مثل plotly)
+لا تُستورد في مسار بدء التشغيل.
+
+التشغيل: python import_benchmark.py   (رمز الخروج 1 عند تجاوز الميزانية)
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+import config
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def import_profile(module):
+    """(الوحدة، الزمن الذاتي، الزمن التراكمي) بالميكروثانية لكل وحدة تُستورد"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"فشل استيراد {module}:\n{result.stderr[-2000:]}")
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def measure(module, runs):
+    """وسيط الزمن التراكمي (ملي ثانية) عبر عدة تشغيلات، مع ملف آخر تشغيل"""
+    times, profile = [], []
+    for _ in range(runs):
+        profile = import_profile(module)
+        times.append(next(cum for name, _, cum in profile if name == module) / 1000)
+    return sorted(times)[len(times) // 2], profile
+
+
+def main():
+    budget_config = config.IMPORT_BUDGET_CONFIG
+    parser = argparse.ArgumentParser(description='ميزانية زمن الاستيراد لوحدات النظام')
+    parser.add_argument('modules', nargs='*', help='الافتراضي: كل الوحدات في BUDGETS_MS')
+    parser.add_argument('--runs', type=int, default=budget_config['RUNS'])
+    args = parser.parse_args()
+
+    failures = []
+    for module in args.modules or list(budget_config['BUDGETS_MS']):
+        budget = budget_config['BUDGETS_MS'].get(module)
+        elapsed, profile = measure(module, args.runs)
+        status = 'OK' if budget is None or elapsed <= budget else 'OVER'
+        print(f"{module:<24} {elapsed:8.1f} ms  (الميزانية: {budget if budget is not None else '-'} ms)  {status}")
+        if status == 'OVER':
+            failures.append(f"{module}: {elapsed:.1f} ms > {budget} ms")
+
+        imported = {name for name, _, _ in profile}
+        deferred = [name for name in budget_config['DEFERRED_MODULES'] if name in imported and name != module]
+        if deferred:
+            failures.append(f"{module}: يستورد وحدات مؤجلة {deferred}")
+
+        for name, self_us, _ in sorted(profile, key=lambda row: -row[1])[:budget_config['TOP']]:
+            print(f"    {self_us / 1000:8.1f} ms  {name}")
+
+    for failure in failures:
+        print(f"❌ {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+"""
+مطابقة الجرد الفعلي - نظام إدارة الأصول الثابتة
+قراءة ملفات المسح الميداني (CSV: رقم البطاقة، المبنى، الغرفة، وقت المسح) على
+دفعات بأي حجم، وربطها بالتجزئة مع فهرس أرقام البطاقات في السجل، ثم تصنيف كل
+أصل (موجود، مفقود، في غير موقعه) والمسوحات غير المسجلة، مع ملخص لكل مدينة
+وقسم. إعادة المسح تحدِّث حالة الأصول الممسوحة فقط.
+
+التشغيل: python inventory_reconciliation.py scans1.csv scans2.csv --output inventory.xlsx
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+import config
+
+TAG = config.COLUMN_MAPPING['tag_number']
+BUILDING = config.COLUMN_MAPPING['building_number']
+ROOM = config.COLUMN_MAPPING['room_number']
+COST = config.COLUMN_MAPPING['cost']
+
+
+def normalize_codes(values):
+    """توحيد أرقام البطاقات والمواقع: نص بلا فراغات وبأحرف كبيرة، و12.0 = 12"""
+    codes = pd.Series(values).astype('string').str.strip().str.upper()
+    return codes.str.replace(r'\.0+$', '', regex=True).replace('', pd.NA)
+
+
+def _object_array(codes):
+    """مصفوفة object بقيمة None للمفقود (مقارنة عنصرية سريعة مع numpy)"""
+    return codes.astype(object).where(codes.notna(), None).to_numpy()
+
+
+class InventoryReconciliation:
+    """حالة الجرد لسجل واحد: آخر مسح لكل أصل والمسوحات غير المسجلة"""
+
+    def __init__(self, df, version=None):
+        self.df = df
+        self.version = version
+        self.labels = config.INVENTORY_CONFIG['STATUS_LABELS']
+
+        # فهرس التجزئة: رقم البطاقة -> موقع الصف (أول ظهور عند التكرار)
+        tags = normalize_codes(df[TAG].to_numpy()) if TAG in df.columns else pd.Series(pd.NA, index=range(len(df)))
+        valid = (tags.notna() & ~tags.duplicated()).to_numpy()
+        self._positions = np.flatnonzero(valid)
+        self._index = pd.Index(tags[valid].to_numpy(dtype=object))
+
+        self._register_location = [
+            _object_array(normalize_codes(df[column].to_numpy())) if column in df.columns
+            else np.full(len(df), None, dtype=object)
+            for column in (BUILDING, ROOM)
+        ]
+
+        n = len(df)
+        self.scanned = np.zeros(n, dtype=bool)
+        self.scan_count = np.zeros(n, dtype=np.int32)
+        self.scan_time = np.full(n, np.datetime64('NaT'), dtype='datetime64[ns]')
+        self.scan_location = [np.full(n, None, dtype=object), np.full(n, None, dtype=object)]
+        self.unexpected = {}  # رقم البطاقة -> (المبنى، الغرفة، الوقت، عدد المسوحات)
+        self.files = {}  # توقيع الملف -> عدد صفوفه (لتجاهل إعادة إدخال نفس الملف)
+
+    # -------------------------------------------------
+    # إدخال المسوحات
+    # -------------------------------------------------
+    def ingest(self, source, chunksize=None):
+        """إدخال ملف مسح (مسار أو إطار)، ويعيد عدد الصفوف المقروءة"""
+        signature = None
+        if isinstance(source, pd.DataFrame):
+            chunks = [source]
+        else:
+            stat = os.stat(source)
+            signature = (os.path.abspath(source), stat.st_mtime_ns, stat.st_size)
+            if signature in self.files:
+                return self.files[signature]
+            chunks = pd.read_csv(source, dtype=str, chunksize=chunksize or config.INVENTORY_CONFIG['CHUNK_SIZE'])
+
+        rows = 0
+        for chunk in chunks:
+            self._apply(chunk)
+            rows += len(chunk)
+        if signature is not None:
+            self.files[signature] = rows
+        return rows
+
+    def _apply(self, chunk):
+        """دمج دفعة مسح في الحالة: المسح الأحدث لكل بطاقة هو المعتمد"""
+        columns = config.INVENTORY_CONFIG['SCAN_COLUMNS']
+        empty = pd.Series(pd.NA, index=chunk.index)
+        scans = pd.DataFrame({
+            'tag': normalize_codes(chunk[columns['tag']].to_numpy()),
+            'building': normalize_codes(chunk.get(columns['building'], empty).to_numpy()),
+            'room': normalize_codes(chunk.get(columns['room'], empty).to_numpy()),
+            'time': pd.to_datetime(chunk.get(columns['timestamp'], empty), errors='coerce', format='mixed').to_numpy(),
+        })
+        scans = scans[scans['tag'].notna()]
+        counts = scans['tag'].value_counts()
+        # ترتيب ثابت بالوقت (المجهول أولاً) ثم آخر مسح لكل بطاقة داخل الدفعة
+        scans = scans.sort_values('time', kind='stable', na_position='first').drop_duplicates('tag', keep='last')
+
+        hits = self._index.get_indexer(scans['tag'].to_numpy(dtype=object))
+        known = hits >= 0
+        matched = scans[known]
+        positions = self._positions[hits[known]]
+        times = matched['time'].to_numpy(dtype='datetime64[ns]')
+        current = self.scan_time[positions]
+        newer = np.isnat(times) | np.isnat(current) | (times >= current)
+        positions, matched, times = positions[newer], matched[newer], times[newer]
+
+        self.scanned[positions] = True
+        self.scan_time[positions] = times
+        self.scan_location[0][positions] = _object_array(matched['building'])
+        self.scan_location[1][positions] = _object_array(matched['room'])
+        np.add.at(self.scan_count, self._positions[hits[known]], counts.reindex(scans['tag'][known]).to_numpy())
+
+        for tag, building, room, time in scans[~known].itertuples(index=False):
+            previous = self.unexpected.get(tag)
+            total = int(counts[tag]) + (previous[3] if previous else 0)
+            if previous is None or pd.isna(time) or pd.isna(previous[2]) or time >= previous[2]:
+                self.unexpected[tag] = (building, room, time, total)
+            else:
+                self.unexpected[tag] = previous[:3] + (total,)
+
+    # -------------------------------------------------
+    # النتائج
+    # -------------------------------------------------
+    def statuses(self):
+        """حالة الجرد لكل أصل في السجل"""
+        wrong = np.zeros(len(self.df), dtype=bool)
+        for registered, scanned in zip(self._register_location, self.scan_location):
+            # يُقارن الموقع فقط إن كان مسجلاً وممسوحاً
+            present = (registered != None) & (scanned != None)  # noqa: E711
+            wrong |= present & (registered != scanned)
+        return np.select(
+            [~self.scanned, wrong],
+            [self.labels['missing'], self.labels['wrong_location']],
+            default=self.labels['found']
+        )
+
+    def assets(self, status=None):
+        """أصول السجل مع موقع المسح وحالة الجرد (أو حالة واحدة فقط)"""
+        columns = [config.COLUMN_MAPPING[key] for key in config.INVENTORY_CONFIG['REPORT_COLUMNS']]
+        result = self.df[[c for c in columns if c in self.df.columns]].copy()
+        result['Scan_Building'] = self.scan_location[0]
+        result['Scan_Room'] = self.scan_location[1]
+        result['Scan_Time'] = self.scan_time
+        result['Scan_Count'] = self.scan_count
+        result['Inventory_Status'] = self.statuses()
+        if status is not None:
+            result = result[result['Inventory_Status'] == self.labels[status]]
+        return result
+
+    def unexpected_scans(self):
+        """المسوحات التي لا يقابلها أصل في السجل"""
+        return pd.DataFrame(
+            [(tag,) + values for tag, values in self.unexpected.items()],
+            columns=['Tag', 'Scan_Building', 'Scan_Room', 'Scan_Time', 'Scan_Count']
+        )
+
+    def summary(self, by='city'):
+        """عدد الأصول لكل حالة وتكلفة المفقود لكل قيمة في البُعد (مدينة أو قسم)"""
+        column = config.COLUMN_MAPPING[by]
+        statuses = self.statuses()
+        groups = self.df[column].astype(object).fillna('غير محدد').to_numpy() if column in self.df.columns \
+            else np.full(len(self.df), 'غير محدد', dtype=object)
+        table = pd.crosstab(groups, statuses)
+        if COST in self.df.columns:
+            missing = statuses == self.labels['missing']
+            table['Missing_Cost'] = pd.Series(self.df[COST].to_numpy()[missing]).groupby(groups[missing]).sum()
+        table = table.fillna(0)
+        table.index.name = column
+        table.columns.name = None
+        return table.sort_values(self.labels['missing'], ascending=False) if self.labels['missing'] in table else table
+
+    def totals(self):
+        """عدد الأصول لكل حالة، مع عدد المسوحات غير المسجلة"""
+        counts = pd.Series(self.statuses()).value_counts().to_dict()
+        counts[self.labels['unexpected']] = len(self.unexpected)
+        return {label: int(counts.get(label, 0)) for label in self.labels.values()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='مطابقة ملفات المسح الميداني مع سجل الأصول')
+    parser.add_argument('scans', nargs='+', help='ملفات المسح CSV (الأحدث آخراً)')
+    parser.add_argument('--register', default=config.APP_CONFIG['DATA_FILE'])
+    parser.add_argument('--sheet')
+    parser.add_argument('--output', help='حفظ التقرير في ملف Excel')
+    args = parser.parse_args()
+
+    import snapshot_diff
+
+    df, version = snapshot_diff.load_snapshot(args.register, args.sheet)
+    reconciliation = InventoryReconciliation(df, version)
+    for path in args.scans:
+        print(f"{path}: {reconciliation.ingest(path):,} صف")
+    print(reconciliation.totals())
+    for key in config.INVENTORY_CONFIG['GROUP_BY']:
+        print()
+        print(reconciliation.summary(key).head(10).to_string())
+
+    if args.output:
+        with pd.ExcelWriter(args.output) as writer:
+            for key in config.INVENTORY_CONFIG['GROUP_BY']:
+                reconciliation.summary(key).to_excel(writer, sheet_name=f'by_{key}')
+            for status in ('missing', 'wrong_location'):
+                reconciliation.assets(status).to_excel(writer, sheet_name=status, index=False)
+            reconciliation.unexpected_scans().to_excel(writer, sheet_name='unexpected', index=False)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+اختبار الحمل - نظام إدارة الأصول الثابتة
+تشغيل N جلسة متزامنة للوحة التحكم دون متصفح (Streamlit AppTest)، تتنقل كل
+منها بين أقسام الشريط الجانبي وتنفذ عمليات بحث، مع قياس مئينات زمن الاستجابة
+لكل قسم وذاكرة العملية (RSS) واستهلاك المعالج.
+
+التشغيل: python load_test.py --sessions 20 --iterations 12
+"""
+import argparse
+import os
+import random
+import resource
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+from streamlit.testing.v1 import AppTest
+
+import config
+
+APP_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app.py')
+
+
+def current_rss_mb():
+    """ذاكرة العملية الحالية بالميغابايت (من ‎/proc‎، وإلا أقصى قيمة مسجلة)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024 ** 2
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def cpu_seconds():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+class ResourceSampler:
+    """أخذ عينات RSS على خيط خلفي طوال الاختبار"""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.samples = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.samples.append(current_rss_mb())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def run_session(session_id, iterations, seed, think_time, timeout):
+    """جلسة واحدة: تحميل أولي ثم تنقل عشوائي بين الأقسام، ويعيد سجل الأزمنة"""
+    rng = random.Random(seed + session_id)
+    search_terms = config.LOAD_TEST_CONFIG['SEARCH_TERMS']
+    records = []
+
+    def timed(section, action):
+        start = time.perf_counter()
+        at = action()
+        records.append({
+            'session': session_id,
+            'section': section,
+            'latency': time.perf_counter() - start,
+            'errors': len(at.exception) + len(at.error),
+        })
+        return at
+
+    at = AppTest.from_file(APP_FILE, default_timeout=timeout)
+    timed('التحميل الأولي', at.run)
+    sections = list(at.sidebar.selectbox[0].options)
+
+    for _ in range(iterations):
+        section = rng.choice(sections)
+        timed(section, lambda: at.sidebar.selectbox[0].select(section).run())
+        if at.text_input:
+            # قسم البحث: تنفيذ بحث بكلمة عشوائية من القائمة
+            term = rng.choice(search_terms)
+            timed(f'{section} - تنفيذ البحث', lambda: at.text_input[0].input(term).run())
+        if think_time:
+            time.sleep(rng.uniform(0, think_time))
+    return records
+
+
+def summarize(records, percentiles):
+    """مئينات زمن الاستجابة (بالملي ثانية) لكل قسم"""
+    df = pd.DataFrame(records)
+    rows = []
+    for section, group in df.groupby('section', sort=False):
+        latency = group['latency'].to_numpy() * 1000
+        row = {'القسم': section, 'الطلبات': len(group), 'الأخطاء': int(group['errors'].sum())}
+        row.update({f'p{p}': round(v, 1) for p, v in zip(percentiles, np.percentile(latency, percentiles))})
+        row['max'] = round(latency.max(), 1)
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def main():
+    load_config = config.LOAD_TEST_CONFIG
+    parser = argparse.ArgumentParser(description='اختبار حمل للوحة تحكم الأصول الثابتة')
+    parser.add_argument('--sessions', type=int, default=load_config['SESSIONS'])
+    parser.add_argument('--iterations', type=int, default=load_config['ITERATIONS'])
+    parser.add_argument('--think-time', type=float, default=load_config['THINK_TIME'])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='حفظ السجل الكامل بصيغة CSV')
+    args = parser.parse_args()
+
+    rss_before, cpu_before, wall = current_rss_mb(), cpu_seconds(), time.perf_counter()
+    with ResourceSampler(load_config['SAMPLE_INTERVAL']) as sampler:
+        with ThreadPoolExecutor(max_workers=args.sessions, thread_name_prefix='session') as pool:
+            futures = [pool.submit(run_session, i, args.iterations, args.seed, args.think_time,
+                                   load_config['RUN_TIMEOUT']) for i in range(args.sessions)]
+            records = [record for future in futures for record in future.result()]
+    wall = time.perf_counter() - wall
+    cpu = cpu_seconds() - cpu_before
+
+    print(summarize(records, load_config['PERCENTILES']).to_string(index=False))
+    print()
+    print(f"الجلسات: {args.sessions} | الطلبات: {len(records)} | المدة: {wall:.1f} ث | "
+          f"الإنتاجية: {len(records) / wall:.1f} طلب/ث")
+    print(f"RSS: قبل {rss_before:.0f} MB | أقصى {max(sampler.samples):.0f} MB | "
+          f"متوسط {np.mean(sampler.samples):.0f} MB")
+    print(f"المعالج: {cpu:.1f} ث ({cpu / wall * 100:.0f}% من نواة واحدة)")
+
+    if args.output:
+        pd.DataFrame(records).to_csv(args.output, index=False, encoding='utf-8-sig')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""
+نواة التحويل الرقمي - نظام إدارة الأصول الثابتة
+تحويل أعمدة المبالغ إلى float64 مباشرة: تمريرة سريعة للخلايا الرقمية أصلاً،
+ثم تنظيف نصي للخلايا المتبقية فقط (فواصل الآلاف، الأرقام العربية الهندية،
+رموز الريال، الأقواس للسالب) مع عدّ الخلايا غير القابلة للتحويل.
+"""
+import numpy as np
+import pandas as pd
+
+import config
+
+# الأرقام العربية الهندية والفارسية وفواصلها -> ASCII
+_DIGITS = str.maketrans({
+    **{chr(0x0660 + i): str(i) for i in range(10)},
+    **{chr(0x06F0 + i): str(i) for i in range(10)},
+    '٫': '.',   # الفاصلة العشرية العربية
+    '٬': '',    # فاصل الآلاف العربي
+    '،': '',    # الفاصلة العربية
+    '−': '-',   # علامة الطرح
+})
+
+# رموز العملة والفراغات التي تُحذف قبل التحويل
+_NOISE = r'(?i)[\s ,﷼]|SAR|ر\.?\s?س\.?|ريال'
+
+
+def _clean_strings(text):
+    """تنظيف نصوص المبالغ المتبقية بعد التمريرة السريعة"""
+    text = text.str.translate(_DIGITS).str.replace(_NOISE, '', regex=True)
+    # -123 أو (123) أو 123- تعني قيمة سالبة
+    negative = text.str.startswith('-') | text.str.fullmatch(r'\(.*\)') | text.str.endswith('-')
+    text = text.str.strip('()-').where(~negative, '-' + text.str.strip('()-'))
+    return text
+
+
+def coerce_numeric(series, null_tokens=None):
+    """تحويل عمود إلى مصفوفة float64 مع عدد الخلايا غير القابلة للتحويل"""
+    if pd.api.types.is_numeric_dtype(series.dtype) and not pd.api.types.is_bool_dtype(series.dtype):
+        return series.to_numpy(dtype='float64', na_value=np.nan), 0
+
+    # 1) تمريرة سريعة: الأرقام الفعلية والنصوص الرقمية النظيفة
+    out = np.array(pd.to_numeric(series, errors='coerce'), dtype='float64')
+
+    # 2) الخلايا غير الفارغة التي فشلت فقط تمر على التنظيف النصي
+    pending = np.isnan(out) & series.notna().to_numpy()
+    if not pending.any():
+        return out, 0
+    text = series[pending].astype(str).str.strip()
+    null_tokens = config.COLUMN_TYPES['null_tokens'] if null_tokens is None else null_tokens
+    blank = (text == '') | text.isin(null_tokens)
+    parsed = pd.to_numeric(_clean_strings(text[~blank]), errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+
+    positions = np.flatnonzero(pending)[~blank.to_numpy()]
+    out[positions] = parsed
+    return out, int(np.isnan(parsed).sum())
+
+
+def coerce_frame(df, columns, null_tokens=None):
+    """تحويل عدة أعمدة في مكانها، ويعيد عدد الخلايا غير القابلة للتحويل لكل عمود"""
+    issues = {}
+    for col in columns:
+        if col in df.columns:
+            values, bad = coerce_numeric(df[col], null_tokens)
+            df[col] = values
+            if bad:
+                issues[col] = bad
+    return issues
@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""
+مكعب الفترات المالية - نظام إدارة الأصول الثابتة
+جدول الحركة (رصيد افتتاحي، إضافات، إهلاك، قيمة دفترية ختامية) لكل شهر مالي
+ولكل تصنيف/مدينة، مخزّن كمجاميع تراكمية فيُجاب أي نطاق فترات في زمن ثابت.
+"""
+import numpy as np
+import pandas as pd
+
+import config
+
+# عدد الأشهر في كل فترة من فترات ANALYSIS_CONFIG['REPORT_PERIODS']
+PERIOD_MONTHS = {'شهري': 1, 'ربع سنوي': 3, 'نصف سنوي': 6, 'سنوي': 12}
+
+UNKNOWN = 'غير محدد'
+
+
+class PeriodCube:
+    """مجاميع تراكمية شهرية للإضافات والإهلاك، إجمالاً ولكل بُعد"""
+
+    def __init__(self, df, dimensions=None, as_of=None, version=None):
+        self.version = version
+        self.fiscal_start_month = int(config.ENTITY_CONFIG['FISCAL_YEAR_START'].split('-')[0])
+        if dimensions is None:
+            dimensions = {key: config.COLUMN_MAPPING[key] for key in config.PERIOD_CUBE_CONFIG['DIMENSIONS']}
+
+        dates = pd.to_datetime(df[config.COLUMN_MAPPING['date_in_service']], errors='coerce')
+        cost = self._numeric(df, 'cost')
+        residual = np.nan_to_num(self._numeric(df, 'residual_value'))
+        life = self._numeric(df, 'useful_life')
+        valid = (dates.notna().to_numpy()) & ~np.isnan(cost)
+
+        # 1) أرقام الأشهر نسبةً إلى بداية أول سنة مالية
+        month = np.where(valid, dates.dt.year.fillna(0).to_numpy() * 12 + dates.dt.month.fillna(1).to_numpy() - 1, 0).astype('int64')
+        as_of = pd.Timestamp(as_of) if as_of is not None else pd.Timestamp.now()
+        first = int(month[valid].min()) if valid.any() else as_of.year * 12
+        self.origin = first - ((first - (self.fiscal_start_month - 1)) % 12)
+        last = max(as_of.year * 12 + as_of.month - 1, int(month[valid].max()) if valid.any() else first)
+        self.n_months = ((last - self.origin) // 12 + 1) * 12  # حتى نهاية السنة المالية
+
+        # 2) الإهلاك الشهري بطريقة القسط الثابت من شهر الدخول في الخدمة
+        start = month[valid] - self.origin
+        months_of_life = np.where(life[valid] > 0, np.round(np.nan_to_num(life[valid]) * 12), 0).astype('int64')
+        rate = np.where(months_of_life > 0, (cost[valid] - residual[valid]) / np.maximum(months_of_life, 1), 0.0)
+        end = np.minimum(start + months_of_life, self.n_months)
+        self._start, self._end, self._cost, self._rate = start, end, cost[valid], rate
+
+        # 3) المكعبات: الإجمالي ثم كل بُعد
+        self.cubes = {None: self._build(np.zeros(len(start), dtype='int64'), np.array(['الإجمالي'], dtype=object))}
+        for name, col in dimensions.items():
+            if col in df.columns:
+                codes, labels = pd.factorize(df.loc[valid, col].astype('string').fillna(UNKNOWN), sort=True)
+                self.cubes[name] = self._build(codes, np.asarray(labels, dtype=object))
+
+    @staticmethod
+    def _numeric(df, key):
+        col = config.COLUMN_MAPPING[key]
+        if col not in df.columns:
+            return np.full(len(df), np.nan)
+        return pd.to_numeric(df[col], errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+
+    def _build(self, group, labels):
+        """مجاميع تراكمية [مجموعة، شهر] بعمود صفري أول لاستعلامات النطاق"""
+        n_groups, n = len(labels), self.n_months
+        additions = np.bincount(group * n + self._start, weights=self._cost, minlength=n_groups * n)
+        # مصفوفة فروق: المعدل يبدأ في شهر البداية ويتوقف بعد آخر شهر
+        width = n + 1
+        diff = np.bincount(group * width + self._start, weights=self._rate, minlength=n_groups * width)
+        diff -= np.bincount(group * width + self._end, weights=self._rate, minlength=n_groups * width)
+        monthly_dep = np.cumsum(diff.reshape(n_groups, width), axis=1)[:, :n]
+
+        zeros = np.zeros((n_groups, 1))
+        return {
+            'labels': labels,
+            'cum_additions': np.hstack([zeros, np.cumsum(additions.reshape(n_groups, n), axis=1)]),
+            'cum_depreciation': np.hstack([zeros, np.cumsum(monthly_dep, axis=1)]),
+        }
+
+    # -------------------------------------------------
+    # التقويم المالي
+    # -------------------------------------------------
+    def month_index(self, date):
+        """رقم الشهر داخل المكعب لتاريخ معين"""
+        date = pd.Timestamp(date)
+        return int(np.clip(date.year * 12 + date.month - 1 - self.origin, 0, self.n_months - 1))
+
+    def _labels(self, starts, months):
+        absolute = self.origin + starts
+        fiscal = absolute - (self.fiscal_start_month - 1)
+        year = fiscal // 12 + (1 if self.fiscal_start_month > 1 else 0)
+        position = fiscal % 12
+        if months == 12:
+            return [f"FY{y}" for y in year]
+        if months == 6:
+            return [f"FY{y}-H{p // 6 + 1}" for y, p in zip(year, position)]
+        if months == 3:
+            return [f"FY{y}-Q{p // 3 + 1}" for y, p in zip(year, position)]
+        return [f"FY{y}-M{p + 1:02d}" for y, p in zip(year, position)]
+
+    # -------------------------------------------------
+    # الاستعلامات
+    # -------------------------------------------------
+    def _movement(self, cube, a, b):
+        """حركة النطاق [a, b) من الأشهر لكل مجموعة (زمن ثابت لكل مجموعة)"""
+        cum_add, cum_dep = cube['cum_additions'], cube['cum_depreciation']
+        opening = cum_add[:, a] - cum_dep[:, a]
+        additions = cum_add[:, b] - cum_add[:, a]
+        depreciation = cum_dep[:, b] - cum_dep[:, a]
+        return opening, additions, depreciation, opening + additions - depreciation
+
+    def range_totals(self, start, end, dimension=None):
+        """جدول الحركة بين تاريخين (شاملاً شهر النهاية) لكل مجموعة في البُعد"""
+        cube = self.cubes[dimension]
+        a, b = self.month_index(start), self.month_index(end) + 1
+        opening, additions, depreciation, closing = self._movement(cube, a, b)
+        return pd.DataFrame({
+            'Opening_NBV': opening,
+            'Additions': additions,
+            'Depreciation': depreciation,
+            'Closing_NBV': closing,
+        }, index=pd.Index(cube['labels'], name=dimension or 'total')).round(2)
+
+    def roll_forward(self, period='سنوي', dimension=None, group=None):
+        """جدول الحركة لكل فترة (شهري/ربع سنوي/نصف سنوي/سنوي)"""
+        months = PERIOD_MONTHS.get(period, period)
+        cube = self.cubes[dimension]
+        bounds = np.arange(0, self.n_months + 1, months)
+        a, b = bounds[:-1], bounds[1:]
+        opening, additions, depreciation, closing = self._movement(cube, a, b)
+        labels = self._labels(a, months)
+        period_start = [pd.Timestamp(year=(self.origin + s) // 12, month=(self.origin + s) % 12 + 1, day=1) for s in a]
+        frames = []
+        for i, name in enumerate(cube['labels']):
+            if group is not None and name != group:
+                continue
+            frames.append(pd.DataFrame({
+                'Period': labels,
+                'Period_Start': period_start,
+                'Group': name,
+                'Opening_NBV': opening[i],
+                'Additions': additions[i],
+                'Depreciation': depreciation[i],
+                'Closing_NBV': closing[i],
+            }))
+        if not frames:
+            return pd.DataFrame()
+        out = pd.concat(frames, ignore_index=True)
+        values = ['Opening_NBV', 'Additions', 'Depreciation', 'Closing_NBV']
+        out[values] = out[values].round(2)
+        return out if dimension else out.drop(columns=['Group'])
@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+"""
+ذاكرة نتائج الاستعلامات - نظام إدارة الأصول الثابتة
+ذاكرة LRU محدودة بعدد العناصر وبالحجم في الذاكرة، مفتاحها رمز إصدار البيانات
+مع اسم الاستعلام ومعاملاته، فلا تُعاد حسابات التقارير عند التنقل المتكرر.
+"""
+import copy
+import functools
+import inspect
+import sys
+import threading
+import types
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+import config
+
+
+def estimate_size(value):
+    """تقدير حجم النتيجة في الذاكرة بالبايت"""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, (pd.Series, pd.Index)):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value)
+    if _is_record(value):
+        # كائنات النتائج (مثل ReplacementPlan): حجم سماتها من إطارات ومصفوفات
+        return sys.getsizeof(value) + estimate_size(vars(value))
+    return sys.getsizeof(value)
+
+
+def _is_record(value):
+    """كائن نتيجة بسمات عادية (لا دالة ولا وحدة ولا صنف)"""
+    return hasattr(value, '__dict__') and not isinstance(value, (type, types.ModuleType, types.FunctionType,
+                                                                  types.MethodType))
+
+
+def _detached(value):
+    """نسخة من الإطارات والمصفوفات (ومن الحاويات والكائنات التي تحملها) حتى لا يُعدِّل المستدعي النتيجة المخزنة"""
+    if isinstance(value, (pd.DataFrame, pd.Series, np.ndarray)):
+        return value.copy()
+    if isinstance(value, dict):
+        return {k: _detached(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)) and not hasattr(value, '_fields'):
+        return type(value)(_detached(v) for v in value)
+    if _is_record(value):
+        detached = copy.copy(value)
+        detached.__dict__.update({k: _detached(v) for k, v in vars(value).items()})
+        return detached
+    return value
+
+
+class QueryCache:
+    """ذاكرة LRU آمنة للخيوط مع حد للعناصر وللحجم وعدادات إصابة/إخفاق"""
+
+    def __init__(self, max_entries=None, max_bytes=None):
+        cache_config = config.CACHE_CONFIG
+        self.max_entries = max_entries or cache_config['MAX_ENTRIES']
+        self.max_bytes = max_bytes or cache_config['MAX_MEMORY_MB'] * 1024 * 1024
+        self._entries = OrderedDict()  # المفتاح -> (القيمة، الحجم)
+        self._lock = threading.RLock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """(موجود؟، القيمة) مع نقل العنصر إلى آخر الترتيب عند الإصابة"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, _detached(entry[0])
+
+    def put(self, key, value):
+        """تخزين نتيجة ثم طرد الأقدم استخداماً حتى الرجوع تحت الحدود"""
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return False
+        with self._lock:
+            if key in self._entries:
+                self.bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (_detached(value), size)
+            self.bytes += size
+            while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.bytes -= evicted
+                self.evictions += 1
+        return True
+
+    def invalidate(self, version=None):
+        """حذف نتائج إصدار بيانات معين (أو الكل)"""
+        with self._lock:
+            if version is None:
+                self._entries.clear()
+                self.bytes = 0
+                return
+            for key in [k for k in self._entries if k[1] == version]:
+                self.bytes -= self._entries.pop(key)[1]
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """عدادات الذاكرة المؤقتة"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self.bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+
+_shared_cache = None
+_shared_lock = threading.Lock()
+
+
+def shared_cache():
+    """ذاكرة واحدة مشتركة بين كل المحللين والجلسات في العملية"""
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = QueryCache()
+        return _shared_cache
+
+
+class Uncached:
+    """نتيجة بديلة عند فشل الاستعلام: تُعاد للمستدعي ولا تُخزَّن لباقي الإصدار"""
+
+    def __init__(self, value):
+        self.value = value
+
+
+def uncached(value):
+    return Uncached(value)
+
+
+def make_key(name, version, args, kwargs, signature=None):
+    """مفتاح الاستعلام: (الاسم، إصدار البيانات، المعاملات)؛ None إن كانت غير قابلة للتجزئة
+
+    مع signature تُربط المعاملات بأسمائها وقيمها الافتراضية، فيكون f() وf(10) وf(k=10) مفتاحاً واحداً.
+    """
+    if signature is not None:
+        try:
+            bound = signature.bind(None, *args, **kwargs)
+        except TypeError:
+            return None
+        bound.apply_defaults()
+        arguments = list(bound.arguments.items())[1:]  # بدون self
+        args, kwargs = (), dict(arguments)
+    key = (name, version, args, tuple(sorted(kwargs.items())))
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+def cached_query(method):
+    """مُزخرف لدوال المحلل: يعيد النتيجة المخزنة لنفس الإصدار والمعاملات
+
+    الدالة تعيد uncached(قيمة) في مسار الخطأ فتصل القيمة للمستدعي دون تخزين.
+    """
+    signature = inspect.signature(method)
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        cache = getattr(self, 'cache', None)
+        key = make_key(method.__name__, self.dataset_version, args, kwargs, signature) if cache is not None else None
+        if key is not None:
+            found, value = cache.get(key)
+            if found:
+                return value
+        value = method(self, *args, **kwargs)
+        if isinstance(value, Uncached):
+            return value.value
+        if key is not None and value is not None:
+            cache.put(key, value)
+        return value
+    return wrapper
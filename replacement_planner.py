@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""
+تخطيط إحلال الأصول - نظام إدارة الأصول الثابتة
+اختيار الأصول المستحقة للإحلال عبر أفق متعدد السنوات ضمن ميزانية كل سنة،
+بأولويات حسب التصنيف والمدينة (اختيار جشع متجه على نمط حقيبة الظهر)، ثم
+محاكاة مسار صافي القيمة الدفترية والإهلاك مع الخطة ومن دونها.
+"""
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import config
+
+COST = config.COLUMN_MAPPING['cost']
+RESIDUAL = config.COLUMN_MAPPING['residual_value']
+NBV = config.COLUMN_MAPPING['net_book_value']
+USEFUL_LIFE = config.COLUMN_MAPPING['useful_life']
+
+
+def _column(df, column, default=np.nan):
+    if column not in df.columns:
+        return np.full(len(df), default)
+    return pd.to_numeric(df[column], errors='coerce').to_numpy(dtype=float)
+
+
+def _weights(df, priorities):
+    """وزن الأولوية لكل أصل: حاصل ضرب أوزان قيمه في الأبعاد المحددة (1 افتراضياً)"""
+    weights = np.ones(len(df))
+    for key, by_value in (priorities or {}).items():
+        column = config.COLUMN_MAPPING[key]
+        if column in df.columns and by_value:
+            mapped = df[column].astype(object).map(by_value)
+            weights *= pd.to_numeric(mapped, errors='coerce').fillna(1.0).to_numpy(dtype=float)
+    return weights
+
+
+def greedy_select(score, price, budget, passes=None):
+    """اختيار جشع بكثافة القيمة: أطول بادئة تتسع لها الميزانية، ثم تعبئة المتبقي بما يتسع"""
+    passes = passes or config.REPLACEMENT_CONFIG['FILL_PASSES']
+    # كثافة القيمة = الدرجة لكل ريال (العنصر المجاني أولاً)
+    density = np.divide(score, price, out=np.full(len(score), np.inf), where=price > 0)
+    order = np.argsort(-density, kind='stable')
+    chosen = np.zeros(len(score), dtype=bool)
+    remaining = budget
+    candidates = order
+    for _ in range(passes):
+        # العناصر التي لا تتسع وحدها تُستبعد قبل المجموع التراكمي
+        candidates = candidates[price[candidates] <= remaining]
+        if len(candidates) == 0:
+            break
+        fits = np.cumsum(price[candidates]) <= remaining
+        taken = candidates[fits]
+        chosen[taken] = True
+        remaining -= price[taken].sum()
+        candidates = candidates[~fits]
+    return chosen, remaining
+
+
+class ReplacementPlan:
+    """نتيجة التخطيط: الأصول المختارة وسنة إحلالها ومسار القيم سنة بسنة"""
+
+    def __init__(self, assets, trajectory):
+        self.assets = assets
+        self.trajectory = trajectory
+
+    def summary(self):
+        """عدد الأصول وتكلفة الإحلال لكل سنة"""
+        if self.assets.empty:
+            return pd.DataFrame()
+        grouped = self.assets.groupby('Replacement_Year')
+        return pd.DataFrame({
+            'Count': grouped.size(),
+            'Replacement_Cost': grouped['Replacement_Cost'].sum().round(2),
+            'Written_Off_NBV': grouped['NBV_At_Replacement'].sum().round(2),
+        })
+
+
+def plan_replacements(df, budgets, priorities=None, start_year=None):
+    """خطة إحلال لسنوات الأفق؛ budgets قائمة لسنوات متتالية أو قاموس سنة -> مبلغ"""
+    plan_config = config.REPLACEMENT_CONFIG
+    start_year = start_year or plan_config['START_YEAR'] or datetime.now().year
+    if not isinstance(budgets, dict):
+        budgets = {start_year + i: amount for i, amount in enumerate(budgets)}
+    years = sorted(budgets)
+
+    cost = np.nan_to_num(_column(df, COST))
+    residual = np.nan_to_num(_column(df, RESIDUAL))
+    life = _column(df, USEFUL_LIFE)
+    age = _column(df, 'Asset_Age')
+    nbv = np.nan_to_num(_column(df, NBV, 0.0))
+    weights = _weights(df, priorities)
+    valid = (life > 0) & (cost > 0) & np.isfinite(age)
+    annual = np.where(valid, (cost - residual) / np.where(life > 0, life, 1), 0.0)
+
+    replaced_in = np.zeros(len(df), dtype=np.int32)  # 0 = لم يُستبدل
+    replacement_cost = np.zeros(len(df))
+    written_off = np.zeros(len(df))
+    carry = 0.0
+    rows = []
+    # مسار الأصول القائمة (مع الخطة ومن دونها) ومسار الأصول البديلة
+    current, baseline = nbv.copy(), nbv.copy()
+    new_nbv, new_annual = np.zeros(len(df)), np.zeros(len(df))
+
+    for year in years:
+        offset = year - start_year
+        # 1) الحاجة = نسبة العمر المستهلك في تلك السنة × وزن الأولوية
+        need = np.where(valid, (age + offset) / np.where(life > 0, life, 1), 0.0)
+        eligible = (replaced_in == 0) & valid & (need >= plan_config['MIN_NEED'])
+        price = cost * (1 + plan_config['INFLATION']) ** offset
+        budget = budgets[year] + carry
+        chosen, left = greedy_select((need * weights)[eligible], price[eligible], budget)
+        selected = np.flatnonzero(eligible)[chosen]
+        carry = left if plan_config['CARRY_OVER'] else 0.0
+
+        # 2) الإحلال: شطب صافي القيمة المتبقي وإضافة الأصل البديل بنفس العمر الإنتاجي
+        replaced_in[selected] = year
+        replacement_cost[selected] = price[selected]
+        written_off[selected] = current[selected]
+        current[selected] = 0.0
+        new_nbv[selected] = price[selected]
+        new_annual[selected] = price[selected] / life[selected]
+
+        # 3) إهلاك السنة (قسط ثابت حتى القيمة المتبقية)
+        depreciation = np.minimum(annual, np.maximum(current - residual, 0))
+        depreciation = np.where(replaced_in == 0, depreciation, 0.0)
+        new_depreciation = np.minimum(new_annual, new_nbv)
+        baseline_depreciation = np.minimum(annual, np.maximum(baseline - residual, 0))
+        current -= depreciation
+        new_nbv -= new_depreciation
+        baseline -= baseline_depreciation
+
+        rows.append({
+            'Year': year,
+            'Budget': budgets[year],
+            'Spend': float(price[selected].sum()),
+            'Replaced': len(selected),
+            'Written_Off_NBV': float(written_off[selected].sum()),
+            'Depreciation': float(depreciation.sum() + new_depreciation.sum()),
+            'Closing_NBV': float(current.sum() + new_nbv.sum()),
+            'Baseline_Depreciation': float(baseline_depreciation.sum()),
+            'Baseline_NBV': float(baseline.sum()),
+            'Backlog': int(((replaced_in == 0) & valid & (need >= 1)).sum()),
+        })
+
+    columns = [config.COLUMN_MAPPING[key] for key in plan_config['REPORT_COLUMNS']]
+    picked = np.flatnonzero(replaced_in)
+    assets = df.iloc[picked][[c for c in columns if c in df.columns]].copy()
+    assets['Replacement_Year'] = replaced_in[picked]
+    assets['Replacement_Cost'] = np.round(replacement_cost[picked], 2)
+    assets['NBV_At_Replacement'] = np.round(written_off[picked], 2)
+    assets['Priority_Weight'] = weights[picked]
+    trajectory = pd.DataFrame(rows).set_index('Year').round(2)
+    return ReplacementPlan(assets.sort_values('Replacement_Year', kind='stable'), trajectory)
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""
+منفّذ التقارير المتوازي - نظام إدارة الأصول الثابتة
+أقسام التقرير تُسجَّل مع اعتمادياتها، فتُشغَّل الأقسام المستقلة معاً على مجمع
+خيوط (أو عمليات للمدخلات الكبيرة) وتُسلَّم للمستدعي فور اكتمال كل منها.
+"""
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+import config
+
+
+class ReportExecutor:
+    """رسم اعتماديات بين أقسام التقرير مع تنفيذ متوازٍ وتسليم متدفق"""
+
+    def __init__(self, max_workers=None, use_processes=False):
+        self.max_workers = max_workers or config.REPORT_CONFIG['MAX_WORKERS'] or os.cpu_count()
+        self.use_processes = use_processes
+        self.sections = {}  # الاسم -> (الدالة، المعاملات، الأقسام التي يجب أن تسبقه)
+
+    def add(self, name, func, *args, depends_on=()):
+        """تسجيل قسم؛ لا يبدأ قبل اكتمال الأقسام في depends_on"""
+        unknown = [dep for dep in depends_on if dep not in self.sections]
+        if unknown:
+            raise ValueError(f"اعتماديات غير معروفة للقسم {name}: {unknown}")
+        self.sections[name] = (func, args, tuple(depends_on))
+        return self
+
+    def stream(self):
+        """(الاسم، النتيجة) لكل قسم بترتيب الاكتمال"""
+        pool_class = ProcessPoolExecutor if self.use_processes else ThreadPoolExecutor
+        pending = dict(self.sections)
+        finished = set()
+        with pool_class(max_workers=min(self.max_workers, max(len(pending), 1))) as pool:
+            running = {}
+
+            def submit_ready():
+                ready = [name for name, (_, _, deps) in pending.items() if finished.issuperset(deps)]
+                for name in ready:
+                    func, args, _ = pending.pop(name)
+                    running[pool.submit(func, *args)] = name
+
+            submit_ready()
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    finished.add(name)
+                    yield name, future.result()
+                submit_ready()
+
+    def run(self):
+        """كل الأقسام كقاموس بترتيب التسجيل"""
+        results = dict(self.stream())
+        return {name: results[name] for name in self.sections}
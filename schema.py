@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""
+طبقة المخطط - نظام إدارة الأصول الثابتة
+تحويل عناوين الأعمدة الخام (عربية أو إنجليزية أو بشرطات سفلية) إلى الأسماء
+القياسية في COLUMN_MAPPING مرة واحدة لكل تخطيط ملف (بصمة صف العناوين)،
+مع مواصفات نوعية لكل عمود تقود مراحل التنظيف والتحليل اللاحقة.
+"""
+import hashlib
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+import pandas as pd
+
+import config
+
+# مواصفات العمود: المفتاح، الاسم القياسي، النوع، قبول الفراغ، قيمة الملء، مجموعة الفئات
+ColumnSpec = namedtuple('ColumnSpec', ['key', 'name', 'dtype', 'nullable', 'fill', 'categories'])
+
+
+# محرك re في بايثون: \w يشمل الحروف العربية (محرك pyarrow في pandas 3 يقصره على ASCII)
+_SEPARATORS = re.compile(r'[\W_]+')
+
+
+def normalize_headers(headers):
+    """توحيد نصوص العناوين: أحرف صغيرة، بلا رموز أو شرطات، مسافات مفردة"""
+    return pd.Index([_SEPARATORS.sub(' ', str(h)).strip().lower() for h in headers], dtype=object)
+
+
+def _build_alias_table():
+    """العنوان الموحّد -> مفتاح COLUMN_MAPPING (إنجليزي وعربي)"""
+    keys = list(config.COLUMN_MAPPING) + list(config.COLUMN_MAPPING_AR)
+    names = list(config.COLUMN_MAPPING.values()) + list(config.COLUMN_MAPPING_AR.values())
+    table = {}
+    for key, alias in zip(keys, normalize_headers(names)):
+        table.setdefault(alias, key)
+    return table
+
+
+ALIASES = _build_alias_table()
+
+
+def _dtype_for(key):
+    types = config.COLUMN_TYPES
+    if key in types['numeric']:
+        return 'float64'
+    if key in types['date']:
+        return 'datetime64[ns]'
+    if key in types['category']:
+        return 'category'
+    return 'string'
+
+
+def header_fingerprint(headers):
+    """بصمة صف العناوين (تحدد تخطيط الملف)"""
+    return hashlib.sha1('\x1f'.join(str(h) for h in headers).encode('utf-8')).hexdigest()[:16]
+
+
+class SchemaMap:
+    """نتيجة تحويل صف عناوين واحد: إعادة التسمية ومواصفات الأعمدة"""
+
+    def __init__(self, headers):
+        self.headers = tuple(headers)
+        self.fingerprint = header_fingerprint(self.headers)
+        self.rename = {}    # العنوان الخام -> الاسم القياسي
+        self.keys = {}      # الاسم القياسي -> مفتاح COLUMN_MAPPING
+        self.unknown = []   # عناوين لم يُتعرّف عليها
+        for raw, alias in zip(self.headers, normalize_headers(self.headers)):
+            key = ALIASES.get(alias)
+            name = config.COLUMN_MAPPING.get(key)
+            if key is None or name in self.keys:
+                self.unknown.append(raw)
+                continue
+            self.keys[name] = key
+            if raw != name:
+                self.rename[raw] = name
+        not_null = config.COLUMN_TYPES['not_null']
+        self.specs = {
+            name: ColumnSpec(key, name, _dtype_for(key), key not in not_null, not_null.get(key), None)
+            for name, key in self.keys.items()
+        }
+
+    def apply(self, df):
+        """إعادة تسمية أعمدة الإطار إلى الأسماء القياسية"""
+        return df.rename(columns=self.rename) if self.rename else df
+
+    def columns_of(self, dtype):
+        """الأسماء القياسية للأعمدة ذات نوع معين"""
+        return [name for name, spec in self.specs.items() if spec.dtype == dtype]
+
+    def observed_specs(self, df):
+        """المواصفات بعد إضافة مجموعة الفئات المشاهدة لأعمدة الفئات"""
+        specs = {}
+        for name, spec in self.specs.items():
+            if spec.dtype == 'category' and name in df.columns and isinstance(df[name].dtype, pd.CategoricalDtype):
+                spec = spec._replace(categories=frozenset(df[name].cat.categories))
+            specs[name] = spec
+        return specs
+
+    def header_rows(self, df, scan_rows=5):
+        """مواقع الصفوف الأولى التي هي صفوف عناوين مكررة (مثل صف العناوين العربية)"""
+        return [position for position in range(min(scan_rows, len(df))) if is_header_row(df.iloc[position])]
+
+
+def is_header_row(row):
+    """صف أغلب خلاياه غير الفارغة عناوين معروفة (عربية أو إنجليزية)"""
+    cells = row.dropna()
+    if len(cells) == 0:
+        return False
+    hits = sum(alias in ALIASES for alias in normalize_headers(cells.tolist()))
+    return hits / len(cells) > 0.5
+
+
+def detect_header_row(frame):
+    """موقع أول صف عناوين في عينة من أعلى الورقة (مقروءة بدون عناوين)، أو None"""
+    for position in range(len(frame)):
+        if is_header_row(frame.iloc[position]):
+            return position
+    return None
+
+
+def projection_keys(columns):
+    """مفاتيح COLUMN_MAPPING لقائمة إسقاط (مفاتيح أو أسماء أعمدة بأي صيغة)"""
+    keys = set()
+    for column, alias in zip(columns, normalize_headers(columns)):
+        key = column if column in config.COLUMN_MAPPING else ALIASES.get(alias)
+        if key is not None:
+            keys.add(key)
+    return keys
+
+
+def projection_filter(columns):
+    """دالة usecols لقراءة أعمدة الإسقاط فقط من الملف"""
+    keys = projection_keys(columns)
+    return lambda header: ALIASES.get(normalize_headers([header])[0]) in keys
+
+
+@lru_cache(maxsize=32)
+def resolve_headers(headers):
+    """تحويل صف عناوين (tuple) مع ذاكرة مؤقتة لكل تخطيط ملف"""
+    return SchemaMap(headers)
+
+
+def resolve(df):
+    """مخطط إطار بيانات حسب عناوينه الحالية"""
+    return resolve_headers(tuple(str(c) for c in df.columns))
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""
+محرك البحث - نظام إدارة الأصول الثابتة
+توحيد النص العربي (الهمزات، التاء المربوطة، التشكيل، التطويل) مرة واحدة عند
+بناء الفهرس، ثم مطابقة جزئية وتقريبية (تشابه Dice للمقاطع الثلاثية ومسافة تحرير
+محدودة على المرشحين منها) مع ترتيب النتائج.
+"""
+import string
+
+import numpy as np
+import pandas as pd
+
+import config
+import topk
+
+_ARABIC_MAP = str.maketrans({
+    'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ٱ': 'ا',
+    'ى': 'ي', 'ئ': 'ي',
+    'ؤ': 'و',
+    'ة': 'ه',
+    'ـ': '',  # التطويل
+    # التشكيل (الفتحة حتى السكون والألف الخنجرية)
+    **{chr(code): '' for code in (*range(0x064B, 0x0653), 0x0670)},
+    # علامات الترقيم تُستبدل بمسافة (بلا تعبير نمطي ليعمل مع محركات النصوص كلها)
+    **{mark: ' ' for mark in string.punctuation + '،؛؟«»'},
+})
+
+
+def normalize_text(series):
+    """توحيد عمود نصي دفعة واحدة للبحث"""
+    return (series.astype('string').fillna('')
+                  .str.lower()
+                  .str.translate(_ARABIC_MAP)
+                  .str.replace(r'\s+', ' ', regex=True)
+                  .str.strip())
+
+
+def normalize_query(text):
+    return normalize_text(pd.Series([text])).iloc[0]
+
+
+def trigrams(token):
+    padded = f' {token} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a, b, bound):
+    """مسافة التحرير مع تبديل حرفين متجاورين (OSA)، أو bound + 1 إن تجاوزت الحد"""
+    if abs(len(a) - len(b)) > bound:
+        return bound + 1
+    before, previous = None, list(range(len(b) + 1))
+    for i, char in enumerate(a, 1):
+        current = [i] + [0] * len(b)
+        for j, other in enumerate(b, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char != other))
+            if i > 1 and j > 1 and char == b[j - 2] and a[i - 2] == other:
+                current[j] = min(current[j], before[j - 2] + 1)
+        if min(current) > bound:
+            return bound + 1
+        before, previous = previous, current
+    return min(previous[-1], bound + 1)
+
+
+class SearchIndex:
+    """فهرس مقلوب للكلمات الموحّدة مع فهرس مقاطع ثلاثية للمطابقة التقريبية"""
+
+    def __init__(self, df, fields=None, version=None):
+        self.version = version
+        self.n_rows = len(df)
+        fields = [f for f in (fields or config.SEARCH_CONFIG['SEARCH_FIELDS']) if f in df.columns]
+
+        # 1) نص موحّد لكل صف من كل حقول البحث (يُحسب مرة واحدة)
+        documents = pd.Series('', index=range(self.n_rows), dtype='string')
+        for field in fields:
+            documents = documents + ' ' + normalize_text(df[field]).reset_index(drop=True)
+        self.documents = documents.str.strip()
+
+        # 2) الكلمات المميزة وقوائم الصفوف لكل كلمة (تخزين CSR)
+        pairs = self.documents.str.split().explode().dropna()
+        pairs = pairs[pairs != '']
+        token_ids, vocabulary = pd.factorize(pairs, sort=True)
+        rows = pairs.index.to_numpy()
+        order = np.lexsort((rows, token_ids))
+        token_ids, rows = token_ids[order], rows[order]
+        keep = np.ones(len(rows), dtype=bool)
+        keep[1:] = (token_ids[1:] != token_ids[:-1]) | (rows[1:] != rows[:-1])
+        self._posting_rows = rows[keep]
+        self._posting_offsets = np.searchsorted(token_ids[keep], np.arange(len(vocabulary) + 1))
+        self.vocabulary = pd.Series(np.asarray(vocabulary, dtype=object), dtype='string')
+
+        # 3) المقطع الثلاثي -> معرفات الكلمات
+        grams = {}
+        self._gram_counts = np.zeros(len(self.vocabulary), dtype='int64')
+        self._lengths = self.vocabulary.str.len().to_numpy(dtype='int64')
+        for token_id, token in enumerate(self.vocabulary.tolist()):
+            token_grams = trigrams(token)
+            self._gram_counts[token_id] = len(token_grams)
+            for gram in token_grams:
+                grams.setdefault(gram, []).append(token_id)
+        self._grams = {gram: np.array(ids, dtype='int64') for gram, ids in grams.items()}
+
+    def _rows_of(self, token_id):
+        return self._posting_rows[self._posting_offsets[token_id]:self._posting_offsets[token_id + 1]]
+
+    def _token_similarity(self, token, threshold):
+        """تشابه كلمة الاستعلام مع كل كلمة في المفردات (1 للاحتواء، ثم Dice للمقاطع أو مسافة التحرير)"""
+        similarity = np.zeros(len(self.vocabulary))
+        contains = self.vocabulary.str.contains(token, regex=False).to_numpy(dtype=bool)
+        similarity[contains] = 1.0
+        query_grams = trigrams(token)
+        hits = [self._grams[g] for g in query_grams if g in self._grams]
+        # الأرقام (رقم البطاقة مثلاً) تُطابق جزئياً فقط دون تقريب
+        if not hits or token.isdigit():
+            return similarity
+        shared = np.bincount(np.concatenate(hits), minlength=len(self.vocabulary))
+        fuzzy = 2 * shared / (len(query_grams) + self._gram_counts)
+
+        # خطأ إملائي واحد يهدم حتى ثلاثة مقاطع، فيضيع أغلب مقاطع الكلمات القصيرة:
+        # نتحقق بمسافة التحرير على المرشحين الذين يسمح عدد مقاطعهم المشتركة بذلك
+        bound = min(config.SEARCH_CONFIG['MAX_EDITS'], len(token) // 4)
+        if bound:
+            candidates = np.flatnonzero((shared >= max(1, len(query_grams) - 3 * bound))
+                                        & (np.abs(self._lengths - len(token)) <= bound) & ~contains)
+            for token_id, other in zip(candidates.tolist(), self.vocabulary.iloc[candidates].tolist()):
+                distance = edit_distance(token, other, bound)
+                if distance <= bound:
+                    fuzzy[token_id] = max(fuzzy[token_id], 1 - distance / max(len(token), len(other)))
+
+        matched = (fuzzy >= threshold) & ~contains
+        similarity[matched] = fuzzy[matched]
+        return similarity
+
+    def search(self, query, limit=None, threshold=None):
+        """مواقع الصفوف المطابقة مرتبة حسب الدرجة، مع الدرجات"""
+        search_config = config.SEARCH_CONFIG
+        limit = limit or search_config['MAX_RESULTS']
+        threshold = threshold if threshold is not None else search_config['FUZZY_THRESHOLD']
+        query = normalize_query(query)
+        tokens = [t for t in query.split() if len(t) >= search_config['MIN_SEARCH_LENGTH']]
+        if len(query) < search_config['MIN_SEARCH_LENGTH'] or not tokens:
+            return np.array([], dtype='int64'), np.array([])
+
+        scores = np.zeros(self.n_rows)
+        for token in tokens:
+            similarity = self._token_similarity(token, threshold)
+            token_ids = np.flatnonzero(similarity)
+            best = np.zeros(self.n_rows)
+            if len(token_ids):
+                rows = np.concatenate([self._rows_of(t) for t in token_ids])
+                lengths = self._posting_offsets[token_ids + 1] - self._posting_offsets[token_ids]
+                np.maximum.at(best, rows, np.repeat(similarity[token_ids], lengths))
+            scores += best
+        scores /= len(tokens)
+
+        matched = np.flatnonzero(scores > 0)
+        ranked = matched[topk.top_k_indices(scores[matched], limit)]
+        return ranked, scores[ranked]
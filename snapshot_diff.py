@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+"""
+مقارنة لقطتين من سجل الأصول - نظام إدارة الأصول الثابتة
+ربط سجلين معالجين (فترة سابقة وحالية) بالتجزئة على رقم البطاقة أو الرقم
+الموحد في نظام وزارة المالية، وتصنيف كل أصل (مضاف، مستبعد، منقول، معاد
+تقييمه) مع جداول فروقات لكل بُعد، وتخزين النتيجة لكل زوج من الإصدارات.
+
+التشغيل: python snapshot_diff.py old.xlsx new.xlsx --output diff.xlsx
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+import config
+import query_cache
+
+TAG = config.COLUMN_MAPPING['tag_number']
+MOF = config.COLUMN_MAPPING['mof_unique_number']
+COST = config.COLUMN_MAPPING['cost']
+NBV = config.COLUMN_MAPPING['net_book_value']
+KEY = 'Asset_Key'
+
+
+def asset_key(df):
+    """مفتاح الربط: رقم البطاقة، وإلا الرقم الموحد في نظام وزارة المالية"""
+    keys = pd.Series(pd.NA, index=df.index, dtype='string')
+    for column, prefix in ((MOF, 'MOF:'), (TAG, '')):
+        if column in df.columns:
+            values = df[column].astype('string').str.strip().replace('', pd.NA)
+            keys = (prefix + values).where(values.notna(), keys)
+    return keys
+
+
+def _side(df, columns):
+    """أعمدة المقارنة من لقطة واحدة مفهرسة بالمفتاح (أول ظهور للمفتاح المكرر)"""
+    frame = df[[c for c in columns if c in df.columns]].copy()
+    for col in frame.columns:
+        if isinstance(frame[col].dtype, pd.CategoricalDtype):
+            # فئات اللقطتين مختلفة؛ المقارنة على القيم لا على الرموز
+            frame[col] = frame[col].astype('string')
+    frame[KEY] = asset_key(df)
+    frame = frame[frame[KEY].notna()]
+    duplicates = int(frame[KEY].duplicated().sum())
+    return frame.drop_duplicates(KEY).set_index(KEY), duplicates
+
+
+def _changed(old, new):
+    """اختلاف قيمتين مع اعتبار المفقودين متساويين"""
+    differs = (old != new).fillna(True).to_numpy(dtype=bool)
+    return differs & ~(old.isna().to_numpy() & new.isna().to_numpy())
+
+
+def compare(old_df, new_df, dimensions=None, tolerance=None):
+    """إطار أصل لكل مفتاح بالقيم القديمة والجديدة والفروقات والحالة"""
+    diff_config = config.SNAPSHOT_DIFF_CONFIG
+    dimensions = [config.COLUMN_MAPPING[key] for key in (dimensions or diff_config['DIMENSIONS'])]
+    moved_columns = [config.COLUMN_MAPPING[key] for key in diff_config['MOVE_COLUMNS']]
+    tolerance = diff_config['TOLERANCE'] if tolerance is None else tolerance
+    labels = diff_config['STATUS_LABELS']
+    columns = list(dict.fromkeys(dimensions + moved_columns + [COST, NBV]))
+
+    old, old_duplicates = _side(old_df, columns)
+    new, new_duplicates = _side(new_df, columns)
+    # ربط بالتجزئة على المفتاح (outer)؛ عمود علامة لكل جانب يبيّن مصدر الصف
+    merged = old.add_suffix('_old').assign(_in_old=True).join(
+        new.add_suffix('_new').assign(_in_new=True), how='outer')
+    in_old = merged.pop('_in_old').notna().to_numpy()
+    in_new = merged.pop('_in_new').notna().to_numpy()
+    both = in_old & in_new
+
+    def pair(column):
+        empty = pd.Series(np.nan, index=merged.index)
+        return merged.get(f'{column}_old', empty), merged.get(f'{column}_new', empty)
+
+    moved = np.zeros(len(merged), dtype=bool)
+    for column in moved_columns:
+        moved |= _changed(*pair(column))
+    moved &= both
+
+    result = pd.DataFrame(index=merged.index)
+    for column in columns:
+        result[f'{column}_old'], result[f'{column}_new'] = pair(column)
+    for column in (COST, NBV):
+        old_values, new_values = (s.astype(float) for s in pair(column))
+        result[f'{column}_delta'] = new_values.fillna(0) - old_values.fillna(0)
+    revalued = both & ((result[f'{COST}_delta'].abs() > tolerance) | (result[f'{NBV}_delta'].abs() > tolerance)).to_numpy()
+
+    result['Moved'] = moved
+    result['Revalued'] = revalued
+    result['Status'] = np.select(
+        [~in_old, ~in_new, moved & revalued, moved, revalued],
+        [labels['added'], labels['removed'], labels['moved_revalued'], labels['moved'], labels['revalued']],
+        default=labels['unchanged']
+    )
+    result.attrs['duplicates'] = {'old': old_duplicates, 'new': new_duplicates}
+    return result
+
+
+def variance_table(diff, dimension):
+    """جدول فروقات بُعد واحد: التكلفة وصافي القيمة قبل وبعد وعدد الأصول لكل حالة"""
+    # الأصل المستبعد يُنسب لقيمته القديمة، وما سواه لقيمته الجديدة
+    group = diff[f'{dimension}_new'].fillna(diff[f'{dimension}_old']).fillna('غير محدد')
+    values = pd.DataFrame({
+        'Cost_Old': diff[f'{COST}_old'].astype(float),
+        'Cost_New': diff[f'{COST}_new'].astype(float),
+        'Cost_Delta': diff[f'{COST}_delta'],
+        'NBV_Old': diff[f'{NBV}_old'].astype(float),
+        'NBV_New': diff[f'{NBV}_new'].astype(float),
+        'NBV_Delta': diff[f'{NBV}_delta'],
+    })
+    table = values.groupby(group.to_numpy()).sum(min_count=1).fillna(0)
+    counts = pd.crosstab(group.to_numpy(), diff['Status'].to_numpy())
+    table = table.join(counts).fillna(0)
+    table.index.name = dimension
+    return table.sort_values('Cost_Delta', key=np.abs, ascending=False).round(2)
+
+
+class SnapshotDiff:
+    """نتيجة مقارنة لقطتين: الأصول والملخص وجداول الفروقات لكل بُعد"""
+
+    def __init__(self, assets, old_version=None, new_version=None, variance=None):
+        self.assets = assets
+        self.versions = (old_version, new_version)
+        self._variance = dict(variance or {})
+
+    def summary(self):
+        """عدد الأصول وفرق التكلفة وصافي القيمة لكل حالة"""
+        grouped = self.assets.groupby('Status')
+        return pd.DataFrame({
+            'Count': grouped.size(),
+            'Cost_Delta': grouped[f'{COST}_delta'].sum(),
+            'NBV_Delta': grouped[f'{NBV}_delta'].sum(),
+        }).round(2)
+
+    def variance(self, dimension_key):
+        """جدول الفروقات لمفتاح بُعد من COLUMN_MAPPING (يُحسب مرة واحدة)"""
+        if dimension_key not in self._variance:
+            self._variance[dimension_key] = variance_table(self.assets, config.COLUMN_MAPPING[dimension_key])
+        return self._variance[dimension_key]
+
+    def changes(self):
+        """الأصول التي تغيرت فقط"""
+        return self.assets[self.assets['Status'] != config.SNAPSHOT_DIFF_CONFIG['STATUS_LABELS']['unchanged']]
+
+
+def diff_snapshots(old_df, new_df, old_version=None, new_version=None, cache=None):
+    """مقارنة لقطتين مع تخزين النتيجة لكل زوج إصدارات"""
+    cache = cache if cache is not None else query_cache.shared_cache()
+    key = None
+    if old_version is not None and new_version is not None:
+        key = query_cache.make_key('snapshot_diff', (old_version, new_version), (), {})
+        found, value = cache.get(key)
+        if found:
+            return SnapshotDiff(value['assets'], old_version, new_version, value['variance'])
+    result = SnapshotDiff(compare(old_df, new_df), old_version, new_version)
+    for dimension_key in config.SNAPSHOT_DIFF_CONFIG['DIMENSIONS']:
+        result.variance(dimension_key)
+    if key is not None:
+        # قاموس إطارات حتى تحسب الذاكرة حجمه الفعلي
+        cache.put(key, {'assets': result.assets, 'variance': result._variance})
+    return result
+
+
+def load_snapshot(file_path, sheet_name=None):
+    """(السجل المعالج، رمز الإصدار) لملف FAR"""
+    import data_processor
+
+    sheet_name = sheet_name or config.APP_CONFIG['SHEET_NAME']
+    columns = config.LOAD_CONFIG['PROJECTION']
+    processor = data_processor.DataProcessor()
+    df = processor.preprocess_data(data_processor.DataProcessor.load_data(file_path, sheet_name, columns))
+    return df, data_processor.DataProcessor.source_version(file_path, sheet_name, columns)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='مقارنة لقطتين من سجل الأصول الثابتة')
+    parser.add_argument('old', help='ملف الفترة السابقة')
+    parser.add_argument('new', help='ملف الفترة الحالية')
+    parser.add_argument('--old-sheet')
+    parser.add_argument('--new-sheet')
+    parser.add_argument('--output', help='حفظ الأصول المتغيرة وجداول الفروقات في ملف Excel')
+    args = parser.parse_args()
+
+    old_df, old_version = load_snapshot(args.old, args.old_sheet)
+    new_df, new_version = load_snapshot(args.new, args.new_sheet)
+    result = diff_snapshots(old_df, new_df, old_version, new_version)
+    print(result.summary().to_string())
+    for dimension_key in config.SNAPSHOT_DIFF_CONFIG['DIMENSIONS']:
+        print()
+        print(result.variance(dimension_key).head(10).to_string())
+
+    if args.output:
+        with pd.ExcelWriter(args.output) as writer:
+            result.summary().to_excel(writer, sheet_name='summary')
+            result.changes().to_excel(writer, sheet_name='changes')
+            for dimension_key in config.SNAPSHOT_DIFF_CONFIG['DIMENSIONS']:
+                result.variance(dimension_key).to_excel(writer, sheet_name=dimension_key[:31])
+
+
+if __name__ == '__main__':
+    main()
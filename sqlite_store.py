@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+مخزن SQLite المضمّن - نظام إدارة الأصول الثابتة
+خلفية تخزين اختيارية للسجل المعالج مع فهارس على رقم البطاقة والمدينة والقسم
+والتصنيف وتاريخ الخدمة، تُنفَّذ فيها التصفيات والتجميعات مباشرة بدلاً من
+تحميل السجل كاملاً في الذاكرة.
+"""
+import sqlite3
+import threading
+
+import pandas as pd
+
+import config
+
+TABLE = 'assets'
+ROW_ID = 'row_id'  # فهرس الإطار الأصلي
+
+
+def quote(name):
+    """اسم عمود آمن داخل SQL"""
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+class SQLiteStore:
+    """جدول أصول واحد مع بيانات الإصدار، واستعلامات تصفية وتجميع"""
+
+    def __init__(self, path=None):
+        self.path = path or config.STORAGE_CONFIG['SQLITE_PATH']
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._lock = threading.RLock()
+        with self._lock, self._conn:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)')
+        self._columns = self._read_columns()
+
+    def close(self):
+        self._conn.close()
+
+    def _read_columns(self):
+        return [row[1] for row in self._conn.execute(f'PRAGMA table_info({TABLE})')]
+
+    @property
+    def version(self):
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        return row[0] if row else None
+
+    def has_column(self, column):
+        return column in self._columns
+
+    # -------------------------------------------------
+    # الكتابة
+    # -------------------------------------------------
+    def write_frame(self, df, version):
+        """استبدال الجدول بإطار معالج ثم بناء الفهارس (الإصدار يُسجَّل أخيراً)"""
+        frame = df.copy()
+        for col in frame.columns:
+            if isinstance(frame[col].dtype, pd.CategoricalDtype) or pd.api.types.is_string_dtype(frame[col].dtype):
+                frame[col] = frame[col].astype(object).where(frame[col].notna(), None)
+        frame.index = frame.index.rename(ROW_ID)
+
+        with self._lock:
+            with self._conn:
+                self._conn.execute("DELETE FROM meta WHERE key = 'version'")
+                self._conn.execute(f'DROP TABLE IF EXISTS {TABLE}')
+            frame.to_sql(TABLE, self._conn, index=True, chunksize=config.STORAGE_CONFIG['WRITE_CHUNK_SIZE'])
+            with self._conn:
+                for key in config.STORAGE_CONFIG['INDEXED_COLUMNS']:
+                    column = config.COLUMN_MAPPING[key]
+                    if column in frame.columns:
+                        self._conn.execute(f'CREATE INDEX IF NOT EXISTS idx_{key} ON {TABLE} ({quote(column)})')
+                self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('version', ?)", (str(version),))
+            self._columns = self._read_columns()
+
+    # -------------------------------------------------
+    # الاستعلامات
+    # -------------------------------------------------
+    def query(self, sql, params=()):
+        with self._lock:
+            return pd.read_sql_query(sql, self._conn, params=params)
+
+    def group_totals(self, column, values, count_column=None):
+        """مجاميع values وعدد الصفوف لكل قيمة في column (مثل groupby ثم agg)"""
+        count_column = count_column or config.COLUMN_MAPPING['tag_number']
+        sums = ', '.join(f'TOTAL({quote(v)}) AS {quote(v)}' for v in values)
+        sql = (f'SELECT {quote(column)}, {sums}, COUNT({quote(count_column)}) AS Count FROM {TABLE} '
+               f'WHERE {quote(column)} IS NOT NULL GROUP BY {quote(column)} ORDER BY {quote(column)}')
+        return self.query(sql).set_index(column).round(2)
+
+    def select(self, columns, where=None, params=(), order_by=None, limit=None):
+        """صفوف مصفّاة بأعمدة محددة، بفهرس الإطار الأصلي"""
+        sql = f"SELECT {quote(ROW_ID)}, {', '.join(quote(c) for c in columns)} FROM {TABLE}"
+        if where:
+            sql += f' WHERE {where}'
+        if order_by:
+            sql += f' ORDER BY {order_by}'
+        if limit is not None:
+            sql += f' LIMIT {int(limit)}'
+        frame = self.query(sql, params).set_index(ROW_ID)
+        frame.index.name = None
+        return frame
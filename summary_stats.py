@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+"""
+مُجمِّعات الإحصاءات المتدفقة - نظام إدارة الأصول الثابتة
+تُغذّى دفعةً بدفعة أثناء الإدخال، وتُدمج عبر الجهات والملفات،
+فتُقدَّم مؤشرات الأداء في زمن ثابت دون إعادة الجمع على الإطار كاملاً.
+"""
+import math
+
+import numpy as np
+import pandas as pd
+
+import config
+import topk
+
+
+class QuantileSketch:
+    """مخطط تقريبي للمئينات بدقة نسبية ثابتة (حاويات لوغاريتمية قابلة للدمج)"""
+
+    def __init__(self, relative_accuracy=0.01):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.positive = {}  # رقم الحاوية -> العدد
+        self.negative = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def update(self, values):
+        """إضافة دفعة من القيم (تُتجاهل القيم المفقودة)"""
+        values = np.asarray(values, dtype='float64')
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return self
+        self.zero_count += int((values == 0).sum())
+        self._add(self.positive, values[values > 0])
+        self._add(self.negative, -values[values < 0])
+        self.count += len(values)
+        return self
+
+    def _add(self, store, magnitudes):
+        if len(magnitudes) == 0:
+            return
+        keys = np.ceil(np.log(magnitudes) / self._log_gamma).astype('int64')
+        keys, counts = np.unique(keys, return_counts=True)
+        for key, n in zip(keys.tolist(), counts.tolist()):
+            store[key] = store.get(key, 0) + n
+
+    def merge(self, other):
+        """دمج مخطط آخر بنفس الدقة"""
+        if other.gamma != self.gamma:
+            raise ValueError("لا يمكن دمج مخططات بدقة نسبية مختلفة")
+        for store, other_store in ((self.positive, other.positive), (self.negative, other.negative)):
+            for key, n in other_store.items():
+                store[key] = store.get(key, 0) + n
+        self.zero_count += other.zero_count
+        self.count += other.count
+        return self
+
+    def _value(self, key):
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def quantile(self, q):
+        """المئين q (بين 0 و1) بخطأ نسبي لا يتجاوز relative_accuracy"""
+        if self.count == 0:
+            return float('nan')
+        rank = q * (self.count - 1)
+        seen = 0
+        for key in sorted(self.negative, reverse=True):
+            seen += self.negative[key]
+            if seen > rank:
+                return -self._value(key)
+        seen += self.zero_count
+        if seen > rank:
+            return 0.0
+        for key in sorted(self.positive):
+            seen += self.positive[key]
+            if seen > rank:
+                return self._value(key)
+        return self._value(max(self.positive)) if self.positive else 0.0
+
+
+class StreamingStats:
+    """عدد/مجموع معوَّض/أدنى/أعلى/متوسط وتباين (Welford) ومئينات تقريبية لعمود واحد"""
+
+    def __init__(self, relative_accuracy=None):
+        if relative_accuracy is None:
+            relative_accuracy = config.STATS_CONFIG['QUANTILE_RELATIVE_ACCURACY']
+        self.count = 0
+        self.min = float('inf')
+        self.max = float('-inf')
+        self.mean = 0.0
+        self._m2 = 0.0
+        self._sum = 0.0
+        self._compensation = 0.0
+        self.sketch = QuantileSketch(relative_accuracy)
+
+    def _add_compensated(self, value):
+        # جمع Neumaier: يحتفظ بأجزاء التقريب المفقودة في مُعوِّض منفصل
+        total = self._sum + value
+        if abs(self._sum) >= abs(value):
+            self._compensation += (self._sum - total) + value
+        else:
+            self._compensation += (value - total) + self._sum
+        self._sum = total
+
+    def _combine_moments(self, n, mean, m2):
+        # دمج Chan/Welford للمتوسط ومجموع مربعات الانحراف
+        if n == 0:
+            return
+        total = self.count + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self._m2 += m2 + delta * delta * self.count * n / total
+        self.count = total
+
+    def update(self, values):
+        """إضافة دفعة من القيم الرقمية"""
+        values = np.asarray(values, dtype='float64')
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return self
+        chunk_mean = float(values.mean())
+        self._combine_moments(len(values), chunk_mean, float(((values - chunk_mean) ** 2).sum()))
+        self._add_compensated(math.fsum(values))
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self.sketch.update(values)
+        return self
+
+    def merge(self, other):
+        """دمج مُجمِّع آخر (جهة أو ملف أو دفعة أخرى)"""
+        self._combine_moments(other.count, other.mean, other._m2)
+        self._add_compensated(other._sum)
+        self._add_compensated(other._compensation)
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.sketch.merge(other.sketch)
+        return self
+
+    @property
+    def total(self):
+        return self._sum + self._compensation
+
+    @property
+    def variance(self):
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+    def quantile(self, q):
+        return self.sketch.quantile(q)
+
+    def to_dict(self):
+        empty = self.count == 0
+        return {
+            'count': self.count,
+            'total': self.total,
+            'min': None if empty else self.min,
+            'max': None if empty else self.max,
+            'mean': self.mean,
+            'std': self.std,
+            'quantiles': {q: self.quantile(q) for q in config.STATS_CONFIG['QUANTILES']}
+        }
+
+
+class RegisterStats:
+    """مُجمِّعات الأعمدة المالية لسجل الأصول، تُحدَّث دفعةً بدفعة وتُدمج"""
+
+    # مفاتيح COLUMN_MAPPING للأعمدة المتابعة
+    KEYS = ('cost', 'depreciation_amount', 'net_book_value')
+    # أبعاد مخطط أكثر المجموعات تكلفة
+    GROUP_KEYS = ('custodian', 'manufacturer')
+
+    def __init__(self, columns=None, groups=None):
+        # columns: {مفتاح: اسم العمود في الإطار}؛ الافتراضي أسماء COLUMN_MAPPING
+        self.columns = columns or {key: config.COLUMN_MAPPING[key] for key in self.KEYS}
+        self.groups = groups if groups is not None else {key: config.COLUMN_MAPPING[key] for key in self.GROUP_KEYS}
+        self.rows = 0
+        self.stats = {key: StreamingStats() for key in self.columns}
+        self.heavy_hitters = {key: topk.HeavyHitters() for key in self.groups}
+
+    @classmethod
+    def from_frame(cls, df, columns=None, chunk_size=None, groups=None):
+        return cls(columns, groups).update_frame(df, chunk_size)
+
+    def update_frame(self, df, chunk_size=None):
+        """تغذية الإطار على دفعات من الصفوف"""
+        chunk_size = chunk_size or config.STATS_CONFIG['CHUNK_SIZE']
+        arrays = {
+            key: pd.to_numeric(df[col], errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+            for key, col in self.columns.items() if col in df.columns
+        }
+        # المجموعات تُوزن بالتكلفة (وبالعدد إن لم يُتابَع عمود التكلفة)
+        weights = arrays.get('cost', np.ones(len(df)))
+        labels = {
+            key: df[col].astype(object).to_numpy()
+            for key, col in self.groups.items() if col in df.columns
+        }
+        for start in range(0, len(df), chunk_size):
+            for key, values in arrays.items():
+                self.stats[key].update(values[start:start + chunk_size])
+            for key, keys in labels.items():
+                chunk = keys[start:start + chunk_size]
+                present = pd.notna(chunk)
+                self.heavy_hitters[key].update(chunk[present], weights[start:start + chunk_size][present])
+        self.rows += len(df)
+        return self
+
+    def merge(self, other):
+        """دمج إحصاءات سجل آخر (جهة/ملف)"""
+        for key, stats in other.stats.items():
+            self.stats.setdefault(key, StreamingStats()).merge(stats)
+        for key, sketch in other.heavy_hitters.items():
+            self.heavy_hitters.setdefault(key, topk.HeavyHitters()).merge(sketch)
+        self.rows += other.rows
+        return self
+
+    def __getitem__(self, key):
+        return self.stats[key]
+
+    def summary(self):
+        """ملخص مؤشرات الأداء بنفس مفاتيح AssetAnalyzer.get_summary_stats"""
+        total_cost = self.stats['cost'].total if 'cost' in self.stats else 0
+        total_depreciation = self.stats['depreciation_amount'].total if 'depreciation_amount' in self.stats else 0
+        total_net_value = self.stats['net_book_value'].total if 'net_book_value' in self.stats else 0
+        return {
+            'total_assets': self.rows,
+            'total_cost': total_cost,
+            'total_depreciation': total_depreciation,
+            'total_net_value': total_net_value,
+            'avg_cost': total_cost / self.rows if self.rows > 0 else 0,
+            'depreciation_rate': (total_depreciation / total_cost * 100) if total_cost > 0 else 0
+        }
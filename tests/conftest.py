@@ -0,0 +1,6 @@
+# -*- coding: utf-8 -*-
+"""إعداد الاختبارات: وحدات التطبيق في جذر المستودع"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
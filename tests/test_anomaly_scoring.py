@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""اختبارات كشف شذوذ الإهلاك مقارنةً بحساب مباشر لكل مجموعة ولكل أصل"""
+import numpy as np
+import pandas as pd
+import pytest
+
+import anomaly_scoring
+import config
+
+COLUMNS = config.COLUMN_MAPPING
+
+
+def _reference_zscores(values, groups, min_scale=0.0):
+    """الدرجات المتينة بحلقة على المجموعات بدوال numpy مباشرة"""
+    values, groups = np.asarray(values, dtype=float), np.asarray(groups)
+    z = np.full(len(values), np.nan)
+    for group in np.unique(groups):
+        members = groups == group
+        x = values[members]
+        deviation = np.abs(x - np.nanmedian(x))
+        scale = np.nanmedian(deviation) * 1.4826
+        if not scale > 0:
+            # MAD = 0 (أكثر من نصف القيم متطابقة): متوسط الانحراف المطلق
+            scale = np.nanmean(deviation) * 1.2533
+        scale = max(scale, min_scale) if not np.isnan(scale) else scale
+        z[members] = (x - np.nanmedian(x)) / scale if scale > 0 else 0.0
+    return z
+
+
+def test_robust_zscores_match_reference():
+    rng = np.random.default_rng(4)
+    values = rng.standard_t(3, size=500)
+    values[::37] = np.nan
+    groups = rng.choice(['a', 'b', 'c', 'd'], size=500)
+    for min_scale in (0.0, 0.5):
+        np.testing.assert_allclose(anomaly_scoring.robust_zscores(values, groups, min_scale),
+                                   _reference_zscores(values, groups, min_scale), equal_nan=True)
+
+
+def test_zero_mad_falls_back_to_mean_absolute_deviation():
+    # أغلب القيم متطابقة فـ MAD = 0، والقيمة المختلفة تبقى قابلة للكشف
+    values = np.array([1.0, 1.0, 1.0, 1.0, 1.0, 11.0])
+    z = anomaly_scoring.robust_zscores(values, np.zeros(6))
+    scale = np.mean(np.abs(values - 1.0)) * 1.2533
+    np.testing.assert_allclose(z, (values - 1.0) / scale)
+    np.testing.assert_allclose(z, _reference_zscores(values, np.zeros(6)))
+    # مجموعة بلا أي تباين، أو حد أدنى للمقام يطغى على الانحراف الضئيل
+    assert anomaly_scoring.robust_zscores([5.0] * 4, ['x'] * 4).tolist() == [0.0] * 4
+    assert anomaly_scoring.robust_zscores([0.0, 0.0, 0.0, 1e-6], [0] * 4, min_scale=0.01).max() < 1e-3
+
+
+@pytest.fixture
+def register():
+    rng = np.random.default_rng(5)
+    n = 400
+    cost = rng.uniform(1_000, 50_000, size=n).round(2)
+    life = rng.choice([3, 5, 10, np.nan], size=n)
+    service = pd.Timestamp('2015-01-01') + pd.to_timedelta(rng.integers(0, 3_600, size=n), 'D')
+    elapsed = (pd.Timestamp(config.EVENT_LOG_CONFIG['SNAPSHOT_DATE']) - service).days.to_numpy() / 365.25
+    accumulated = np.clip(cost * elapsed / np.nan_to_num(life, nan=5), 0, cost)
+    # بعض الأصول بإهلاك منحرف، وبعضها بصافي قيمة غير متسق
+    accumulated[::41] *= 0.2
+    nbv = cost - accumulated
+    nbv[::53] += 0.2 * cost[::53]
+    return pd.DataFrame({
+        COLUMNS['tag_number']: [f'{24000000 + i}' for i in range(n)],
+        COLUMNS['level1_arabic']: rng.choice(['حاسب', 'أثاث', None], size=n),
+        COLUMNS['cost']: cost,
+        COLUMNS['accumulated_depreciation']: -accumulated.round(2),  # حساب مقابل بإشارة سالبة
+        COLUMNS['residual_value']: 0.0,
+        COLUMNS['net_book_value']: nbv.round(2),
+        COLUMNS['useful_life']: life,
+        COLUMNS['date_in_service']: service,
+    })
+
+
+def test_scores_match_a_row_by_row_reference(register):
+    scores = anomaly_scoring.score_depreciation(register)
+    as_of = pd.Timestamp(config.EVENT_LOG_CONFIG['SNAPSHOT_DATE'])
+    gap_ratio, nbv_ratio, expected = [], [], []
+    for row in register.to_dict('records'):
+        cost, life = row[COLUMNS['cost']], row[COLUMNS['useful_life']]
+        accumulated = abs(row[COLUMNS['accumulated_depreciation']])
+        years = max((as_of - row[COLUMNS['date_in_service']]).days / 365.25, 0)
+        value = min(max(cost * years / life, 0), cost) if life > 0 else np.nan
+        expected.append(value)
+        gap_ratio.append((accumulated - value) / cost)
+        nbv_ratio.append((row[COLUMNS['net_book_value']] - (cost - accumulated)) / cost)
+    np.testing.assert_allclose(scores['Expected_Depreciation'], np.round(expected, 2), equal_nan=True)
+
+    groups = register[COLUMNS['level1_arabic']].fillna('غير محدد').to_numpy()
+    min_scale = config.ANOMALY_CONFIG['MIN_RATIO_SCALE']
+    mismatch = np.abs(scores['NBV_Gap'].to_numpy()) > config.ANOMALY_CONFIG['NBV_TOLERANCE']
+    depreciation_z = _reference_zscores(gap_ratio, groups, min_scale)
+    nbv_z = np.where(mismatch, _reference_zscores(np.where(mismatch, nbv_ratio, 0.0), groups, min_scale), 0.0)
+    np.testing.assert_allclose(scores['Depreciation_Z'], np.round(depreciation_z, 2), equal_nan=True)
+    np.testing.assert_allclose(scores['NBV_Z'], np.round(nbv_z, 2))
+    score = np.fmax(np.abs(depreciation_z), np.abs(nbv_z))
+    np.testing.assert_array_equal(scores['Is_Anomaly'], score >= config.ANOMALY_CONFIG['Z_THRESHOLD'])
+    # الانحرافات المزروعة تُكشف كلها
+    assert scores['Is_Anomaly'].iloc[::53].all()
+
+
+def test_worst_offenders_are_flagged_assets_by_descending_score(register):
+    scores = anomaly_scoring.score_depreciation(register)
+    worst = anomaly_scoring.worst_offenders(register, scores, limit=5)
+    flagged = scores[scores['Is_Anomaly']]
+    assert len(worst) == min(5, len(flagged))
+    assert worst['Anomaly_Score'].tolist() == sorted(flagged['Anomaly_Score'], reverse=True)[:len(worst)]
+    assert worst[COLUMNS['tag_number']].tolist() == register.loc[worst.index, COLUMNS['tag_number']].tolist()
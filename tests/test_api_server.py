@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""اختبارات ETag والضغط في واجهة الاستعلامات"""
+import asyncio
+import gzip
+import json
+
+import api_server
+
+
+class _Loader:
+    """محمّل جاهز بمرحلة ملخص واحدة"""
+
+    version = 'v1'
+    error = None
+
+    def __init__(self, summary):
+        self.summary = summary
+
+    def is_ready(self, key):
+        return True
+
+    def get(self, key, default=None):
+        return {'summary': self.summary, 'analyzer': _Analyzer()}.get(key, default)
+
+
+class _Analyzer:
+    def get_asset_details(self, tag):
+        return {'Tag number': tag} if tag == 'T1' else None
+
+    def get_assets_by_category(self):
+        raise KeyError('Cost')
+
+
+def _api(size):
+    return api_server.QueryAPI(_Loader({'notes': 'x' * size}))
+
+
+def test_gzip_and_identity_have_distinct_strong_etags():
+    api = _api(5_000)
+    _, plain, body = api.respond('/summary', {})
+    _, packed, packed_body = api.respond('/summary', {'accept-encoding': 'gzip'})
+    assert packed['Content-Encoding'] == 'gzip'
+    assert json.loads(gzip.decompress(packed_body)) == json.loads(body)
+    assert plain['ETag'] != packed['ETag']
+    assert not plain['ETag'].startswith('W/') and not packed['ETag'].startswith('W/')
+
+
+def test_conditional_requests_match_the_coding_the_client_accepts():
+    api = _api(5_000)
+    plain = api.respond('/summary', {})[1]['ETag']
+    packed = api.respond('/summary', {'accept-encoding': 'gzip'})[1]['ETag']
+
+    status, headers, body = api.respond('/summary', {'accept-encoding': 'gzip', 'if-none-match': packed})
+    assert (status, headers['ETag'], body) == (304, packed, b'')
+    # نسخة gzip لا تُعاد صالحة لعميل لا يقبل gzip
+    assert api.respond('/summary', {'if-none-match': packed})[0] == 200
+    assert api.respond('/summary', {'if-none-match': plain})[0] == 304
+
+
+def test_small_bodies_stay_identity_with_the_plain_etag():
+    api = _api(10)
+    _, headers, _ = api.respond('/summary', {'accept-encoding': 'gzip'})
+    assert 'Content-Encoding' not in headers
+    assert not headers['ETag'].endswith('-gz"')
+    assert api.respond('/summary', {'accept-encoding': 'gzip', 'if-none-match': headers['ETag']})[0] == 304
+
+
+def test_vary_header_is_always_sent():
+    response = api_server._encode_response(304, {'ETag': '"x-gz"'}, b'', keep_alive=True).decode('latin-1')
+    assert 'Vary: Accept-Encoding' in response
+
+
+def test_not_modified_only_for_existing_resources():
+    api = _api(10)
+    etag = api.respond('/assets/T1', {})[1]['ETag']
+    assert api.respond('/assets/T1', {'if-none-match': etag})[0] == 304
+    # مسار غير معروف أو أصل غير موجود: 404 حتى مع ETag يطابق الحساب
+    for path in ('/nowhere', '/assets/T2'):
+        status, headers, _ = api.respond(path, {})
+        assert api.respond(path, {'if-none-match': headers['ETag']})[0] == status == 404
+
+
+def _exchange(api, request):
+    async def run():
+        server = await asyncio.start_server(api_server.make_handler(api), '127.0.0.1', 0)
+        async with server:
+            reader, writer = await asyncio.open_connection(*server.sockets[0].getsockname()[:2])
+            writer.write(request)
+            await writer.drain()
+            response = await reader.read()
+            writer.close()
+            return response
+    return asyncio.run(run())
+
+
+def test_unexpected_errors_become_a_500_response():
+    response = _exchange(_api(10), b'GET /categories HTTP/1.1\r\nConnection: close\r\n\r\n')
+    head, _, body = response.partition(b'\r\n\r\n')
+    assert head.startswith(b'HTTP/1.1 500 ')
+    assert json.loads(body) == {'error': "'Cost'"}
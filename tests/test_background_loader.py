@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""اختبارات جمع رسائل المعالجة خارج سياق streamlit"""
+import logging
+import threading
+
+import pandas as pd
+
+import asset_models
+import background_loader
+import query_cache
+
+
+def test_collector_keeps_messages_from_accepted_threads_only():
+    logger = logging.getLogger('asset_models')
+    with background_loader.MessageCollector.for_current_thread() as collector:
+        logger.error('here')
+        worker = threading.Thread(target=logger.error, args=('elsewhere',))
+        worker.start()
+        worker.join()
+    logger.error('after exit')
+    assert collector.messages == [('ERROR', 'here')]
+
+
+def test_analyzer_errors_are_logged_not_drawn():
+    # إطار بلا الأعمدة المتوقعة: التحليل يفشل ويُسجِّل الخطأ بدلاً من st.error
+    analyzer = asset_models.AssetAnalyzer(pd.DataFrame({'Level 1 FA Module - English Description': ['IT']}), version='v',
+                                          cache=query_cache.QueryCache())
+    with background_loader.MessageCollector.for_current_thread() as collector:
+        result = analyzer.get_assets_by_category()
+    assert result.empty
+    assert [level for level, _ in collector.messages] == ['ERROR']
+
+
+class _Analyzer:
+    """محلل بديل: كل تجميع يعيد اسمه، و by_category ينتظر إشارة خارجية"""
+    release = None
+
+    def __init__(self, df, **kwargs):
+        self.df = df
+
+    def get_summary_stats(self):
+        return {'rows': len(self.df)}
+
+    def get_assets_by_category(self):
+        if self.release is not None and not self.release.wait(5):
+            raise TimeoutError('by_category never released')
+        return 'by_category'
+
+    def __getattr__(self, name):
+        if name.startswith('get_'):
+            return lambda: name
+        raise AttributeError(name)
+
+    def warm_cache(self):
+        pass
+
+
+def _loader(monkeypatch, max_workers, analyzer=_Analyzer):
+    processor = background_loader.data_processor.DataProcessor
+    monkeypatch.setitem(background_loader.config.STORE_CONFIG, 'ENABLED', False)
+    monkeypatch.setattr(processor, 'source_version', staticmethod(lambda *args: 'v1'))
+    monkeypatch.setattr(processor, 'load_data', staticmethod(lambda *args: pd.DataFrame({'a': [1, 2]})))
+    monkeypatch.setattr(processor, 'preprocess_data', lambda self, df: df)
+    monkeypatch.setattr(processor, 'calculate_additional_metrics', staticmethod(lambda df: df))
+    monkeypatch.setattr(processor, 'standardize_column_aliases', lambda self, df: df)
+    monkeypatch.setattr(asset_models, 'AssetAnalyzer', analyzer)
+    return background_loader.BackgroundLoader('unused.xlsx', 'sheet', max_workers=max_workers)
+
+
+def test_single_worker_loader_completes(monkeypatch):
+    loader = _loader(monkeypatch, max_workers=1).start()
+    assert loader.wait('cross_filter', timeout=5)
+    loader._thread.join(5)
+    assert loader.error is None and loader.done
+    assert loader.get('summary') == {'rows': 2}
+    assert loader.get('geo') == 'get_geo_index'
+
+
+def test_aggregates_are_published_as_they_finish(monkeypatch):
+    release = threading.Event()
+    analyzer = type('Blocking', (_Analyzer,), {'release': release})
+    loader = _loader(monkeypatch, max_workers=3, analyzer=analyzer).start()
+    try:
+        # by_category لم ينتهِ بعد، والتجميعات التالية له تُنشر دون انتظاره
+        assert loader.wait('by_location', timeout=5)
+        assert loader.wait('search', timeout=5)
+        assert not loader.is_ready('by_category')
+    finally:
+        release.set()
+    assert loader.wait('by_category', timeout=5)
+    assert loader.get('by_category') == 'by_category'
+
+
+def test_load_error_releases_every_milestone(monkeypatch):
+    loader = _loader(monkeypatch, max_workers=2)
+    monkeypatch.setattr(background_loader.data_processor.DataProcessor, 'load_data',
+                        staticmethod(lambda *args: (_ for _ in ()).throw(OSError('locked'))))
+    loader.start()
+    assert loader.wait('cross_filter', timeout=5)
+    assert isinstance(loader.error, OSError)
+    assert loader.done
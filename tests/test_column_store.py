@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""اختبارات مخزن الأعمدة المربوط بالذاكرة"""
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+import asset_models
+import column_store
+import query_cache
+
+
+def _frame():
+    return pd.DataFrame({
+        'Cost': [1000.5, np.nan, 250.0],
+        'Quantity': np.array([1, 2, 3], dtype='int64'),
+        'Date Placed in Service': pd.to_datetime(['2020-01-01', None, '2023-12-30']),
+        'Asset Description': pd.array(['مكتب', None, 'Laptop'], dtype='string'),
+        'City': pd.Categorical(['جدة', 'الرياض', None]),
+        'Disposed': [True, False, True],
+    }, index=[10, 11, 12])
+
+
+def test_round_trip_preserves_values_and_index(tmp_path):
+    df = _frame()
+    column_store.save(df, tmp_path, 'v1')
+    loaded = column_store.open_frame(tmp_path, 'v1')
+    assert loaded.index.tolist() == [10, 11, 12]
+    np.testing.assert_array_equal(loaded['Cost'], df['Cost'])
+    np.testing.assert_array_equal(loaded['Quantity'], df['Quantity'])
+    assert loaded['Date Placed in Service'].dtype == df['Date Placed in Service'].dtype
+    assert loaded['Date Placed in Service'].isna().tolist() == [False, True, False]
+    assert loaded['Date Placed in Service'].iloc[2] == pd.Timestamp('2023-12-30')
+    # النصوص والفئات تُفتح فئات بقاموس القيم
+    assert loaded['Asset Description'].astype(object).where(loaded['Asset Description'].notna(), None).tolist() \
+        == ['مكتب', None, 'Laptop']
+    assert isinstance(loaded['City'].dtype, pd.CategoricalDtype)
+    assert loaded['City'].isna().tolist() == [False, False, True]
+    assert loaded['Disposed'].tolist() == [1.0, 0.0, 1.0]
+
+
+def test_columns_are_memory_mapped_read_only(tmp_path):
+    column_store.save(_frame(), tmp_path, 'v1')
+    loaded = column_store.open_frame(tmp_path, 'v1')
+    values = loaded['Cost'].to_numpy()
+    assert not values.flags.writeable
+
+
+def _memory_mapped(array):
+    while array is not None:
+        if isinstance(array, np.memmap):
+            return True
+        array = getattr(array, 'base', None)
+    return False
+
+
+def test_text_dictionaries_are_mapped_files_not_manifest_lists(tmp_path):
+    df = _frame().assign(**{'Tag number': ['24003954', '24003955', '24003956']})
+    column_store.save(df, tmp_path, 'v1')
+    with open(os.path.join(column_store.store_path(tmp_path, 'v1'), column_store.MANIFEST), encoding='utf-8') as f:
+        entries = {entry['name']: entry for entry in json.load(f)['columns']}
+    assert all('categories' not in entries[name] and 'dictionary' in entries[name]
+               for name in ('Tag number', 'Asset Description', 'City'))
+
+    loaded = column_store.open_frame(tmp_path, 'v1')
+    categories = loaded['Tag number'].cat.categories
+    # القاموس مصفوفة نصوص Arrow فوق الملف، لا Index من كائنات بايثون
+    assert isinstance(categories.array, pd.arrays.ArrowStringArray)
+    assert categories.tolist() == ['24003954', '24003955', '24003956']
+    assert _memory_mapped(loaded['Tag number'].cat.codes.array._ndarray)
+
+
+def test_analyzer_keeps_mapped_dates(tmp_path):
+    column_store.save(_frame(), tmp_path, 'v1')
+    loaded = column_store.open_frame(tmp_path, 'v1')
+    asset_models.AssetAnalyzer(loaded, version='v1', cache=query_cache.QueryCache())
+    assert _memory_mapped(loaded['Date Placed in Service'].to_numpy())
+
+
+def test_missing_or_stale_versions_are_not_opened(tmp_path):
+    assert column_store.open_frame(tmp_path, 'nope') is None
+    column_store.save(_frame(), tmp_path, 'v1')
+    manifest = os.path.join(column_store.store_path(tmp_path, 'v1'), column_store.MANIFEST)
+    with open(manifest, encoding='utf-8') as f:
+        data = json.load(f)
+    data['format'] = column_store.FORMAT + 1
+    with open(manifest, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    assert column_store.open_frame(tmp_path, 'v1') is None
+    # حفظ نفس الإصدار يستبدل النسخة القديمة
+    column_store.save(_frame(), tmp_path, 'v1')
+    assert column_store.open_frame(tmp_path, 'v1')['Cost'].iloc[0] == 1000.5
+
+
+def test_save_is_idempotent_and_leaves_no_staging_folders(tmp_path):
+    column_store.save(_frame(), tmp_path, 'v1')
+    column_store.save(_frame().assign(Cost=0.0), tmp_path, 'v1')
+    assert sorted(os.listdir(tmp_path)) == ['v1']
+    assert column_store.open_frame(tmp_path, 'v1')['Cost'].iloc[0] == 1000.5
+
+
+def test_prune_keeps_the_newest_versions(tmp_path):
+    for version in ('a', 'b', 'c'):
+        column_store.save(_frame(), tmp_path, version)
+        time.sleep(0.01)
+        os.utime(column_store.store_path(tmp_path, version))
+    assert sorted(column_store.prune(tmp_path, keep=2)) == ['a']
+    assert sorted(os.listdir(tmp_path)) == ['b', 'c']
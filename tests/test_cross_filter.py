@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""اختبارات التصفية المتقاطعة مقارنةً بتصفية pandas المباشرة"""
+import numpy as np
+import pandas as pd
+import pytest
+
+import asset_records
+from cross_filter import CrossFilter
+
+CITY = asset_records.ALL_FIELDS['city']
+CUSTODIAN = asset_records.ALL_FIELDS['custodian']
+COST = asset_records.ALL_FIELDS['cost']
+NBV = asset_records.ALL_FIELDS['net_book_value']
+
+
+@pytest.fixture
+def register():
+    # 130 صفاً: أكثر من كلمتين من 64 بت مع كلمة أخيرة ناقصة
+    rng = np.random.default_rng(7)
+    n = 130
+    df = pd.DataFrame({
+        CITY: rng.choice(['Riyadh', 'Jeddah', 'Dammam', None], size=n),
+        CUSTODIAN: rng.choice(['IT', 'Finance', 'HR'], size=n),
+        COST: rng.uniform(100, 10_000, size=n).round(2),
+        NBV: rng.uniform(0, 5_000, size=n).round(2),
+    })
+    df.loc[::11, COST] = np.nan
+    return df
+
+
+def _baseline(df, selections, exclude=None):
+    keep = pd.Series(True, index=df.index)
+    for key, selected in selections.items():
+        if key != exclude and selected:
+            keep &= df[asset_records.ALL_FIELDS[key]].isin(selected)
+    return df[keep]
+
+
+SELECTIONS = [
+    {},
+    {'city': ['Riyadh']},
+    {'city': ['Riyadh', 'Dammam'], 'custodian': ['IT']},
+    {'custodian': ['HR', 'Finance'], 'city': ['Jeddah']},
+    {'city': ['Nowhere']},
+]
+
+
+@pytest.mark.parametrize('selections', SELECTIONS)
+def test_totals_match_pandas(register, selections):
+    cross = CrossFilter(register, dimensions=['city', 'custodian'], measures=['cost', 'net_book_value'])
+    expected = _baseline(register, selections)
+    totals = cross.totals(selections)
+    assert totals['count'] == len(expected)
+    assert totals['cost'] == pytest.approx(expected[COST].sum())
+    assert totals['net_book_value'] == pytest.approx(expected[NBV].sum())
+    assert cross.count(cross.mask(selections)) == len(expected)
+    assert cross.rows(cross.mask(selections)).tolist() == expected.index.tolist()
+
+
+@pytest.mark.parametrize('selections', SELECTIONS)
+@pytest.mark.parametrize('key', ['city', 'custodian'])
+def test_aggregate_ignores_own_dimension(register, selections, key):
+    cross = CrossFilter(register, dimensions=['city', 'custodian'], measures=['cost'])
+    column = asset_records.ALL_FIELDS[key]
+    expected = (_baseline(register, selections, exclude=key).groupby(column)[COST]
+                .agg(Count='size', Total='sum').round(2))
+    result = cross.aggregate(key, selections)
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+
+def test_missing_dimension_is_skipped(register):
+    cross = CrossFilter(register.drop(columns=[CUSTODIAN]), dimensions=['city', 'custodian'], measures=['cost'])
+    assert 'custodian' not in cross.bitmaps
+    assert cross.totals({'custodian': ['IT']})['count'] == len(register)
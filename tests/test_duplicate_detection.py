@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""اختبارات كشف الأصول المكررة تقريبياً"""
+import itertools
+
+import numpy as np
+import pandas as pd
+
+import config
+import duplicate_detection
+import search_engine
+
+DESCRIPTION = config.COLUMN_MAPPING['asset_description_en']
+MANUFACTURER = config.COLUMN_MAPPING['manufacturer']
+COST = config.COLUMN_MAPPING['cost']
+TAG = config.COLUMN_MAPPING['tag_number']
+
+
+def _register():
+    rows = [
+        # زوج مكرر: نفس الأصل بوصفين متقاربين
+        ('Dell Latitude 5420 Laptop Core i7', 'Dell', 5200.0, 2021),
+        ('Dell Latitude 5420 Laptop Core-i7.', 'Dell', 5230.0, 2021),
+        # نفس الوصف لكن شركة مصنعة أخرى: كتلة مختلفة
+        ('Dell Latitude 5420 Laptop Core i7', 'HP', 5200.0, 2021),
+        # نفس الوصف لكن تكلفة بعيدة
+        ('Dell Latitude 5420 Laptop Core i7', 'Dell', 15000.0, 2021),
+        # أوصاف مختلفة في نفس الكتلة
+        ('Office desk wooden 160cm', 'Dell', 5210.0, 2021),
+        ('Projector Epson EB-X51', 'Dell', 5205.0, 2021),
+    ]
+    # شراء بالجملة: 30 أصلاً متطابقاً
+    rows += [('Office chair ergonomic black', 'Ikea', 800.0, 2020)] * 30
+    df = pd.DataFrame(rows, columns=[DESCRIPTION, MANUFACTURER, COST, 'Service_Year'])
+    df[TAG] = [f'T{i:04d}' for i in range(len(df))]
+    return df
+
+
+def test_finds_the_near_duplicate_pair_only():
+    df = _register()
+    result = duplicate_detection.find_near_duplicates(df)
+    assert sorted(result[TAG]) == ['T0000', 'T0001']
+    assert result['Cluster_ID'].nunique() == 1
+    assert (result['Duplicate_Score'] >= config.DUPLICATE_CONFIG['THRESHOLD']).all()
+
+
+def test_bulk_purchases_are_dropped_by_cluster_size(monkeypatch):
+    df = _register()
+    monkeypatch.setitem(config.DUPLICATE_CONFIG, 'MAX_CLUSTER_SIZE', None)
+    result = duplicate_detection.find_near_duplicates(df)
+    assert result.groupby('Cluster_ID').size().sort_values().tolist() == [2, 30]
+
+
+def test_candidate_pairs_recall_against_brute_force(monkeypatch):
+    monkeypatch.setitem(config.DUPLICATE_CONFIG, 'MAX_CLUSTER_SIZE', None)
+    rng = np.random.default_rng(5)
+    words = ['laptop', 'desk', 'chair', 'printer', 'router', 'monitor', 'cabinet', 'scanner', 'phone', 'table']
+    base = [' '.join(rng.choice(words, size=4)) + f' model {i}' for i in range(60)]
+    descriptions = base + [text.replace('model', 'model no') for text in base[:30]]
+    df = pd.DataFrame({DESCRIPTION: descriptions, MANUFACTURER: 'Acme', COST: 1000.0, 'Service_Year': 2022})
+
+    # خط الأساس: Jaccard الدقيق على المقاطع الثلاثية لكل الأزواج
+    grams = [set(search_engine.trigrams(text)) for text in search_engine.normalize_text(df[DESCRIPTION]).tolist()]
+    expected = {(i, j) for i, j in itertools.combinations(range(len(df)), 2)
+                if len(grams[i] & grams[j]) / len(grams[i] | grams[j]) >= 0.8}
+    result = duplicate_detection.find_near_duplicates(df, threshold=0.5)
+    cluster = result['Cluster_ID'].to_dict()
+    assert expected
+    assert all(i in cluster and cluster.get(i) == cluster.get(j) for i, j in expected)
+
+
+def test_connected_components():
+    labels = duplicate_detection.connected_components(6, np.array([0, 1, 4]), np.array([1, 2, 5]))
+    assert labels.tolist() == [0, 0, 0, 3, 4, 4]
+
+
+def test_empty_and_missing_descriptions():
+    assert duplicate_detection.find_near_duplicates(pd.DataFrame()).empty
+    df = pd.DataFrame({DESCRIPTION: [None, ''], MANUFACTURER: 'A', COST: 1.0, 'Service_Year': 2020})
+    assert duplicate_detection.find_near_duplicates(df).empty
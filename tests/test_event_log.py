@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""اختبارات سجل أحداث الأصول: العرض الحالي، الأحداث بتاريخ سابق، ونقاط الحفظ"""
+import pandas as pd
+import pytest
+
+import config
+import event_log
+
+
+@pytest.fixture
+def log(tmp_path):
+    log = event_log.EventLog(str(tmp_path / 'events.sqlite'))
+    yield log
+    log.close()
+
+
+def _state(log, tag, **kwargs):
+    frame = log.current_state(**kwargs)
+    return frame[frame['tag'] == tag].iloc[0]
+
+
+def test_events_update_the_current_view(log):
+    log.append('add', 'T1', '2020-01-01', cost=1000.0, depreciation=200.0, custodian='IT', city='جدة')
+    log.append('transfer', 'T1', '2021-01-01', custodian='HR')
+    log.append('revalue', 'T1', '2022-01-01', impairment=300.0)
+    state = _state(log, 'T1')
+    assert (state['custodian'], state['city']) == ('HR', 'جدة')
+    assert state['nbv'] == 500.0 and state['impairment'] == 300.0
+
+    log.append('dispose', 'T1', '2023-01-01', proceeds=50)
+    assert log.current_state().empty
+    disposed = _state(log, 'T1', include_disposed=True)
+    assert (disposed['status'], disposed['nbv'], disposed['proceeds']) == ('disposed', 0.0, 50.0)
+    assert log.history('T1')['event_type'].tolist() == ['add', 'transfer', 'revalue', 'dispose']
+
+
+def test_backdated_event_replays_the_asset(log):
+    log.append('add', 'T1', '2020-01-01', cost=1000.0, depreciation=0.0)
+    log.append('transfer', 'T1', '2022-01-01', city='الرياض')
+    # إعادة تقييم بتاريخ سابق للنقل: تُعاد أحداث الأصل بالترتيب الزمني
+    log.append('revalue', 'T1', '2021-06-01', cost=1200.0, nbv=1200.0)
+    state = _state(log, 'T1')
+    assert (state['cost'], state['nbv'], state['city']) == (1200.0, 1200.0, 'الرياض')
+    assert state['last_date'] == '2022-01-01'
+
+
+def test_state_as_of_matches_with_and_without_checkpoints(log):
+    log.append_many([
+        dict(event_type='add', tag='A', event_date='2020-01-01', cost=100.0),
+        dict(event_type='add', tag='B', event_date='2020-06-01', cost=200.0),
+        dict(event_type='dispose', tag='A', event_date='2021-03-01'),
+        dict(event_type='transfer', tag='B', event_date='2022-01-01', custodian='OPS'),
+    ])
+    before = {day: log.state_as_of(day, include_disposed=True) for day in ('2020-03-01', '2021-12-31', '2023-01-01')}
+    log.checkpoint('2021-06-30')
+    for day, expected in before.items():
+        after = log.state_as_of(day, include_disposed=True)
+        pd.testing.assert_frame_equal(after.sort_values('tag').reset_index(drop=True),
+                                      expected.sort_values('tag').reset_index(drop=True), check_dtype=False)
+    assert log.state_as_of('2020-03-01')['tag'].tolist() == ['A']
+    assert log.state_as_of('2021-12-31')['tag'].tolist() == ['B']
+
+
+def test_backdated_event_invalidates_later_checkpoints(log):
+    log.append('add', 'A', '2020-01-01', cost=100.0)
+    log.checkpoint('2021-01-01')
+    log.append('transfer', 'A', '2020-06-01', city='جدة')
+    assert log._conn.execute('SELECT COUNT(*) FROM checkpoints').fetchone()[0] == 0
+    assert log.state_as_of('2021-01-01')['city'].tolist() == ['جدة']
+
+
+def test_invalid_events_are_rejected_atomically(log):
+    with pytest.raises(ValueError):
+        log.append_many([dict(event_type='add', tag='A', event_date='2020-01-01', cost=1.0),
+                         dict(event_type='bogus', tag='A', event_date='2020-02-01')])
+    assert len(log) == 0
+    with pytest.raises(ValueError):
+        log.append('transfer', 'missing', '2020-01-01', city='جدة')
+    assert len(log) == 0
+
+
+def test_seed_records_acquisition_then_snapshot_values(log):
+    columns = config.COLUMN_MAPPING
+    df = pd.DataFrame({
+        columns['tag_number']: ['24003954', '24003955'],
+        columns['asset_description_en']: ['Laptop', 'Desk'],
+        columns['level1_english']: ['IT', 'Furniture'],
+        columns['custodian']: ['IT', 'HR'],
+        columns['city']: ['جدة', 'الرياض'],
+        columns['date_in_service']: pd.to_datetime(['2022-11-01', None]),
+        columns['cost']: [23000.0, 800.0],
+        columns['depreciation_amount']: [4600.0, 80.0],  # القسط السنوي، لا المتراكم
+        columns['accumulated_depreciation']: [-5015.89, -800.0],
+        columns['net_book_value']: [17984.11, 0.0],
+    })
+    log.seed_from_frame(df, as_of='2023-12-30')
+
+    snapshot = log.state_as_of('2023-12-30').set_index('tag')
+    assert snapshot.loc['24003954', 'depreciation'] == 5015.89
+    assert snapshot.loc['24003954', 'nbv'] == 17984.11
+    assert snapshot.loc['24003955', 'nbv'] == 0.0
+
+    # قبل تاريخ اللقطة: الأصل بتكلفة الاقتناء فقط، والأصل بلا تاريخ خدمة لم يُضف بعد
+    earlier = log.state_as_of('2023-06-30').set_index('tag')
+    assert earlier.index.tolist() == ['24003954']
+    assert (earlier.loc['24003954', 'cost'], earlier.loc['24003954', 'depreciation'],
+            earlier.loc['24003954', 'nbv']) == (23000.0, 0.0, 23000.0)
+    assert log.state_as_of('2022-10-31').empty
+    assert log.history('24003954')['event_date'].tolist() == ['2022-11-01', '2023-12-30']
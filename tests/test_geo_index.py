@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""اختبارات الفهرس المكاني مقارنةً بالبحث الشامل على كل النقاط"""
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import config
+import geo_index
+
+COLUMNS = config.COLUMN_MAPPING
+
+
+def _dms(value, positive, negative):
+    hemisphere = positive if value >= 0 else negative
+    value = abs(value)
+    degrees, minutes = int(value), int(value * 60 % 60)
+    seconds = value * 3600 - degrees * 3600 - minutes * 60
+    return f'{degrees}°{minutes}\'{seconds:.4f}"{hemisphere}'
+
+
+@pytest.fixture
+def points():
+    rng = np.random.default_rng(11)
+    n = 2_000
+    centers = np.array([[21.54, 39.17], [24.71, 46.68], [26.42, 50.09]])
+    lat, lon = (centers[rng.integers(0, 3, size=n)] + rng.normal(scale=0.3, size=(n, 2))).T
+    text = [f'{a:.6f}, {b:.6f}' for a, b in zip(lat, lon)]
+    for i in range(0, n, 7):
+        text[i] = f'{_dms(lat[i], "N", "S")} {_dms(lon[i], "E", "W")}'
+    for i in range(3, n, 50):
+        text[i] = None if i % 100 == 3 else '95.0, 39.0'  # مفقود أو خارج النطاق
+    df = pd.DataFrame({COLUMNS['coordinates']: text, COLUMNS['cost']: rng.uniform(0, 1_000, size=n)})
+    df.attrs['source'] = (lat, lon)
+    return df, geo_index.GeoIndex(df)
+
+
+def _brute_haversine(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * geo_index.EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def test_parsed_coordinates_match_the_source(points):
+    df, index = points
+    invalid = df[COLUMNS['coordinates']].isna() | df[COLUMNS['coordinates']].str.startswith('95', na=False)
+    assert (~index.valid).tolist() == invalid.tolist()
+    # العشرية بست خانات، والدرجات/الدقائق/الثواني بأجزاء الثانية
+    lat, lon = df.attrs['source']
+    np.testing.assert_allclose(index.lat[index.valid], lat[index.valid], atol=1e-6)
+    np.testing.assert_allclose(index.lon[index.valid], lon[index.valid], atol=1e-6)
+    parsed = geo_index.parse_coordinates(pd.Series(['21°30\'0"S 39°15\'36"W', '21.5،39.26', 'x']))
+    np.testing.assert_allclose(parsed, [[-21.5, 21.5, np.nan], [-39.26, 39.26, np.nan]])
+
+
+@pytest.mark.parametrize('lat, lon, radius', [(21.54, 39.17, 5), (24.71, 46.68, 40), (24.0, 44.0, 600),
+                                              (26.42, 50.09, 0.5), (0.0, 0.0, 10)])
+def test_radius_query_matches_brute_force(points, lat, lon, radius):
+    _, index = points
+    rows, distances = index.within_radius(lat, lon, radius)
+    expected = {row: _brute_haversine(lat, lon, index.lat[row], index.lon[row])
+                for row in np.flatnonzero(index.valid)}
+    expected = {row: d for row, d in expected.items() if d <= radius}
+    assert sorted(rows.tolist()) == sorted(expected)
+    np.testing.assert_allclose(distances, [expected[row] for row in rows])
+    assert (np.diff(distances) >= 0).all()
+
+
+@pytest.mark.parametrize('bbox', [(21.4, 39.0, 21.7, 39.3), (20.0, 38.0, 27.0, 51.0), (24.7, 46.6, 24.71, 46.61),
+                                  (30.0, 30.0, 31.0, 31.0)])
+def test_bbox_query_matches_brute_force(points, bbox):
+    _, index = points
+    min_lat, min_lon, max_lat, max_lon = bbox
+    expected = [row for row in range(len(index.lat))
+                if index.valid[row] and min_lat <= index.lat[row] <= max_lat and min_lon <= index.lon[row] <= max_lon]
+    assert index.within_bbox(*bbox).tolist() == expected
+
+
+def test_tiles_match_a_groupby_on_mercator_tiles(points):
+    _, index = points
+    zoom = 8
+    n = 2 ** zoom
+    rows = np.flatnonzero(index.valid)
+    frame = pd.DataFrame({'lat': index.lat[rows], 'lon': index.lon[rows], 'Cost': index.cost[rows]})
+    frame['x'] = [int((lon + 180) / 360 * n) for lon in frame['lon']]
+    frame['y'] = [int((1 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2 * n) for lat in frame['lat']]
+    expected = frame.groupby(['x', 'y']).agg(lat=('lat', 'mean'), lon=('lon', 'mean'), Count=('lat', 'size'),
+                                             Cost=('Cost', 'sum')).reset_index()
+    tiles = index.tiles[zoom].sort_values(['x', 'y']).reset_index(drop=True)
+    pd.testing.assert_frame_equal(tiles[expected.columns], expected, check_dtype=False)
+    assert tiles['Count'].sum() == index.valid.sum()
+    # أقرب مستوى مُجمَّع مسبقاً، والتقييد بالمستطيل على مراكز البلاطات
+    assert index.clusters(9)['zoom'].iloc[0] == 8
+    clipped = index.clusters(8, bbox=(21.0, 38.5, 22.0, 40.0))
+    assert clipped['lat'].between(21.0, 22.0).all() and len(clipped) < len(tiles)
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""اختبارات التصنيف الهرمي مقارنةً بتجميع pandas المباشر"""
+import numpy as np
+import pandas as pd
+import pytest
+
+import config
+import hierarchy
+
+COLUMNS = config.COLUMN_MAPPING
+CODES = [COLUMNS[hierarchy.LEVEL_KEYS[lvl][0]] for lvl in config.HIERARCHY_CONFIG['LEVELS']]
+VALUES = [COLUMNS[key] for key in hierarchy.VALUE_KEYS]
+
+
+@pytest.fixture
+def register():
+    rng = np.random.default_rng(11)
+    n = 400
+    level1 = rng.choice(['13', '19', '20'], size=n)
+    return pd.DataFrame({
+        CODES[0]: rng.choice([1, '01', 2], size=n),  # رموز مختلطة تتوحد إلى '01' و'02'
+        CODES[1]: level1,
+        CODES[2]: rng.choice(['01', '02', '12'], size=n),
+        CODES[3]: rng.choice(['03', '05', None], size=n),
+        COLUMNS['level1_english']: pd.Series(level1).map({'13': 'IT', '19': 'Lab', '20': None}),
+        COLUMNS['level1_arabic']: pd.Series(level1).map({'13': 'تقنية', '19': 'مختبرات', '20': None}),
+        VALUES[0]: rng.uniform(100, 10_000, size=n).round(2),
+        VALUES[1]: rng.uniform(0, 5_000, size=n).round(2),
+        VALUES[2]: rng.uniform(0, 1_000, size=n).round(2),
+    })
+
+
+def _baseline(df, depth):
+    codes = pd.DataFrame({f'c{i}': hierarchy._normalize_codes(df[col]) for i, col in enumerate(CODES[:depth])})
+    grouped = codes.join(df[VALUES]).groupby(list(codes.columns))
+    totals = grouped[VALUES].sum()
+    totals['Count'] = grouped.size()
+    return totals
+
+
+@pytest.mark.parametrize('depth', [1, 2, 3, 4])
+def test_rollups_match_groupby_at_every_level(register, depth):
+    tree = hierarchy.CategoryHierarchy(register)
+    expected = _baseline(register, depth)
+    for key, row in expected.iterrows():
+        path = key if isinstance(key, tuple) else (key,)
+        node = tree.node(path)
+        assert node['Count'] == row['Count']
+        for column in VALUES:
+            assert node[column] == pytest.approx(row[column])
+    assert len(tree.level(depth)) == len(expected)
+    root = tree.node(())
+    assert root['Count'] == len(register)
+    assert root[VALUES[0]] == pytest.approx(register[VALUES[0]].sum())
+
+
+def test_drilldown_lists_children_by_cost(register):
+    tree = hierarchy.CategoryHierarchy(register)
+    parent = ('01', '13')
+    children = tree.children(parent)
+    expected = _baseline(register, 3).loc[parent].sort_values(VALUES[0], ascending=False)
+    assert children[VALUES[0]].to_numpy() == pytest.approx(expected[VALUES[0]].to_numpy())
+    assert children['Count'].tolist() == expected['Count'].tolist()
+    assert tree.parent(parent) == ('01',)
+    assert tree.children(('01', '13', '01', '03')).empty
+
+
+def test_missing_names_fall_back_to_asset_categories_by_path(register):
+    tree = hierarchy.CategoryHierarchy(register)
+    category = config.ASSET_CATEGORIES['20']
+    # level1 على عمق 2 (تحت accounting_group) ومفتاحه مسار لا رمز
+    assert (tree.node(('01', '20'))['name_en'], tree.node(('01', '20'))['name_ar']) == \
+        (category['name_en'], category['name_ar'])
+    assert tree.node(('01', '13'))['name_en'] == 'IT'  # الاسم الموجود في الملف يبقى
+    lab = config.ASSET_CATEGORIES['19']['subcategories']['12']
+    assert (tree.node(('01', '19', '12'))['name_en'], tree.node(('01', '19', '12'))['name_ar']) == \
+        (lab['name_en'], lab['name_ar'])
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""اختبارات مطابقة الجرد مقارنةً بمعالجة المسوحات مسحاً بمسح"""
+import numpy as np
+import pandas as pd
+import pytest
+
+import config
+import inventory_reconciliation as inventory
+
+COLUMNS = config.COLUMN_MAPPING
+LABELS = config.INVENTORY_CONFIG['STATUS_LABELS']
+SCAN = config.INVENTORY_CONFIG['SCAN_COLUMNS']
+
+
+@pytest.fixture
+def register():
+    n = 60
+    rng = np.random.default_rng(8)
+    return pd.DataFrame({
+        COLUMNS['tag_number']: [f'{24000000 + i}' for i in range(n)],
+        COLUMNS['city']: rng.choice(['جدة', 'الرياض'], size=n),
+        COLUMNS['custodian']: rng.choice(['IT', 'HR', None], size=n),
+        COLUMNS['building_number']: rng.choice(['B1', 'B2', None], size=n),
+        COLUMNS['room_number']: rng.choice([101, 102], size=n).astype(float),  # 101.0 = '101'
+        COLUMNS['cost']: rng.uniform(100, 1_000, size=n).round(2),
+    })
+
+
+@pytest.fixture
+def scans():
+    rng = np.random.default_rng(9)
+    n = 150
+    tags = rng.choice([f'{24000000 + i}' for i in range(45)] + ['99000001', '99000002'], size=n)
+    return pd.DataFrame({
+        SCAN['tag']: [f' {t.lower()} ' if i % 9 == 0 else t for i, t in enumerate(tags)],
+        SCAN['building']: rng.choice(['b1', 'B2'], size=n),
+        SCAN['room']: rng.choice(['101', '102.0', '103'], size=n),
+        # أوقات فريدة بترتيب عشوائي: إعادة المسح قد تصل قبل المسح الأقدم
+        SCAN['timestamp']: (pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.permutation(n), 'min')).astype(str),
+    })
+
+
+def _reference(register, scans):
+    """آخر مسح (بالوقت) لكل بطاقة وعدد مسوحاتها، بحلقة عادية"""
+    latest, counts = {}, {}
+    for row in scans.to_dict('records'):
+        tag = row[SCAN['tag']].strip().upper()
+        counts[tag] = counts.get(tag, 0) + 1
+        time = pd.Timestamp(row[SCAN['timestamp']])
+        if tag not in latest or time >= latest[tag][2]:
+            latest[tag] = (row[SCAN['building']].upper(), row[SCAN['room']].replace('.0', ''), time)
+    status = {}
+    for row in register.to_dict('records'):
+        tag = row[COLUMNS['tag_number']]
+        if tag not in latest:
+            status[tag] = LABELS['missing']
+            continue
+        building, room, _ = latest[tag]
+        building_number, room_number = row[COLUMNS['building_number']], row[COLUMNS['room_number']]
+        registered = (None if pd.isna(building_number) else building_number,
+                      None if pd.isna(room_number) else str(int(room_number)))
+        wrong = any(r is not None and r != s for r, s in zip(registered, (building, room)))
+        status[tag] = LABELS['wrong_location'] if wrong else LABELS['found']
+    unexpected = {tag: latest[tag] + (counts[tag],) for tag in latest
+                  if tag not in set(register[COLUMNS['tag_number']])}
+    return status, counts, unexpected
+
+
+@pytest.mark.parametrize('chunksize', [7, 1000])
+def test_reconciliation_matches_scan_by_scan_reference(register, scans, tmp_path, chunksize):
+    path = tmp_path / 'scans.csv'
+    scans.to_csv(path, index=False)
+    reconciliation = inventory.InventoryReconciliation(register)
+    assert reconciliation.ingest(str(path), chunksize=chunksize) == len(scans)
+
+    status, counts, unexpected = _reference(register, scans)
+    assets = reconciliation.assets().set_index(COLUMNS['tag_number'])
+    assert assets['Inventory_Status'].to_dict() == status
+    assert assets['Scan_Count'].to_dict() == {tag: counts.get(tag, 0) for tag in status}
+
+    extra = reconciliation.unexpected_scans().set_index('Tag')
+    assert set(extra.index) == set(unexpected)
+    for tag, (building, room, time, count) in unexpected.items():
+        assert (extra.loc[tag, 'Scan_Building'], extra.loc[tag, 'Scan_Room'],
+                extra.loc[tag, 'Scan_Time'], extra.loc[tag, 'Scan_Count']) == (building, room, time, count)
+
+    totals = reconciliation.totals()
+    assert totals[LABELS['unexpected']] == len(unexpected)
+    assert sum(totals[LABELS[key]] for key in ('found', 'missing', 'wrong_location')) == len(register)
+    # إعادة إدخال نفس الملف لا تُضاعف العدادات
+    reconciliation.ingest(str(path), chunksize=chunksize)
+    assert reconciliation.assets()['Scan_Count'].sum() == sum(counts[tag] for tag in status if tag in counts)
+
+
+def test_rescan_in_a_later_file_updates_only_rescanned_assets(register):
+    tag, other = register[COLUMNS['tag_number']].iloc[0], register[COLUMNS['tag_number']].iloc[1]
+    reconciliation = inventory.InventoryReconciliation(register)
+    reconciliation.ingest(pd.DataFrame({SCAN['tag']: [tag, other], SCAN['building']: ['X', 'Y'],
+                                        SCAN['room']: ['1', '2'], SCAN['timestamp']: ['2024-01-02', '2024-01-02']}))
+    # مسح أقدم يصل لاحقاً لا يغيّر الموقع، والمسح الأحدث يغيّره
+    reconciliation.ingest(pd.DataFrame({SCAN['tag']: [tag], SCAN['building']: ['OLD'], SCAN['room']: ['9'],
+                                        SCAN['timestamp']: ['2024-01-01']}))
+    reconciliation.ingest(pd.DataFrame({SCAN['tag']: [tag], SCAN['building']: ['NEW'], SCAN['room']: ['9'],
+                                        SCAN['timestamp']: ['2024-01-03']}))
+    assets = reconciliation.assets().set_index(COLUMNS['tag_number'])
+    assert (assets.loc[tag, 'Scan_Building'], assets.loc[tag, 'Scan_Count']) == ('NEW', 3)
+    assert (assets.loc[other, 'Scan_Building'], assets.loc[other, 'Scan_Count']) == ('Y', 1)
+
+
+def test_scans_without_time_or_location(register):
+    row = register.dropna(subset=[COLUMNS['building_number']]).iloc[0]
+    tag, building = row[COLUMNS['tag_number']], row[COLUMNS['building_number']]
+    reconciliation = inventory.InventoryReconciliation(register)
+    reconciliation.ingest(pd.DataFrame({SCAN['tag']: [tag], SCAN['building']: ['ELSEWHERE'], SCAN['room']: ['1'],
+                                        SCAN['timestamp']: ['2024-01-02']}))
+    assert reconciliation.assets('wrong_location')[COLUMNS['tag_number']].tolist() == [tag]
+    # مسح بلا وقت يُعتمد (لا يمكن ترتيبه)، ومسح بلا غرفة يُقارن بالمبنى وحده
+    reconciliation.ingest(pd.DataFrame({SCAN['tag']: [tag], SCAN['building']: [building.lower()],
+                                        SCAN['room']: [None], SCAN['timestamp']: [None]}))
+    state = reconciliation.assets().set_index(COLUMNS['tag_number']).loc[tag]
+    assert (state['Inventory_Status'], state['Scan_Count']) == (LABELS['found'], 2)
+
+
+def test_summary_matches_crosstab(register, scans):
+    reconciliation = inventory.InventoryReconciliation(register)
+    reconciliation.ingest(scans)
+    assets = reconciliation.assets()
+    table = reconciliation.summary('custodian')
+    groups = assets[COLUMNS['custodian']].fillna('غير محدد')
+    expected = pd.crosstab(groups, assets['Inventory_Status'])
+    for label in expected.columns:
+        assert table[label].to_dict() == expected[label].to_dict()
+    missing = assets[assets['Inventory_Status'] == LABELS['missing']]
+    expected_cost = missing.groupby(groups[missing.index])[COLUMNS['cost']].sum()
+    assert table['Missing_Cost'].to_dict() == pytest.approx(expected_cost.reindex(table.index, fill_value=0).to_dict())
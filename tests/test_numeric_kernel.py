@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""اختبارات نواة التحويل الرقمي"""
+import numpy as np
+import pandas as pd
+import pytest
+
+import numeric_kernel
+
+
+def _parse(values):
+    return numeric_kernel.coerce_numeric(pd.Series(values, dtype=object))
+
+
+@pytest.mark.parametrize('text', ['-1,234', '- 1,234', '1,234-', '(1,234)'])
+def test_negative_forms(text):
+    values, bad = _parse([text])
+    assert values[0] == -1234.0
+    assert bad == 0
+
+
+def test_positive_and_currency_forms():
+    values, bad = _parse(['1,234', '1,234.50 SAR', '٣٤٥', '١٬٢٣٤٫٥', '500 ر.س', 7])
+    np.testing.assert_array_equal(values, [1234.0, 1234.5, 345.0, 1234.5, 500.0, 7.0])
+    assert bad == 0
+
+
+def test_null_tokens_and_unparseable_cells():
+    values, bad = _parse(['', 'N/A', 'Not Available', None, 'abc', '12'])
+    assert np.isnan(values[:5]).all()
+    assert values[5] == 12.0
+    assert bad == 1  # 'abc' فقط؛ الفارغ ورموز القيم المفقودة ليست أخطاء
+
+
+def test_numeric_dtype_passes_through():
+    values, bad = numeric_kernel.coerce_numeric(pd.Series([1, -2, 3]))
+    assert values.dtype == np.float64
+    np.testing.assert_array_equal(values, [1.0, -2.0, 3.0])
+    assert bad == 0
+
+
+def test_coerce_frame_reports_issues_per_column():
+    df = pd.DataFrame({'a': ['(10)', 'x'], 'b': ['1', '2']})
+    issues = numeric_kernel.coerce_frame(df, ['a', 'b', 'missing'])
+    assert issues == {'a': 1}
+    assert df['a'].iloc[0] == -10.0
+    assert df['b'].dtype == np.float64
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""اختبارات مكعب الفترات المالية مقارنةً بتجميع pandas على جدول إهلاك كل أصل"""
+import numpy as np
+import pandas as pd
+import pytest
+
+import config
+import period_cube
+
+COLUMNS = config.COLUMN_MAPPING
+
+
+@pytest.fixture
+def register():
+    rng = np.random.default_rng(21)
+    n = 300
+    dates = pd.Timestamp('2012-03-15') + pd.to_timedelta(rng.integers(0, 4_500, size=n), 'D')
+    df = pd.DataFrame({
+        COLUMNS['date_in_service']: dates,
+        COLUMNS['cost']: rng.uniform(500, 20_000, size=n).round(2),
+        COLUMNS['residual_value']: rng.choice([0.0, 100.0], size=n),
+        COLUMNS['useful_life']: rng.choice([2, 4.5, 10, 0, np.nan], size=n),
+        COLUMNS['level1_english']: rng.choice(['IT', 'Furniture', None], size=n),
+        COLUMNS['city']: rng.choice(['جدة', 'الرياض'], size=n),
+    })
+    df.loc[::40, COLUMNS['date_in_service']] = pd.NaT  # بلا تاريخ: خارج المكعب
+    return df
+
+
+def _reference(df, start, end, dimension=None):
+    """الحركة بين شهرين (شاملاً) من جدول القسط الثابت لكل أصل على حدة"""
+    df = df.dropna(subset=[COLUMNS['date_in_service'], COLUMNS['cost']])
+    a, b = pd.Period(start, 'M').ordinal, pd.Period(end, 'M').ordinal + 1
+    service = df[COLUMNS['date_in_service']].dt.to_period('M').map(lambda p: p.ordinal)
+    life = np.round(df[COLUMNS['useful_life']].fillna(0) * 12).where(df[COLUMNS['useful_life']] > 0, 0)
+    rate = ((df[COLUMNS['cost']] - df[COLUMNS['residual_value']]) / life).where(life > 0, 0.0)
+
+    def depreciated_months(lo, hi):
+        return (np.minimum(service + life, hi) - np.maximum(service, lo)).clip(lower=0)
+
+    rows = pd.DataFrame({
+        'Opening_NBV': df[COLUMNS['cost']].where(service < a, 0) - rate * depreciated_months(-10**9, a),
+        'Additions': df[COLUMNS['cost']].where((service >= a) & (service < b), 0),
+        'Depreciation': rate * depreciated_months(a, b),
+    })
+    rows['Closing_NBV'] = rows['Opening_NBV'] + rows['Additions'] - rows['Depreciation']
+    if dimension is None:
+        return rows.sum()
+    return rows.groupby(df[COLUMNS[dimension]].fillna(period_cube.UNKNOWN)).sum()
+
+
+RANGES = [('2012-01-01', '2012-12-31'), ('2015-04-01', '2016-09-30'), ('2012-03-01', '2024-12-31'),
+          ('2020-02-01', '2020-02-29')]
+
+
+@pytest.mark.parametrize('start, end', RANGES)
+def test_range_totals_match_reference(register, start, end):
+    cube = period_cube.PeriodCube(register, as_of='2024-12-31')
+    total = cube.range_totals(start, end).iloc[0]
+    pd.testing.assert_series_equal(total, _reference(register, start, end), check_names=False, atol=0.01)
+    for dimension in ('level1_english', 'city'):
+        table = cube.range_totals(start, end, dimension)
+        expected = _reference(register, start, end, dimension)
+        pd.testing.assert_frame_equal(table, expected.reindex(table.index), check_names=False, atol=0.01)
+
+
+def test_quarterly_roll_forward_matches_reference(register):
+    cube = period_cube.PeriodCube(register, as_of='2024-12-31')
+    table = cube.roll_forward('ربع سنوي', dimension='city', group='جدة')
+    assert table['Period'].iloc[0] == 'FY2012-Q1' and len(table) == 13 * 4
+    for row in table.itertuples():
+        end = row.Period_Start + pd.offsets.MonthEnd(3)
+        expected = _reference(register, row.Period_Start, end, 'city').loc['جدة']
+        np.testing.assert_allclose([row.Opening_NBV, row.Additions, row.Depreciation, row.Closing_NBV],
+                                   expected.to_numpy(), atol=0.01)
+    # الرصيد الختامي لكل فترة هو الافتتاحي للتي تليها
+    np.testing.assert_allclose(table['Closing_NBV'].iloc[:-1], table['Opening_NBV'].iloc[1:], atol=0.01)
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""اختبارات ذاكرة نتائج الاستعلامات ومُحلِّل الأصول المخزن"""
+import numpy as np
+import pandas as pd
+
+import asset_models
+import data_processor
+import query_cache
+
+
+def _register():
+    df = pd.DataFrame({
+        'Tag number': ['T1', 'T2', 'T3'],
+        'Asset Description': ['Desk', 'Chair', 'Laptop'],
+        'Custodian': ['IT', 'HR', 'IT'],
+        'Cost': [1000.0, 200.0, 5000.0],
+        'Depreciation amount': [900.0, 50.0, 0.0],
+        'Net Book Value': [100.0, 150.0, 5000.0],
+        'Date Placed in Service': pd.to_datetime(['2015-06-01', '2021-01-15', '2023-12-01']),
+    })
+    return data_processor.DataProcessor.calculate_additional_metrics(df)
+
+
+def test_get_put_returns_detached_copies():
+    cache = query_cache.QueryCache(max_entries=4, max_bytes=1 << 20)
+    frame = pd.DataFrame({'a': [1, 2]})
+    cache.put(('q', 'v1', (), ()), frame)
+    found, value = cache.get(('q', 'v1', (), ()))
+    assert found
+    value.loc[0, 'a'] = 99
+    assert cache.get(('q', 'v1', (), ()))[1].loc[0, 'a'] == 1
+
+
+def test_invalidate_by_version():
+    cache = query_cache.QueryCache(max_entries=8, max_bytes=1 << 20)
+    cache.put(('q', 'v1', (), ()), 1)
+    cache.put(('r', 'v1', (), ()), 2)
+    cache.put(('q', 'v2', (), ()), 3)
+    cache.invalidate('v1')
+    assert not cache.get(('q', 'v1', (), ()))[0]
+    assert not cache.get(('r', 'v1', (), ()))[0]
+    assert cache.get(('q', 'v2', (), ())) == (True, 3)
+    assert cache.bytes == query_cache.estimate_size(3)
+
+
+def test_lru_eviction_by_entries_and_bytes():
+    cache = query_cache.QueryCache(max_entries=2, max_bytes=1 << 20)
+    for name in 'abc':
+        cache.put((name, 'v', (), ()), name)
+    assert not cache.get(('a', 'v', (), ()))[0]
+    assert cache.stats()['evictions'] == 1
+
+    small = query_cache.QueryCache(max_entries=10, max_bytes=20_000)
+    small.put(('x', 'v', (), ()), np.zeros(1_000))
+    small.put(('y', 'v', (), ()), np.zeros(1_000))
+    assert len(small) == 2
+    small.put(('z', 'v', (), ()), np.zeros(1_500))
+    assert not small.get(('x', 'v', (), ()))[0]
+    assert small.bytes <= small.max_bytes
+    assert not small.put(('big', 'v', (), ()), np.zeros(10_000))
+
+
+def test_cached_query_keys_on_dataset_version():
+    cache = query_cache.QueryCache(max_entries=16, max_bytes=1 << 24)
+    calls = []
+
+    class Analyzer:
+        def __init__(self, version):
+            self.cache = cache
+            self.dataset_version = version
+
+        @query_cache.cached_query
+        def total(self, scale=1):
+            calls.append((self.dataset_version, scale))
+            return pd.Series([1.0, 2.0]) * scale
+
+    Analyzer('v1').total()
+    Analyzer('v1').total()
+    Analyzer('v1').total(scale=2)
+    Analyzer('v2').total()
+    assert calls == [('v1', 1), ('v1', 2), ('v2', 1)]
+    cache.invalidate('v1')
+    Analyzer('v1').total()
+    assert calls[-1] == ('v1', 1)
+
+
+def test_equivalent_calls_share_one_key():
+    cache = query_cache.QueryCache(max_entries=16, max_bytes=1 << 24)
+    analyzer = asset_models.AssetAnalyzer(_register(), version='v1', cache=cache)
+    analyzer.warm_cache(['get_assets_by_custodian'])
+    calls = cache.stats()['misses']
+    # نفس الاستعلام بمعاملات موضعية أو مسماة أو افتراضية (كما تستدعيه واجهة HTTP)
+    analyzer.get_assets_by_custodian(10, approximate=False)
+    analyzer.get_assets_by_custodian(k=10)
+    assert cache.stats()['misses'] == calls
+    assert len(cache) == 1
+    analyzer.get_assets_by_custodian(5)
+    assert len(cache) == 2
+
+
+def test_failed_queries_are_not_cached(monkeypatch):
+    cache = query_cache.QueryCache(max_entries=16, max_bytes=1 << 24)
+    analyzer = asset_models.AssetAnalyzer(_register(), version='v1', cache=cache)
+    monkeypatch.setattr(analyzer, '_group_totals', lambda *args: (_ for _ in ()).throw(MemoryError('transient')))
+    assert analyzer.get_assets_by_custodian().empty
+    assert len(cache) == 0
+    monkeypatch.undo()
+    assert analyzer.get_assets_by_custodian().loc['IT', 'Cost'] == 6000.0
+    assert len(cache) == 1
+
+
+def test_depreciation_analysis_does_not_mutate_shared_frame():
+    cache = query_cache.QueryCache(max_entries=16, max_bytes=1 << 24)
+    df = _register()
+    before = df.copy()
+    first = asset_models.AssetAnalyzer(df, version='v1', cache=cache).get_depreciation_analysis()
+    pd.testing.assert_frame_equal(df, before)
+    # الأعمار الكسرية من calculate_additional_metrics تبقى كما هي
+    pd.testing.assert_series_equal(first['Asset_Age'], before['Asset_Age'])
+
+    # محلل جديد على نفس الإصدار يصيب الذاكرة ويحصل على الأعمدة نفسها
+    second = asset_models.AssetAnalyzer(df, version='v1', cache=cache).get_depreciation_analysis()
+    assert cache.stats()['hits'] >= 1
+    pd.testing.assert_frame_equal(first, second)
+
+
+def test_depreciation_analysis_derives_columns_on_a_copy():
+    df = _register().drop(columns=['Asset_Age', 'Depreciation_Rate', 'Asset_Condition'])
+    columns = list(df.columns)
+    cache = query_cache.QueryCache(max_entries=16, max_bytes=1 << 24)
+    analysis = asset_models.AssetAnalyzer(df, version='v1', cache=cache).get_depreciation_analysis()
+    assert list(df.columns) == columns
+    assert {'Asset_Age', 'Depreciation_Rate', 'Asset_Condition'}.issubset(analysis.columns)
+    assert analysis['Asset_Condition'].tolist() == ['قديم', 'جديد', 'لم يبدأ الإهلاك']
+
+
+def test_result_objects_are_sized_and_detached():
+    import replacement_planner
+
+    plan = replacement_planner.ReplacementPlan(pd.DataFrame({'a': np.arange(10_000)}),
+                                               pd.DataFrame({'b': [1.0]}))
+    assert query_cache.estimate_size(plan) >= plan.assets.memory_usage(deep=True).sum()
+
+    cache = query_cache.QueryCache(max_entries=4, max_bytes=1 << 20)
+    cache.put(('plan', 'v', (), ()), plan)
+    assert cache.bytes >= 80_000
+    hit = cache.get(('plan', 'v', (), ()))[1]
+    assert isinstance(hit, replacement_planner.ReplacementPlan)
+    hit.assets.loc[0, 'a'] = -1
+    hit.trajectory['b'] = 0.0
+    again = cache.get(('plan', 'v', (), ()))[1]
+    assert again.assets.loc[0, 'a'] == 0
+    assert again.trajectory['b'].tolist() == [1.0]
+    assert again.summary is not None  # الدوال تبقى مرتبطة بالنسخة
+
+    # خطة أكبر من حد الذاكرة لا تُخزَّن
+    assert not query_cache.QueryCache(max_entries=4, max_bytes=10_000).put(('plan', 'v', (), ()), plan)
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""اختبارات تخطيط الإحلال مقارنةً بحلقات بايثون وحسابات pandas المباشرة"""
+import numpy as np
+import pandas as pd
+import pytest
+
+import config
+import replacement_planner
+
+COLUMNS = config.COLUMN_MAPPING
+
+
+def _loop_greedy(score, price, budget, passes):
+    """خط الأساس: نفس القاعدة بحلقة عادية (ترتيب بالدرجة لكل ريال، بادئة تتسع ثم تعبئة المتبقي)"""
+    candidates = sorted(range(len(score)), key=lambda i: -score[i] / price[i])
+    chosen, remaining = set(), budget
+    for _ in range(passes):
+        candidates = [i for i in candidates if price[i] <= remaining]
+        spent, taken = 0.0, []
+        for i in candidates:
+            if spent + price[i] > remaining:
+                break
+            spent += price[i]
+            taken.append(i)
+        if not taken:
+            break
+        chosen.update(taken)
+        remaining -= spent
+        candidates = candidates[len(taken):]
+    return chosen, remaining
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_greedy_select_matches_loop(seed):
+    rng = np.random.default_rng(seed)
+    score = rng.random(200)
+    price = rng.integers(1, 1_000, size=200).astype(float)
+    budget = float(price.sum() / 4)
+    chosen, remaining = replacement_planner.greedy_select(score, price, budget, passes=3)
+    expected, expected_remaining = _loop_greedy(score, price, budget, passes=3)
+    assert set(np.flatnonzero(chosen).tolist()) == expected
+    assert remaining == pytest.approx(expected_remaining)
+    assert price[chosen].sum() <= budget
+
+
+def test_greedy_select_prefers_value_density():
+    # أصل رخيص بدرجة أقل قليلاً يسبق أصلاً غالياً يستهلك الميزانية وحده
+    score = np.array([1.0, 0.9, 0.9])
+    price = np.array([100.0, 50.0, 50.0])
+    chosen, remaining = replacement_planner.greedy_select(score, price, 100.0, passes=1)
+    assert chosen.tolist() == [False, True, True]
+    assert remaining == 0.0
+
+
+@pytest.fixture
+def register():
+    rng = np.random.default_rng(3)
+    n = 300
+    cost = rng.uniform(1_000, 50_000, size=n).round(2)
+    life = rng.choice([4.0, 5.0, 8.0, 10.0], size=n)
+    age = rng.uniform(0, 12, size=n).round(1)
+    residual = (cost * 0.05).round(2)
+    nbv = np.maximum(cost - (cost - residual) / life * age, residual).round(2)
+    return pd.DataFrame({
+        COLUMNS['tag_number']: [f'T{i:04d}' for i in range(n)],
+        COLUMNS['level1_arabic']: rng.choice(['حاسب', 'أثاث'], size=n),
+        COLUMNS['city']: rng.choice(['Riyadh', 'Jeddah'], size=n),
+        COLUMNS['cost']: cost,
+        COLUMNS['residual_value']: residual,
+        COLUMNS['net_book_value']: nbv,
+        COLUMNS['useful_life']: life,
+        'Asset_Age': age,
+    })
+
+
+BUDGETS = [300_000, 150_000, 0, 400_000]
+
+
+def test_plan_respects_yearly_budget_with_carry_over(register):
+    plan = replacement_planner.plan_replacements(register, BUDGETS, start_year=2030)
+    trajectory = plan.trajectory
+    assert trajectory.index.tolist() == [2030, 2031, 2032, 2033]
+    available = (trajectory['Budget'].cumsum() - trajectory['Spend'].cumsum().shift(fill_value=0)).to_numpy()
+    assert (trajectory['Spend'].to_numpy() <= available + 0.01).all()
+    # كل أصل يُستبدل مرة واحدة على الأكثر، وفقط بعد بلوغ الحد الأدنى من العمر المستهلك
+    assert plan.assets[COLUMNS['tag_number']].is_unique
+    chosen = register.set_index(COLUMNS['tag_number']).loc[plan.assets[COLUMNS['tag_number']]]
+    need = (chosen['Asset_Age'].to_numpy() + plan.assets['Replacement_Year'].to_numpy() - 2030) \
+        / chosen[COLUMNS['useful_life']].to_numpy()
+    assert (need >= config.REPLACEMENT_CONFIG['MIN_NEED']).all()
+
+
+def test_summary_matches_groupby(register):
+    plan = replacement_planner.plan_replacements(register, BUDGETS, start_year=2030)
+    summary = plan.summary()
+    grouped = plan.assets.groupby('Replacement_Year')
+    assert summary['Count'].to_dict() == grouped.size().to_dict()
+    assert summary['Replacement_Cost'].to_numpy() == pytest.approx(grouped['Replacement_Cost'].sum().to_numpy())
+    assert summary['Count'].to_dict() == plan.trajectory['Replaced'][lambda s: s > 0].to_dict()
+    assert summary['Replacement_Cost'].to_numpy() == pytest.approx(
+        plan.trajectory['Spend'][lambda s: s > 0].to_numpy(), abs=0.01 * len(plan.assets))
+
+
+def test_baseline_matches_straight_line(register):
+    plan = replacement_planner.plan_replacements(register, BUDGETS, start_year=2030)
+    cost, residual = register[COLUMNS['cost']], register[COLUMNS['residual_value']]
+    annual = (cost - residual) / register[COLUMNS['useful_life']]
+    nbv = register[COLUMNS['net_book_value']].copy()
+    for year in plan.trajectory.index:
+        nbv = nbv - np.minimum(annual, (nbv - residual).clip(lower=0))
+        assert plan.trajectory.loc[year, 'Baseline_NBV'] == pytest.approx(nbv.sum(), abs=0.01)
+
+
+def test_priorities_favour_selected_category(register):
+    category = COLUMNS['level1_arabic']
+    plain = replacement_planner.plan_replacements(register, [100_000], start_year=2030)
+    boosted = replacement_planner.plan_replacements(register, [100_000], start_year=2030,
+                                                    priorities={'level1_arabic': {'أثاث': 10.0}})
+    share = lambda plan: (plan.assets[category] == 'أثاث').mean()
+    assert share(boosted) > share(plain)
+    assert (boosted.assets.loc[boosted.assets[category] == 'أثاث', 'Priority_Weight'] == 10.0).all()
+
+
+def test_no_budget_replaces_nothing(register):
+    plan = replacement_planner.plan_replacements(register, [0, 0], start_year=2030)
+    assert plan.assets.empty
+    assert plan.summary().empty
+    assert (plan.trajectory['Closing_NBV'] == plan.trajectory['Baseline_NBV']).all()
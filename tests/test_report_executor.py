@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""اختبارات منفّذ التقارير والتقرير المتدفق"""
+import threading
+
+import pandas as pd
+import pytest
+
+import asset_models
+import background_loader
+import query_cache
+import report_executor
+from test_query_cache import _register
+
+
+def test_dependencies_run_after_their_prerequisites():
+    order = []
+    lock = threading.Lock()
+
+    def step(name):
+        with lock:
+            order.append(name)
+        return name
+
+    executor = report_executor.ReportExecutor(max_workers=4)
+    executor.add('a', step, 'a')
+    executor.add('b', step, 'b', depends_on=('a',))
+    executor.add('c', step, 'c')
+    assert executor.run() == {'a': 'a', 'b': 'b', 'c': 'c'}
+    assert order.index('a') < order.index('b')
+    with pytest.raises(ValueError):
+        executor.add('d', step, 'd', depends_on=('missing',))
+
+
+def _failing_analyzer(monkeypatch):
+    analyzer = asset_models.AssetAnalyzer(_register(), version='v1', cache=query_cache.QueryCache())
+    monkeypatch.setattr(analyzer, 'get_assets_by_location', lambda: 1 / 0)
+    return analyzer
+
+
+def test_streamed_report_logs_and_skips_failed_sections(monkeypatch):
+    analyzer = _failing_analyzer(monkeypatch)
+    sections = analyzer.generate_asset_report(stream=True)
+    # الأقسام تُحسب عند التكرار، بعد عودة generate_asset_report
+    with background_loader.MessageCollector.for_current_thread() as collector:
+        names = [name for name, _ in sections]
+    assert 'by_location' not in names
+    assert {'summary', 'by_category', 'by_custodian', 'fully_depreciated'} <= set(names)
+    assert any('by_location' in text for level, text in collector.messages if level == 'ERROR')
+
+
+def test_report_keeps_the_sections_that_succeeded(monkeypatch):
+    report = _failing_analyzer(monkeypatch).generate_asset_report()
+    assert list(report) == ['summary', 'by_category', 'by_custodian', 'depreciation_analysis',
+                            'high_value_assets', 'fully_depreciated']
+    assert isinstance(report['by_custodian'], pd.DataFrame)
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""اختبارات تحويل العناوين ومواصفات الأعمدة"""
+import pandas as pd
+
+import schema
+
+
+def test_english_arabic_and_underscored_headers_resolve_to_standard_names():
+    mapping = schema.resolve_headers(('tag_number', 'التكلفة', ' CITY\n', 'Net-Book Value', 'Mystery'))
+    assert mapping.rename == {
+        'tag_number': 'Tag number',
+        'التكلفة': 'Cost',
+        ' CITY\n': 'City',
+        'Net-Book Value': 'Net Book Value',
+    }
+    assert mapping.unknown == ['Mystery']
+    assert mapping.keys['Cost'] == 'cost'
+
+
+def test_duplicate_aliases_keep_the_first_column():
+    mapping = schema.resolve_headers(('Cost', 'التكلفة'))
+    assert mapping.rename == {}
+    assert mapping.unknown == ['التكلفة']
+
+
+def test_specs_follow_column_types():
+    mapping = schema.resolve_headers(('Cost', 'City', 'Date Placed in Service', 'Custodian', 'Tag number'))
+    assert mapping.specs['Cost'].dtype == 'float64'
+    assert mapping.specs['Cost'].nullable is False and mapping.specs['Cost'].fill == 0
+    assert mapping.specs['City'].dtype == 'category'
+    assert mapping.specs['Date Placed in Service'].dtype == 'datetime64[ns]'
+    assert mapping.specs['Tag number'].dtype == 'string'
+    assert mapping.columns_of('category') == ['City', 'Custodian']
+
+
+def test_resolution_is_cached_per_header_layout():
+    df = pd.DataFrame(columns=['Tag number', 'التكلفة'])
+    assert schema.resolve(df) is schema.resolve(df.copy())
+    assert schema.resolve(df) is not schema.resolve(pd.DataFrame(columns=['Tag number']))
+    renamed = schema.resolve(df).apply(df)
+    assert list(renamed.columns) == ['Tag number', 'Cost']
+
+
+def test_header_row_detection():
+    sheet = pd.DataFrame([
+        ['Fixed Asset Register', None, None],
+        [None, None, None],
+        ['Tag number', 'Cost', 'Notes'],
+        ['رقم البطاقة', 'التكلفة', None],
+        ['T-1', 100, 'x'],
+    ])
+    assert schema.detect_header_row(sheet) == 2
+    assert schema.is_header_row(sheet.iloc[3])
+    assert not schema.is_header_row(sheet.iloc[4])
+
+
+def test_projection_filter_accepts_any_alias_of_projected_keys():
+    keep = schema.projection_filter(['cost', 'Tag number'])
+    assert keep('Cost') and keep('التكلفة') and keep('tag_number')
+    assert not keep('City')
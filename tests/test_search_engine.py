@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""اختبارات توحيد النص العربي وفهرس البحث"""
+import numpy as np
+import pandas as pd
+
+import search_engine
+
+
+def _index():
+    df = pd.DataFrame({
+        'Asset Description': ['خزانة مكتبية خشبية', 'كرسي مكتب دوار', 'Laptop Dell Latitude', 'طابعة ليزر', None],
+        'Custodian': ['الإدارة المالية', 'الموارد البشرية', 'تقنية المعلومات', 'تقنية المعلومات', 'المالية'],
+        'City': ['جدة', 'الرياض', 'الرياض', 'جدة', 'جدة'],
+        'Tag number': ['100231', '100232', '200117', '200118', '300001'],
+    })
+    return search_engine.SearchIndex(df, fields=['Asset Description', 'Custodian', 'City', 'Tag number'])
+
+
+def test_arabic_normalization():
+    text = pd.Series(['أَحْمَد', 'مكتبـــة', 'إدارة، المالية!', 'مستشفى  ', None])
+    assert search_engine.normalize_text(text).tolist() == ['احمد', 'مكتبه', 'اداره الماليه', 'مستشفي', '']
+
+
+def test_normalized_variants_find_the_same_rows():
+    index = _index()
+    rows, _ = index.search('خزانه مكتبيه')
+    assert rows[0] == 0
+    assert set(index.search('خزانة')[0]) == set(index.search('خزانه')[0])
+
+
+def test_exact_matches_rank_above_fuzzy_ones():
+    index = _index()
+    rows, scores = index.search('المالية')
+    assert set(rows[:2].tolist()) == {0, 4}
+    assert (np.diff(scores) <= 0).all()
+    assert scores[0] == 1.0
+
+
+def test_typo_tolerant_and_digit_partial_matching():
+    index = _index()
+    assert 2 in index.search('latitud')[0]
+    assert 2 in index.search('latitdue')[0]
+    # الأرقام تُطابق جزئياً فقط، دون تقريب
+    assert set(index.search('2001')[0]) == {2, 3}
+    assert len(index.search('2009')[0]) == 0
+
+
+def test_one_edit_typos_in_short_names_at_default_threshold():
+    df = pd.DataFrame({'Asset Description': ['سيارة Toyota Prado', 'Lenovo ThinkPad E490', 'Cisco Catalyst 2960',
+                                             'Dell Latitude 5420', 'كرسي مكتب']})
+    index = search_engine.SearchIndex(df, fields=['Asset Description'])
+    for typo, row in [('tyota', 0), ('toyoa', 0), ('lenvo', 1), ('cisko', 2), ('latitdue', 3)]:
+        rows, scores = index.search(typo)
+        assert rows.tolist() == [row], typo
+        assert 0 < scores[0] < 1
+    assert index.search('dall')[0].tolist() == [3]
+    # خطأ واحد لكل 4 أحرف: الكلمات الأقصر والكلمات البعيدة لا تُقرَّب
+    assert len(index.search('del')[0]) == 1
+    assert len(index.search('nokia')[0]) == 0
+
+
+def test_edit_distance_is_bounded():
+    assert search_engine.edit_distance('toyota', 'toyota', 2) == 0
+    assert search_engine.edit_distance('tyota', 'toyota', 2) == 1
+    assert search_engine.edit_distance('latitdue', 'latitude', 2) == 1  # تبديل حرفين متجاورين
+    assert search_engine.edit_distance('cisko', 'cisco', 1) == 1
+    assert search_engine.edit_distance('lenovo', 'nokia', 2) == 3
+
+
+def test_short_or_empty_queries_return_nothing():
+    index = _index()
+    for query in ('', 'ا', '   '):
+        rows, scores = index.search(query)
+        assert len(rows) == 0 and len(scores) == 0
+
+
+def test_limit_caps_results():
+    index = _index()
+    assert len(index.search('جدة', limit=2)[0]) == 2
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""اختبارات مقارنة اللقطتين مقارنةً بتصنيف أصل بأصل بحلقة بايثون"""
+import numpy as np
+import pandas as pd
+import pytest
+
+import config
+import query_cache
+import snapshot_diff
+
+COLUMNS = config.COLUMN_MAPPING
+TAG, MOF, COST, NBV = COLUMNS['tag_number'], COLUMNS['mof_unique_number'], COLUMNS['cost'], COLUMNS['net_book_value']
+CITY, CUSTODIAN, CATEGORY = COLUMNS['city'], COLUMNS['custodian'], COLUMNS['level1_arabic']
+LABELS = config.SNAPSHOT_DIFF_CONFIG['STATUS_LABELS']
+
+
+@pytest.fixture
+def snapshots():
+    rng = np.random.default_rng(4)
+    n = 200
+    old = pd.DataFrame({
+        TAG: [f'T{i:04d}' for i in range(n)],
+        CITY: rng.choice(['جدة', 'الرياض', None], size=n),
+        CUSTODIAN: rng.choice(['IT', 'HR'], size=n),
+        CATEGORY: rng.choice(['حاسب', 'أثاث'], size=n),
+        COST: rng.uniform(100, 5_000, size=n).round(2),
+        NBV: rng.uniform(0, 100, size=n).round(2),
+    })
+    new = old.iloc[20:].copy()  # أول 20 أصلاً مستبعدة
+    new.loc[new.index[::7], CITY] = 'الدمام'
+    new.loc[new.index[::5], COST] += 250.0
+    new.loc[new.index[::11], NBV] += 0.005  # أقل من حد التسامح
+    added = pd.DataFrame({TAG: ['N1', 'N2'], CITY: ['جدة', None], CUSTODIAN: ['IT', 'HR'], CATEGORY: ['أثاث', 'حاسب'],
+                          COST: [900.0, 1200.0], NBV: [900.0, 1200.0]})
+    new = pd.concat([new, added], ignore_index=True)
+    # الفئات تختلف بين اللقطتين؛ المقارنة على القيم
+    new[CITY] = new[CITY].astype('category')
+    return old, new.sample(frac=1, random_state=1)
+
+
+def _reference(old, new, tolerance=0.01):
+    """تصنيف بحلقة على قاموسين"""
+    before = {row[TAG]: row for row in old.to_dict('records')}
+    after = {row[TAG]: row for row in new.astype(object).to_dict('records')}
+    same = lambda a, b: (pd.isna(a) and pd.isna(b)) or a == b
+    status = {}
+    for tag in before.keys() | after.keys():
+        if tag not in before:
+            status[tag] = LABELS['added']
+        elif tag not in after:
+            status[tag] = LABELS['removed']
+        else:
+            old_row, new_row = before[tag], after[tag]
+            moved = not all(same(old_row[c], new_row[c]) for c in (CITY, CUSTODIAN))
+            revalued = any(abs(new_row[c] - old_row[c]) > tolerance for c in (COST, NBV))
+            status[tag] = (LABELS['moved_revalued'] if moved and revalued else LABELS['moved'] if moved
+                           else LABELS['revalued'] if revalued else LABELS['unchanged'])
+    return status
+
+
+def test_classification_matches_reference(snapshots):
+    old, new = snapshots
+    diff = snapshot_diff.compare(old, new)
+    assert diff['Status'].to_dict() == _reference(old, new)
+    assert set(diff['Status']) == set(LABELS.values())
+    assert diff.loc['N1', f'{COST}_delta'] == 900.0
+    assert diff.loc['T0000', f'{COST}_delta'] == -old.loc[0, COST]
+
+
+def test_variance_table_matches_groupby(snapshots):
+    old, new = snapshots
+    diff = snapshot_diff.compare(old, new)
+    table = snapshot_diff.variance_table(diff, CITY)
+    # المرجع: المستبعد بقيمته القديمة، وما سواه بالجديدة
+    city = diff[f'{CITY}_new'].fillna(diff[f'{CITY}_old']).fillna('غير محدد')
+    expected = diff.groupby(city.to_numpy())[[f'{COST}_delta', f'{NBV}_delta']].sum()
+    assert table['Cost_Delta'].to_dict() == pytest.approx(expected[f'{COST}_delta'].round(2).to_dict())
+    assert table['NBV_Delta'].to_dict() == pytest.approx(expected[f'{NBV}_delta'].round(2).to_dict())
+    counts = pd.crosstab(city.to_numpy(), diff['Status'].to_numpy())
+    for status in counts.columns:
+        assert table[status].to_dict() == counts[status].to_dict()
+    assert table['Cost_New'].sum() == pytest.approx(new[COST].sum())
+    assert table['Cost_Old'].sum() == pytest.approx(old[COST].sum())
+
+
+def test_mof_number_keys_and_duplicates():
+    old = pd.DataFrame({TAG: ['A', 'A', None], MOF: [None, None, 'M9'], COST: [1.0, 2.0, 3.0], NBV: 0.0})
+    new = pd.DataFrame({TAG: ['A', ' ', 'C'], MOF: [None, 'M9', 'M9'], COST: [1.0, 3.0, 5.0], NBV: 0.0})
+    diff = snapshot_diff.compare(old, new)
+    # رقم البطاقة أولاً، والرقم الموحد للأصل بلا رقم بطاقة (المكرر يُؤخذ أول ظهور له)
+    assert diff['Status'].to_dict() == {'A': LABELS['unchanged'], 'MOF:M9': LABELS['unchanged'],
+                                        'C': LABELS['added']}
+    assert diff.attrs['duplicates'] == {'old': 1, 'new': 0}
+
+
+def test_results_are_cached_per_version_pair(snapshots):
+    old, new = snapshots
+    cache = query_cache.QueryCache(max_entries=8, max_bytes=1 << 26)
+    first = snapshot_diff.diff_snapshots(old, new, 'v1', 'v2', cache=cache)
+    again = snapshot_diff.diff_snapshots(old.iloc[:0], new.iloc[:0], 'v1', 'v2', cache=cache)
+    pd.testing.assert_frame_equal(first.assets, again.assets)
+    pd.testing.assert_frame_equal(first.variance('city'), again.variance('city'))
+    assert first.summary()['Count'].sum() == len(first.assets)
+    assert len(first.changes()) == (first.assets['Status'] != LABELS['unchanged']).sum()
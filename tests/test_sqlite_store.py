@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""اختبارات مخزن SQLite: نتائج التصفية والتجميع في SQL تطابق حسابها في pandas"""
+import numpy as np
+import pandas as pd
+import pytest
+
+import asset_models
+import data_processor
+import query_cache
+import sqlite_store
+
+
+@pytest.fixture
+def register():
+    rng = np.random.default_rng(21)
+    n = 300
+    cost = rng.uniform(100, 40_000, size=n).round(2)
+    depreciation = np.where(rng.random(n) < 0.2, cost, (cost * rng.random(n)).round(2))
+    df = pd.DataFrame({
+        'Tag number': [f'{24000000 + i}' for i in range(n)],
+        'Asset Description': rng.choice(['Desk', 'Laptop', 'Printer', 'Chair'], size=n),
+        'Custodian': rng.choice(['IT', 'HR', 'Finance', None], size=n),
+        'City': pd.Categorical(rng.choice(['جدة', 'الرياض', 'الدمام'], size=n)),
+        'Level 1 FA Module - English Description': rng.choice(['IT Assets', 'Furniture', 'Lab'], size=n),
+        'Cost': cost,
+        'Depreciation amount': depreciation,
+        'Net Book Value': (cost - depreciation).round(2),
+        'Date Placed in Service': pd.to_datetime('2010-01-01') + pd.to_timedelta(rng.integers(0, 5000, n), 'D'),
+    }, index=np.arange(100, 100 + n))
+    return data_processor.DataProcessor.calculate_additional_metrics(df)
+
+
+@pytest.fixture
+def analyzers(register, tmp_path):
+    store = sqlite_store.SQLiteStore(str(tmp_path / 'assets.sqlite'))
+    assert data_processor.DataProcessor().export_to_store(register, store, 'v1')
+    memory = asset_models.AssetAnalyzer(register.copy(), version='v1', cache=query_cache.QueryCache())
+    pushed = asset_models.AssetAnalyzer(register.copy(), version='v1', cache=query_cache.QueryCache(), store=store)
+    yield memory, pushed
+    store.close()
+
+
+def _same(left, right):
+    left, right = left.copy(), right.copy()
+    left.index = left.index.astype(object)
+    right.index = right.index.astype(object)
+    pd.testing.assert_frame_equal(left.sort_index(), right.sort_index(), check_dtype=False,
+                                  check_index_type=False, check_names=False, check_categorical=False)
+
+
+@pytest.mark.parametrize('method', ['get_assets_by_category', 'get_assets_by_location',
+                                    'get_assets_by_custodian', 'get_assets_by_year'])
+def test_group_totals_match_pandas(analyzers, method):
+    memory, pushed = analyzers
+    _same(getattr(pushed, method)(), getattr(memory, method)())
+
+
+def test_store_group_totals_skip_missing_keys(register, analyzers):
+    _, pushed = analyzers
+    totals = pushed.store.group_totals('Custodian', ['Cost'])
+    expected = register.dropna(subset=['Custodian']).groupby('Custodian')['Cost'].agg(['sum', 'size'])
+    assert totals.index.tolist() == expected.index.tolist()
+    assert totals['Cost'].to_numpy() == pytest.approx(expected['sum'].round(2).to_numpy())
+    assert totals['Count'].tolist() == expected['size'].tolist()
+
+
+@pytest.mark.parametrize('threshold, k', [(10_000, None), (10_000, 15), (0, 5), (1e9, None)])
+def test_high_value_select_matches_pandas(analyzers, threshold, k):
+    memory, pushed = analyzers
+    result = pushed.get_high_value_assets(threshold, k)
+    expected = memory.get_high_value_assets(threshold, k)
+    assert result.index.tolist() == expected.index.tolist()
+    _same(result, expected)
+
+
+def test_fully_depreciated_select_matches_pandas(analyzers):
+    memory, pushed = analyzers
+    result = pushed.get_fully_depreciated_assets()
+    assert not result.empty
+    _same(result, memory.get_fully_depreciated_assets())
+
+
+def test_asset_details_by_indexed_tag(analyzers):
+    memory, pushed = analyzers
+    pd.testing.assert_series_equal(pushed.get_asset_details('24000123'), memory.get_asset_details('24000123'))
+    assert pushed.get_asset_details('missing') is None
+
+
+def test_select_filters_orders_and_limits(register, analyzers):
+    _, pushed = analyzers
+    rows = pushed.store.select(['Cost'], where='"City" = ?', params=('جدة',), order_by='"Cost" DESC', limit=3)
+    expected = register.loc[register['City'] == 'جدة', 'Cost'].sort_values(ascending=False).head(3)
+    assert rows.index.tolist() == expected.index.tolist()
+    assert rows['Cost'].tolist() == expected.tolist()
@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+"""اختبارات مسار بدء التشغيل: التحقق المؤجل من الإعدادات والوحدات المؤجلة"""
+import subprocess
+import sys
+
+import pytest
+
+import config
+import import_benchmark
+
+
+def test_importing_config_does_not_validate():
+    result = subprocess.run([sys.executable, '-c', 'import config; print(config._config_errors)'],
+                            cwd=import_benchmark.ROOT, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == 'None'
+
+
+def test_check_config_validates_once(monkeypatch):
+    calls = []
+    monkeypatch.setattr(config, '_config_errors', None)
+    monkeypatch.setattr(config, 'validate_config', lambda: calls.append(1) or ['خطأ'])
+    assert config.check_config() == ['خطأ']
+    assert config.check_config() == ['خطأ']
+    assert len(calls) == 1
+
+
+@pytest.mark.parametrize('module', ['background_loader', 'api_server'])
+def test_startup_modules_do_not_import_deferred_modules(module):
+    imported = {name for name, _, _ in import_benchmark.import_profile(module)}
+    assert module in imported
+    assert not imported & set(config.IMPORT_BUDGET_CONFIG['DEFERRED_MODULES'])
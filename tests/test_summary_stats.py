@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""اختبارات مُجمِّعات الإحصاءات المتدفقة ومخطط المئينات"""
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import summary_stats
+
+
+@pytest.fixture
+def values():
+    rng = np.random.default_rng(7)
+    data = np.concatenate([rng.lognormal(8, 2, 20_000), -rng.lognormal(3, 1, 500), np.zeros(300)])
+    data[::101] = np.nan
+    return data
+
+
+def test_chunked_stats_match_numpy(values):
+    stats = summary_stats.StreamingStats()
+    for start in range(0, len(values), 3_333):
+        stats.update(values[start:start + 3_333])
+    clean = values[~np.isnan(values)]
+    assert stats.count == len(clean)
+    assert stats.total == pytest.approx(math.fsum(clean), rel=1e-12)
+    assert stats.mean == pytest.approx(clean.mean(), rel=1e-9)
+    assert stats.std == pytest.approx(clean.std(ddof=1), rel=1e-9)
+    assert (stats.min, stats.max) == (clean.min(), clean.max())
+
+
+def test_merge_equals_single_pass(values):
+    whole = summary_stats.StreamingStats().update(values)
+    left = summary_stats.StreamingStats().update(values[:7_000])
+    right = summary_stats.StreamingStats().update(values[7_000:])
+    merged = left.merge(right)
+    assert merged.count == whole.count
+    assert merged.total == pytest.approx(whole.total, rel=1e-12)
+    assert merged.variance == pytest.approx(whole.variance, rel=1e-9)
+    for q in (0.1, 0.5, 0.99):
+        assert merged.quantile(q) == whole.quantile(q)
+
+
+@pytest.mark.parametrize('q', [0.01, 0.25, 0.5, 0.75, 0.9, 0.99])
+def test_quantiles_within_relative_accuracy(values, q):
+    sketch = summary_stats.QuantileSketch(relative_accuracy=0.01).update(values)
+    exact = np.quantile(values[~np.isnan(values)], q, method='lower')
+    estimate = sketch.quantile(q)
+    if exact == 0:
+        assert estimate == 0
+    else:
+        # الخطأ النسبي مضمون للقيمة في نفس الرتبة؛ هامش صغير لاختلاف تعريف الرتبة
+        assert abs(estimate - exact) <= 0.011 * abs(exact)
+
+
+def test_compensated_sum_keeps_small_amounts():
+    stats = summary_stats.StreamingStats()
+    stats.update([1e16])
+    for _ in range(1_000):
+        stats.update([1.0])
+    assert stats.total == 1e16 + 1_000
+
+
+def test_merge_rejects_different_accuracy():
+    with pytest.raises(ValueError):
+        summary_stats.QuantileSketch(0.01).merge(summary_stats.QuantileSketch(0.02))
+
+
+def test_register_stats_summary_matches_pandas():
+    df = pd.DataFrame({
+        'Cost': [100.0, 250.5, np.nan, 40.0],
+        'Depreciation amount': [10.0, 50.0, 5.0, np.nan],
+        'Net Book Value': [90.0, 200.5, 0.0, 40.0],
+    })
+    summary = summary_stats.RegisterStats.from_frame(df, chunk_size=3).summary()
+    assert summary['total_assets'] == 4
+    assert summary['total_cost'] == pytest.approx(df['Cost'].sum())
+    assert summary['total_depreciation'] == pytest.approx(df['Depreciation amount'].sum())
+    assert summary['depreciation_rate'] == pytest.approx(df['Depreciation amount'].sum() / df['Cost'].sum() * 100)
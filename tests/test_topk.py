@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""اختبارات محرك أعلى k ومخطط أكثر المجموعات وزناً"""
+import numpy as np
+import pandas as pd
+
+import asset_models
+import config
+import query_cache
+import summary_stats
+import topk
+
+
+def test_top_k_indices_match_full_sort():
+    rng = np.random.default_rng(1)
+    values = rng.normal(size=1_000)
+    values[::97] = np.nan
+    expected = np.argsort(-np.nan_to_num(values, nan=-np.inf), kind='stable')
+    np.testing.assert_array_equal(topk.top_k_indices(values, 25), expected[:25])
+    np.testing.assert_array_equal(topk.top_k_indices(values, 25, largest=False),
+                                  np.argsort(np.nan_to_num(values, nan=np.inf), kind='stable')[:25])
+    assert len(topk.top_k_indices(values, 0)) == 0
+
+
+def test_percentile_cutoff_and_top_percent_frame():
+    df = pd.DataFrame({'Cost': np.arange(1, 201, dtype=float)})
+    assert topk.percentile_cutoff(df['Cost'], 1) == 199.0
+    top = topk.top_percent_frame(df, 'Cost', 1)
+    assert top['Cost'].tolist() == [200.0, 199.0]
+
+
+def test_heavy_hitters_exact_within_capacity():
+    keys = np.array(['a', 'b', 'a', 'c', 'b', 'a'], dtype=object)
+    weights = np.array([5, 1, 5, 2, 1, 5], dtype=float)
+    sketch = topk.HeavyHitters(capacity=10).update(keys, weights)
+    assert sketch.top(1) == [('a', 15.0, 0.0)]
+    assert dict((key, weight) for key, weight, _ in sketch.top(3)) == {'a': 15.0, 'b': 2.0, 'c': 2.0}
+
+
+def test_heavy_hitters_bounds_when_over_capacity():
+    rng = np.random.default_rng(2)
+    keys = rng.choice([f'k{i}' for i in range(200)], size=20_000).astype(object)
+    keys[:5_000] = 'hot'
+    weights = rng.uniform(1, 10, size=len(keys))
+    exact = pd.Series(weights).groupby(keys).sum()
+    sketch = topk.HeavyHitters(capacity=50)
+    for start in range(0, len(keys), 1_000):
+        sketch.update(keys[start:start + 1_000], weights[start:start + 1_000])
+    assert sketch.top(1)[0][0] == 'hot'
+    # Space-Saving: التقدير لا يقل عن الحقيقة ولا يتجاوزها بأكثر من حد الخطأ
+    for key, estimate, error in sketch.top(10):
+        assert exact[key] - 1e-6 <= estimate <= exact[key] + error + 1e-6
+
+
+def test_heavy_hitters_capacity_from_config():
+    assert topk.HeavyHitters().capacity == config.ANALYSIS_CONFIG['HEAVY_HITTERS_CAPACITY']
+
+
+def test_register_stats_feed_heavy_hitters_per_chunk_and_merge():
+    df = pd.DataFrame({
+        'Cost': [100.0, 50.0, 25.0, 10.0, np.nan, 5.0],
+        'Custodian': ['IT', 'HR', 'IT', None, 'HR', 'FIN'],
+        'Manufacturer': ['Dell', 'HP', 'Dell', 'HP', 'HP', None],
+    })
+    whole = summary_stats.RegisterStats.from_frame(df, chunk_size=2)
+    assert whole.heavy_hitters['custodian'].top(3) == [('IT', 125.0, 0.0), ('HR', 50.0, 0.0), ('FIN', 5.0, 0.0)]
+    merged = summary_stats.RegisterStats.from_frame(df.iloc[:3]).merge(
+        summary_stats.RegisterStats.from_frame(df.iloc[3:]))
+    assert merged.heavy_hitters['manufacturer'].top(2) == whole.heavy_hitters['manufacturer'].top(2)
+    assert merged.rows == whole.rows == len(df)
+
+
+def test_analyzer_approximate_custodians_match_exact():
+    rng = np.random.default_rng(3)
+    df = pd.DataFrame({
+        'Tag number': np.arange(500).astype(str),
+        'Custodian': rng.choice(['IT', 'HR', 'FIN', 'OPS', 'GEO'], size=500),
+        'Cost': rng.uniform(10, 1_000, size=500).round(2),
+        'Net Book Value': 0.0,
+        'Depreciation amount': 0.0,
+    })
+    analyzer = asset_models.AssetAnalyzer(df, version='v', cache=query_cache.QueryCache())
+    exact = analyzer.get_assets_by_custodian(k=3)
+    approximate = analyzer.get_assets_by_custodian(k=3, approximate=True)
+    assert approximate.index.tolist() == exact.index.tolist()
+    np.testing.assert_allclose(approximate['Cost'], exact['Cost'], rtol=1e-9)
+    assert (approximate['Max_Error'] == 0).all()
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+محرك أعلى k - نظام إدارة الأصول الثابتة
+اختيار جزئي (argpartition) بدلاً من الفرز الكامل، ومخطط متدفق لأكثر
+المجموعات وزناً يُغذّى مع مُجمِّعات الإحصاءات عند القراءة على دفعات.
+"""
+import heapq
+import math
+
+import numpy as np
+import pandas as pd
+
+import config
+
+
+# -----------------------------------------------------
+# اختيار جزئي على المصفوفات والإطارات
+# -----------------------------------------------------
+def top_k_indices(values, k=None, largest=True):
+    """مواقع أعلى (أو أدنى) k قيمة مرتبة، والقيم المفقودة في الآخر"""
+    values = np.asarray(values, dtype='float64')
+    keyed = -values if largest else values.copy()
+    keyed[np.isnan(keyed)] = np.inf
+    n = len(keyed)
+    if k is None or k >= n:
+        return np.argsort(keyed, kind='stable')
+    if k <= 0:
+        return np.array([], dtype='int64')
+    candidates = np.argpartition(keyed, k - 1)[:k]
+    return candidates[np.argsort(keyed[candidates], kind='stable')]
+
+
+def top_k_frame(df, column, k=None, largest=True):
+    """صفوف أعلى k حسب عمود رقمي (بدون فرز الإطار كاملاً)"""
+    if df.empty or column not in df.columns:
+        return df
+    return df.iloc[top_k_indices(df[column].to_numpy(dtype='float64', na_value=np.nan), k, largest)]
+
+
+def percentile_cutoff(values, percent):
+    """أدنى قيمة ضمن أعلى percent% من القيم (مثلاً 1 = أعلى 1%)"""
+    values = np.asarray(values, dtype='float64')
+    values = values[~np.isnan(values)]
+    if len(values) == 0:
+        return float('nan')
+    k = max(1, math.ceil(len(values) * percent / 100))
+    return float(np.partition(values, len(values) - k)[len(values) - k])
+
+
+def top_percent_frame(df, column, percent):
+    """صفوف أعلى percent% حسب عمود رقمي، مرتبة تنازلياً"""
+    if df.empty or column not in df.columns:
+        return df
+    values = df[column].to_numpy(dtype='float64', na_value=np.nan)
+    k = max(1, math.ceil(int((~np.isnan(values)).sum()) * percent / 100))
+    return df.iloc[top_k_indices(values, k)]
+
+
+# -----------------------------------------------------
+# مخطط متدفق (يُغذّى دفعةً بدفعة ويُدمج)
+# -----------------------------------------------------
+class HeavyHitters:
+    """أكثر المجموعات وزناً (Space-Saving الموزون) بذاكرة ثابتة السعة"""
+
+    def __init__(self, capacity=None):
+        self.capacity = capacity or config.ANALYSIS_CONFIG['HEAVY_HITTERS_CAPACITY']
+        self.counters = {}  # المفتاح -> [الوزن، الخطأ الأقصى]
+        self._heap = []  # (الوزن عند الإدراج، المفتاح): كومة صغرى كسولة لإيجاد أصغر عداد
+
+    def update(self, keys, weights=None):
+        """إضافة دفعة من المفاتيح (مع أوزان اختيارية مثل التكلفة)"""
+        keys = np.asarray(keys, dtype=object)
+        weights = np.ones(len(keys)) if weights is None else np.nan_to_num(np.asarray(weights, dtype='float64'))
+        # تجميع الدفعة أولاً حتى يمر كل مفتاح مميز مرة واحدة فقط
+        codes, uniques = pd.factorize(keys)
+        totals = np.bincount(codes, weights=weights, minlength=len(uniques))
+        for key, weight in zip(uniques.astype(str).tolist(), totals.tolist()):
+            self._offer(key, weight, 0.0)
+        return self
+
+    def _offer(self, key, weight, error):
+        if key in self.counters:
+            self.counters[key][0] += weight
+            self.counters[key][1] += error
+            return
+        if len(self.counters) < self.capacity:
+            self.counters[key] = [weight, error]
+        else:
+            # استبدال أصغر عداد؛ وزنه يصبح حداً أعلى للخطأ
+            floor = self.counters.pop(self._pop_min())[0]
+            self.counters[key] = [floor + weight, floor + error]
+        heapq.heappush(self._heap, (self.counters[key][0], key))
+
+    def _pop_min(self):
+        """مفتاح أصغر عداد؛ المدخلات القديمة (مفتاح طُرد أو وزن زاد) تُصحَّح عند ظهورها"""
+        if len(self._heap) > 4 * self.capacity:
+            self._heap = [(weight, key) for key, (weight, _) in self.counters.items()]
+            heapq.heapify(self._heap)
+        while True:
+            weight, key = heapq.heappop(self._heap)
+            counter = self.counters.get(key)
+            if counter is None:
+                continue
+            if counter[0] == weight:
+                return key
+            heapq.heappush(self._heap, (counter[0], key))
+
+    def merge(self, other):
+        for key, (weight, error) in other.counters.items():
+            self._offer(key, weight, error)
+        return self
+
+    def top(self, k=10):
+        """أعلى k مجموعة: قائمة (المفتاح، الوزن التقديري، الخطأ الأقصى)"""
+        ranked = sorted(self.counters.items(), key=lambda item: item[1][0], reverse=True)
+        return [(key, weight, error) for key, (weight, error) in ranked[:k]]